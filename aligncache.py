@@ -0,0 +1,121 @@
+# ==============================================================================
+# aligncache.py — Kgosi_View Overlay Alignment Cache
+# ==============================================================================
+"""
+Overlay row arrays shared by every session and kept across restarts.
+
+An overlay is drawn against the main series through one int array: the
+overlay row for every main bar (TimeIndex.align). Instead of every session
+aligning every overlay on each symbol/timeframe change, the arrays live on
+local disk:
+
+    <ALIGN_DIR>/EURUSD-GBPUSD-1H-<version>.npy      int32, one row per main bar
+
+where the version hashes both series' catalog hashes, so a re-export of
+either is a new file (older versions of the pair are deleted once it lands).
+A cached file is memory-mapped, so sessions and processes share its pages.
+A missing one is built on a background thread; until it lands, the rows a
+frame asks for are aligned on the spot (one searchsorted over just those
+rows), so the visible range never waits for the full history.
+
+Environment:
+    KGOSI_ALIGN_CACHE   directory (default: <KGOSI_LOCAL_CACHE>/align, else cache/align)
+"""
+
+import os
+import re
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+import numpy as np
+
+import localcache
+
+ALIGN_DIR = os.environ.get('KGOSI_ALIGN_CACHE') or os.path.join(localcache.CACHE_DIR or 'cache', 'align')
+MAX_ENTRIES = 64          # alignments held open per process
+
+
+def series_version(store, version=None):
+    """The catalog hash, or row count + last bar for series the catalog does not list"""
+    if version:
+        return version
+    return f"{len(store)}-{int(store.index.ns[-1]) if len(store) else 0}"
+
+
+class Alignment:
+    """Overlay row for every main bar: the memory-mapped array once built, else computed per request"""
+
+    def __init__(self, main, overlay):
+        self.main_ns = main.index.ns
+        self.overlay_ns = overlay.index.ns
+        self.rows = None
+
+    def __len__(self):
+        return len(self.main_ns)
+
+    def __getitem__(self, index):
+        rows = self.rows
+        if rows is not None:
+            return rows[index]
+        # Same result as TimeIndex.align, for the requested main rows only
+        found = np.searchsorted(self.overlay_ns, self.main_ns[index], side='left')
+        return np.minimum(found, len(self.overlay_ns) - 1)
+
+
+class AlignCache:
+    """Alignments by (main, overlay, timeframe, versions), on disk under `folder`"""
+
+    def __init__(self, folder=ALIGN_DIR):
+        self.dir = Path(folder)
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()      # path -> Alignment
+
+    def get(self, main_symbol, overlay_symbol, timeframe, main, overlay, main_version=None, overlay_version=None):
+        """The pair's Alignment; usable at once, backed by the full array when that is built"""
+        name = f"{main_symbol.upper()}-{overlay_symbol.upper()}-{timeframe}"
+        key = f"{series_version(main, main_version)}/{series_version(overlay, overlay_version)}"
+        path = self.dir / f"{name}-{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}.npy"
+        with self.lock:
+            alignment = self.entries.get(path)
+            if alignment is not None:
+                self.entries.move_to_end(path)
+                return alignment
+            alignment = self.entries[path] = Alignment(main, overlay)
+            while len(self.entries) > MAX_ENTRIES:
+                self.entries.popitem(last=False)
+        if not self._open(alignment, path):
+            threading.Thread(
+                target=self._build, args=(alignment, path, name, main, overlay),
+                name='kgosi-align', daemon=True,
+            ).start()
+        return alignment
+
+    def _open(self, alignment, path):
+        try:
+            rows = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return False
+        if len(rows) != len(alignment):
+            return False
+        alignment.rows = rows
+        return True
+
+    def _build(self, alignment, path, name, main, overlay):
+        rows = overlay.index.align(main.index).astype(np.int32)
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+            np.save(tmp, rows)
+            os.replace(tmp, path)
+            # Exactly this pair's files: a shifted timeframe ('1D-2H') starts with the same name
+            version = re.compile(re.escape(name) + r"-[0-9a-f]{16}\.npy")
+            for stale in self.dir.glob(f"{name}-*.npy"):
+                if stale != path and version.fullmatch(stale.name):
+                    # Sessions that mapped it keep their pages until they drop it
+                    stale.unlink(missing_ok=True)
+            alignment.rows = np.load(path, mmap_mode='r')
+        except OSError:
+            # No writable cache directory: keep this process's copy in memory
+            alignment.rows = rows
@@ -1,9 +1,23 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import os
-import time
-
+import copy
+
+import aligncache
+import barstore
+import catalog
+import cursormap
+import dataserver
+import indicators
+import intrabar
+import localcache
+import lod
+import replay
+import telemetry
+import timeframes
+import warehouse
 from config import THEME, CSS, CHART_LAYOUT, header_bar, status_bar, playback_section_label, section_divider
 
 # ==============================================================================
@@ -17,6 +31,10 @@ st.set_page_config(
 )
 
 DATA_PATH = os.environ.get('KGOSI_DATA_PATH', '/mnt/kgosi_view_data/projects/finance/data')
+DATA_SERVER = os.environ.get('KGOSI_DATASERVER')
+
+# Per-rerun phase timings, cache hits and frame sizes (telemetry.py)
+rerun_trace = telemetry.start('rerun')
 
 # Inject Master CSS
 st.markdown(CSS, unsafe_allow_html=True)
@@ -39,106 +57,312 @@ defaults = {
     'position_type': None,
     'balance': 10000.0,
     'realized_pnl': 0.0,
+    'trade_checked': 0,     # last bar checked against SL/TP
+    'trade_minute': None,   # first 1M row still to check when the position opened inside a bar
+    # Replay minute (cursormap.py): the 1M row the replay stands at inside the cursor bar
+    'minute': None,
+    'minute_cursor': None,  # cursor the minute belongs to (None: re-anchor at it after a TF switch)
+    'switch_time': None,    # epoch ns to re-anchor at after a symbol switch
     # Overlays
     'overlay_symbols': [],
     'overlay_cache': {},
     'overlay_cache_key': None,
+    'indicators': [],
+    'indicator_streams': {},  # spec -> indicators.CursorStream kept at the replay cursor
     # Playback
     'is_playing': False,
     'playback_speed': 200,
     'last_advance_time': None,
     'substep': 0,
     'substeps_per_candle': 6,
+    # Client-side replay (see replay.py)
+    'replay_seq': 0,
+    'replay_anchor': None,
+    'chart_sync': replay.ChartSync(),
+    # Diagnostics
+    'profile_next': False,
+    'profile_report': None,
 }
 for k, v in defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
+# ── Playback position / full-frame requests / timings from the chart component ──
+replay_report = st.session_state.get('replay_chart')
+if replay_report and replay_report.get('seq') == st.session_state.replay_seq:
+    reported_cursor = replay.apply_report(st.session_state.chart_sync, replay_report)
+    if reported_cursor is not None:
+        st.session_state.cursor = reported_cursor
+        st.session_state.replay_anchor = reported_cursor
+    st.session_state.replay_seq += 1
+    if replay_report.get('ended'):
+        st.session_state.is_playing = False
+
+# ── Opt-in profile of this one rerun (requested from the diagnostics sidebar) ──
+rerun_profiler = None
+if st.session_state.profile_next:
+    st.session_state.profile_next = False
+    rerun_profiler = telemetry.Profiler()
+    rerun_profiler.start()
+
 
 # ==============================================================================
 # DATA ENGINE
 # ==============================================================================
-@st.cache_data
-def get_data(symbol, timeframe):
-    p1 = os.path.join(DATA_PATH, f"{symbol}_1M.csv")
-    p2 = os.path.join(DATA_PATH, f"{symbol}.csv")
-    path = p1 if os.path.exists(p1) else p2
+@st.cache_resource
+def metrics_server():
+    # One /metrics endpoint per Streamlit process
+    return telemetry.serve_metrics(telemetry.METRICS_PORT) if telemetry.METRICS_PORT else None
+
+
+@st.cache_resource
+def data_client():
+    return dataserver.DataClient(DATA_SERVER)
+
 
-    if not os.path.exists(path):
-        return pd.DataFrame()
+@st.cache_resource
+def local_cache():
+    # Local-disk copies of the stores (KGOSI_LOCAL_CACHE); None maps them from the share
+    return localcache.LocalCache(localcache.CACHE_DIR, DATA_PATH) if localcache.CACHE_DIR else None
 
+
+@st.cache_resource(max_entries=64)
+def load_local(symbol, timeframe, version=None):
+    # Memory-mapped store shared by every session of this process;
+    # version (the catalog's content hash) makes a re-exported series a new entry
+    telemetry.miss()
     try:
-        df = pd.read_csv(path, parse_dates=['Date'])
-        if timeframe != '1M':
-            tf_map = {'5M': '5min', '15M': '15min', '1H': '1h', '4H': '4h', '1D': '1D'}
-            if timeframe in tf_map:
-                df = df.set_index('Date').resample(tf_map[timeframe]).agg({
-                    'Open': 'first', 'High': 'max', 'Low': 'min',
-                    'Close': 'last', 'Volume': 'sum'
-                }).dropna().reset_index()
-        return df
+        cache = local_cache()
+        if cache is not None:
+            path = cache.series(symbol, timeframe)
+            if path is not None:
+                # A TF switch opens a neighbouring timeframe next: copy those in the background
+                cache.prefetch(symbol, localcache.neighbours(timeframe))
+                return barstore.BarStore.open(path)
+        return barstore.open_store(symbol, timeframe, root=DATA_PATH)
     except Exception:
-        return pd.DataFrame()
+        return barstore.BarStore.from_frame(pd.DataFrame(columns=barstore.BAR_DTYPE.names))
+
+
+@st.cache_resource(max_entries=16)
+def load_custom(symbol, timeframe, base_version=None):
+    # Any interval besides the stored six, aggregated from the memory-mapped 1M store
+    telemetry.miss()
+    return barstore.BarStore(timeframes.resample(get_data(symbol, warehouse.BASE_TIMEFRAME).bars, timeframe))
+
+
+def get_data(symbol, timeframe):
+    if timeframe not in barstore.TIMEFRAMES:
+        with telemetry.lookup('bars'):
+            return load_custom(symbol, timeframe, catalog.version(symbol, warehouse.BASE_TIMEFRAME, DATA_PATH))
+    # Node-wide shared-memory cache when the data server is running
+    if DATA_SERVER:
+        try:
+            return data_client().get(symbol, timeframe)
+        except (OSError, RuntimeError):
+            pass
+    with telemetry.lookup('bars'):
+        return load_local(symbol, timeframe, catalog.version(symbol, timeframe, DATA_PATH))
+
+
+@st.cache_resource
+def indicator_cache():
+    # Full-history indicator arrays shared by every session of this process
+    return indicators.IndicatorCache()
+
 
+@st.cache_resource(max_entries=8)
+def load_cursor_map(symbol, timeframe, rows, base_version):
+    # rows / base_version: the loaded series and the 1M store, so a re-export gets fresh offsets
+    return cursormap.CursorMap(get_data(symbol, timeframe), get_data(symbol, warehouse.BASE_TIMEFRAME))
 
-def align_overlay_data(main_dates, overlay_df):
-    if overlay_df.empty:
-        return pd.DataFrame()
-    aligned = pd.DataFrame({'Date': main_dates}).sort_values('Date')
-    overlay_sorted = overlay_df.sort_values('Date')
-    res = pd.merge_asof(aligned, overlay_sorted, on='Date', direction='forward')
-    if res['Close'].isna().any():
-        res.ffill(inplace=True)
-        res.bfill(inplace=True)
-    return res
 
+@st.cache_resource(max_entries=8)
+def load_resolver(symbol, timeframe, rows, base_version):
+    cursor_map = load_cursor_map(symbol, timeframe, rows, base_version)
+    return intrabar.IntrabarResolver(cursor_map.bars, cursor_map.minutes, cursor_map.offsets)
+
+
+@st.cache_resource
+def align_cache():
+    # Overlay row arrays shared by every session and kept on disk across restarts
+    return aligncache.AlignCache()
+
+
+metrics_server()
 
 # ── Load available files ──
+telemetry.phase('load')
 try:
-    files = sorted(set(
-        f.replace('_1M.csv', '').replace('.csv', '')
-        for f in os.listdir(DATA_PATH) if f.endswith('.csv')
-    ))
+    # The refinery's catalog; the share is only listed before one exists
+    files = catalog.symbols(DATA_PATH) or warehouse.list_symbols(DATA_PATH)
     files = files if files else ['EURUSD']
     overlay_files = [f for f in files if f != st.session_state.symbol]
 except Exception:
     files, overlay_files = ['EURUSD'], []
 
-df = get_data(st.session_state.symbol, st.session_state.timeframe)
-if df.empty:
+bars = get_data(st.session_state.symbol, st.session_state.timeframe)
+if bars.empty:
     st.error("No data found. Check DATA_PATH.")
     st.stop()
 
 
 # ── Overlay Cache ──
 def ensure_overlay_cache():
+    tf = st.session_state.timeframe
+    main_version = catalog.version(st.session_state.symbol, tf, DATA_PATH)
+    overlay_versions = {sym: catalog.version(sym, tf, DATA_PATH) for sym in st.session_state.overlay_symbols}
     current_key = (
         tuple(st.session_state.overlay_symbols),
-        st.session_state.timeframe,
+        tf,
         st.session_state.symbol,
+        # A re-exported series (main or overlay) needs fresh alignments; an object id could be reused
+        aligncache.series_version(bars, main_version),
+        tuple(overlay_versions.values()),
     )
     if st.session_state.get('overlay_cache_key') != current_key:
+        telemetry.miss()
         st.session_state.overlay_cache = {}
         for sym in st.session_state.overlay_symbols:
-            odf = get_data(sym, st.session_state.timeframe)
-            if not odf.empty:
-                aligned = align_overlay_data(df['Date'], odf)
-                st.session_state.overlay_cache[sym] = aligned
+            overlay = get_data(sym, tf)
+            if not overlay.empty:
+                # Sessions share the alignment object; the bars stay memory-mapped
+                rows = align_cache().get(
+                    st.session_state.symbol, sym, tf, bars, overlay, main_version, overlay_versions[sym],
+                )
+                st.session_state.overlay_cache[sym] = (overlay, rows)
         st.session_state.overlay_cache_key = current_key
 
 
-ensure_overlay_cache()
+telemetry.phase('overlays')
+with telemetry.lookup('overlays'):
+    ensure_overlay_cache()
+
+# ── Indicators: cached full-history lines; the chart only receives the visible slice ──
+telemetry.phase('indicators')
+# The catalog version in the key: a re-export with corrected prices gets fresh lines
+series_version = catalog.version(st.session_state.symbol, st.session_state.timeframe, DATA_PATH)
+indicator_sets = {
+    spec: indicator_cache().get(st.session_state.symbol, st.session_state.timeframe, spec, bars, series_version)
+    for spec in st.session_state.indicators
+}
+indicator_lines = [(spec, name, values) for spec, lines in indicator_sets.items() for name, values in lines.items()]
 
 # ── View Slicing ──
-max_idx = len(df) - 1
+telemetry.phase('slice')
+base_version = catalog.version(st.session_state.symbol, warehouse.BASE_TIMEFRAME, DATA_PATH)
+cursor_map = None
+if not get_data(st.session_state.symbol, warehouse.BASE_TIMEFRAME).empty:
+    cursor_map = load_cursor_map(st.session_state.symbol, st.session_state.timeframe, len(bars), base_version)
+
+# A TF or symbol switch keeps the replay on the same minute; any other cursor move or playback drops it
+if cursor_map is not None:
+    if st.session_state.switch_time is not None:
+        st.session_state.minute = cursor_map.minute_at(st.session_state.switch_time)
+        st.session_state.minute_cursor = None
+    if st.session_state.minute is not None and st.session_state.minute_cursor is None:
+        st.session_state.cursor = st.session_state.minute_cursor = cursor_map.bar_of(st.session_state.minute)
+        # The old series' bar indexes mean nothing here; recheck SL/TP from the cursor bar on
+        st.session_state.trade_checked = st.session_state.cursor - 1
+st.session_state.switch_time = None
+if cursor_map is None or st.session_state.is_playing or st.session_state.cursor != st.session_state.minute_cursor:
+    st.session_state.minute = None
+
+max_idx = len(bars) - 1
 st.session_state.cursor = min(st.session_state.cursor, max_idx)
 view_start = max(0, st.session_state.cursor - st.session_state.zoom)
-view_df = df.iloc[view_start: st.session_state.cursor + 1].reset_index(drop=True)
-curr = df.iloc[st.session_state.cursor]
+# Wide windows are drawn as buckets from the store's LOD pyramid (see lod.py)
+view_level = lod.level_for(st.session_state.cursor + 1 - view_start)
+
+# The cursor bar still forming at the replay minute (None once it is complete)
+in_progress = None
+if st.session_state.minute is not None:
+    in_progress = cursor_map.partial(st.session_state.cursor, st.session_state.minute)
+replay_minute = None
+if cursor_map is not None:
+    replay_minute = st.session_state.minute if st.session_state.minute is not None else cursor_map.last_minute(st.session_state.cursor)
+curr = bars.row(st.session_state.cursor) if in_progress is None else pd.DataFrame(in_progress).iloc[0]
+
+# The full-history lines hold the completed cursor bar; a forming one gets the
+# values of its partial OHLC from updaters kept at the cursor
+st.session_state.indicator_streams = {
+    spec: st.session_state.indicator_streams.get(spec) or indicators.CursorStream(spec) for spec in indicator_sets
+}
+indicator_at = {}
+if in_progress is not None:
+    series_key = (st.session_state.symbol, st.session_state.timeframe, aligncache.series_version(bars, series_version))
+    for spec, lines in indicator_sets.items():
+        indicator_at.update(st.session_state.indicator_streams[spec].at(
+            bars, lines, st.session_state.cursor, in_progress, series_key,
+        ))
+
+
+def close_position(exit_price, reason, bar=None):
+    """Realize the open position at exit_price and log it in st.session_state.trades"""
+    if st.session_state.position_type == "LONG":
+        pnl = (exit_price - st.session_state.entry_price) * st.session_state.position
+    else:
+        pnl = (st.session_state.entry_price - exit_price) * st.session_state.position
+    st.session_state.trades.append({
+        'side': st.session_state.position_type, 'entry': st.session_state.entry_price,
+        'exit': exit_price, 'reason': reason, 'pnl': pnl,
+        'time': pd.Timestamp(bars['Date'][st.session_state.cursor if bar is None else bar]),
+    })
+    st.session_state.realized_pnl += pnl
+    st.session_state.balance += pnl
+    st.session_state.position = 0
+    st.session_state.position_type = None
+    st.session_state.entry_price = 0.0
+    st.session_state.trade_minute = None
+
+
+# ── SL / TP: the first bar since the last check that touched a level closes the position ──
+# A forming cursor bar is checked once it is complete
+checked_to = st.session_state.cursor - (in_progress is not None)
+if st.session_state.position != 0 and (
+    checked_to > st.session_state.trade_checked or st.session_state.trade_minute is not None
+):
+    resolver = load_resolver(st.session_state.symbol, st.session_state.timeframe, len(bars), base_version)
+    side = 1 if st.session_state.position_type == "LONG" else -1
+    hit = None
+    if st.session_state.trade_minute is not None:
+        # Opened inside a bar: that bar counts from the minute after the entry, up to
+        # the replay minute while it forms; the bar check below takes over once it is complete
+        entry_bar = st.session_state.trade_checked + 1
+        forming = entry_bar > checked_to
+        if not forming:
+            end = resolver.minutes_of(entry_bar)[1]
+        elif in_progress is not None:
+            end = max(st.session_state.trade_minute, st.session_state.minute + 1)
+        else:
+            # Stepped back before the entry: nothing new to check
+            end = st.session_state.trade_minute
+        minute_hit = resolver.exit_in_minutes(
+            st.session_state.trade_minute, end, side,
+            sl=st.session_state.sl_price, tp=st.session_state.tp_price,
+        )
+        if minute_hit is not None:
+            row, reason, fill = minute_hit
+            hit = int(np.searchsorted(resolver.offsets, row, side='right')) - 1, reason, fill
+        elif forming:
+            st.session_state.trade_minute = end
+        else:
+            st.session_state.trade_checked, st.session_state.trade_minute = entry_bar, None
+    if hit is None and checked_to > st.session_state.trade_checked:
+        # A bar that spans both levels is settled from its 1M minutes
+        hit = resolver.exit_between(
+            st.session_state.trade_checked + 1, checked_to + 1, side,
+            sl=st.session_state.sl_price, tp=st.session_state.tp_price,
+        )
+    if hit is not None:
+        hit_bar, reason, fill = hit
+        close_position(fill, reason, bar=hit_bar)
+if st.session_state.trade_minute is None:
+    st.session_state.trade_checked = checked_to
 
 # Calculate change %
 if st.session_state.cursor > 0:
-    prev_close = df.iloc[st.session_state.cursor - 1]['Close']
+    prev_close = float(bars['Close'][st.session_state.cursor - 1])
     change_pct = ((curr['Close'] - prev_close) / prev_close) * 100
 else:
     change_pct = 0.0
@@ -155,7 +379,8 @@ if st.session_state.position != 0 and st.session_state.entry_price > 0:
 # ==============================================================================
 # TOOLBAR — Symbol | TF | Overlays
 # ==============================================================================
-tb1, tb2, tb3, tb_spacer = st.columns([1.2, 0.8, 2.5, 5.5])
+telemetry.phase('widgets')
+tb1, tb2, tb3, tb4, tb5, tb_spacer = st.columns([1.2, 0.8, 2.5, 0.9, 2.5, 2.1])
 
 with tb1:
     new_sym = st.selectbox(
@@ -165,16 +390,34 @@ with tb1:
     )
     if new_sym != st.session_state.symbol:
         st.session_state.symbol = new_sym
-        st.session_state.cursor = min(st.session_state.cursor, 500)
+        if cursor_map is not None:
+            # The same moment in the new symbol, found once its 1M store is loaded
+            st.session_state.switch_time = int(cursor_map.minutes.index.ns[replay_minute])
+        else:
+            st.session_state.cursor = min(st.session_state.cursor, 500)
         st.rerun()
 
 with tb2:
-    tfs = ['1M', '5M', '15M', '1H', '4H', '1D']
-    cur_tf_idx = tfs.index(st.session_state.timeframe) if st.session_state.timeframe in tfs else 3
-    new_tf = st.selectbox("TF", tfs, index=cur_tf_idx, label_visibility="collapsed")
+    # Stored timeframes, then presets; any other spec (7M, 3H, 1W-2H...) can be typed in
+    tfs = barstore.TIMEFRAMES + timeframes.PRESETS
+    if st.session_state.timeframe not in tfs:
+        tfs = tfs + [st.session_state.timeframe]
+    new_tf = st.selectbox(
+        "TF", tfs, index=tfs.index(st.session_state.timeframe),
+        accept_new_options=True, label_visibility="collapsed",
+    )
+    new_tf = new_tf.strip().upper()
     if new_tf != st.session_state.timeframe:
-        st.session_state.timeframe = new_tf
-        st.rerun()
+        if timeframes.is_valid(new_tf):
+            if cursor_map is not None:
+                # Same symbol, same 1M rows: the new cursor is the bar holding this minute
+                st.session_state.minute = replay_minute
+                st.session_state.minute_cursor = None
+            st.session_state.timeframe = new_tf
+            st.rerun()
+        elif st.session_state.get('tf_rejected') != new_tf:
+            st.session_state.tf_rejected = new_tf
+            st.toast(f"Unknown timeframe {new_tf} (try 7M, 2H, 1W or 1D+22H)")
 
 with tb3:
     selected_overlays = st.multiselect(
@@ -188,6 +431,29 @@ with tb3:
         st.session_state.overlay_cache_key = None
         st.rerun()
 
+with tb4:
+    zooms = [50, 150, 500, 2_000, 10_000, 50_000, 250_000, 1_000_000, 10_000_000]
+    new_zoom = st.selectbox(
+        "Zoom", zooms,
+        index=zooms.index(st.session_state.zoom) if st.session_state.zoom in zooms else 1,
+        format_func=lambda n: "ALL" if n == zooms[-1] else f"{n:,} BARS",
+        label_visibility="collapsed",
+    )
+    if new_zoom != st.session_state.zoom:
+        st.session_state.zoom = new_zoom
+        st.rerun()
+
+with tb5:
+    selected_indicators = st.multiselect(
+        "Indicators", options=indicators.PRESETS,
+        default=st.session_state.indicators,
+        max_selections=5, label_visibility="collapsed",
+        placeholder="Add indicators...",
+    )
+    if selected_indicators != st.session_state.indicators:
+        st.session_state.indicators = selected_indicators
+        st.rerun()
+
 
 # ==============================================================================
 # PLAYBACK CONTROLS BAR
@@ -245,10 +511,11 @@ with pc3:
 
 with pc4:
     st.markdown(playback_section_label("GO TO DATE"), unsafe_allow_html=True)
-    # Build min/max dates from the dataset
-    min_date = df['Date'].iloc[0].date()
-    max_date = df['Date'].iloc[-1].date()
-    current_date = df.iloc[st.session_state.cursor]['Date'].date()
+    # Min/max dates from the catalog (the loaded series when it is not cataloged)
+    listed = catalog.entry(st.session_state.symbol, st.session_state.timeframe, DATA_PATH)
+    current_date = curr['Date'].date()
+    min_date = min(pd.Timestamp(listed['first'] if listed else bars['Date'][0]).date(), current_date)
+    max_date = max(pd.Timestamp(listed['last'] if listed else bars['Date'][-1]).date(), current_date)
     picked_date = st.date_input(
         "Go to date",
         value=current_date,
@@ -257,17 +524,15 @@ with pc4:
         label_visibility="collapsed",
     )
     if picked_date != current_date:
-        # Find the closest bar index to the selected date
-        target = pd.Timestamp(picked_date)
-        idx = (df['Date'] - target).abs().idxmin()
-        st.session_state.cursor = int(idx)
+        # Binary search for the closest bar to the selected date
+        st.session_state.cursor = bars.index.nearest(picked_date)
         st.rerun()
 
 with pc5:
     st.markdown(playback_section_label("RESET"), unsafe_allow_html=True)
     if st.button("↺", use_container_width=True, help="Reset to bar 500"):
         st.session_state.update({
-            'cursor': 500, 'is_playing': False,
+            'cursor': 500, 'is_playing': False, 'minute': None,
             'sl_price': 0.0, 'tp_price': 0.0,
             'entry_price': 0.0, 'position': 0,
             'position_type': None,
@@ -279,114 +544,189 @@ with pc5:
 # ==============================================================================
 # CANDLESTICK CHART
 # ==============================================================================
-fig = go.Figure()
-
-# Candlesticks
-fig.add_trace(go.Candlestick(
-    x=view_df['Date'],
-    open=view_df['Open'],
-    high=view_df['High'],
-    low=view_df['Low'],
-    close=view_df['Close'],
-    increasing=dict(line=dict(color=THEME['GREEN'], width=1), fillcolor=THEME['GREEN']),
-    decreasing=dict(line=dict(color=THEME['RED'], width=1), fillcolor=THEME['RED']),
-    name=st.session_state.symbol,
-    whiskerwidth=0.4,
-))
-
-# Overlays from cache
-overlay_idx = 0
-overlay_colors = [THEME['BLUE'], THEME['YELLOW'], THEME['PURPLE'], THEME['CYAN']]
-for sym in st.session_state.overlay_symbols:
-    if sym in st.session_state.overlay_cache:
-        full_overlay = st.session_state.overlay_cache[sym]
-        ov_view = full_overlay.iloc[view_start: st.session_state.cursor + 1]
-        color = overlay_colors[overlay_idx % len(overlay_colors)]
-        yaxis_key = f'y{overlay_idx + 2}'
+# Oscillator panes use yaxis6.. (overlays take yaxis2..5)
+PANE_AXIS = 6
+PANE_HEIGHT = 0.18
+
+
+def build_figure():
+    """Full figure for the current view; only needed when the browser asks for a full frame"""
+    fig = go.Figure()
+
+    # Candlesticks (plain lists, so the browser can splice deltas into them)
+    view_bars = lod.candles(bars, view_start, st.session_state.cursor + 1, view_level)
+    if in_progress is not None:
+        # The last candle stops at the replay minute
+        view_bars = np.array(view_bars)
+        first = lod.bounds(view_start, st.session_state.cursor + 1, view_level)[-2]
+        last = lod.aggregate(np.concatenate([bars.bars[first:st.session_state.cursor], in_progress]), [0])
+        last['Date'] = view_bars['Date'][-1]
+        view_bars[-1] = last[0]
+    view_df = pd.DataFrame(view_bars)
+    candles = replay.bar_payload(view_df)
+    fig.add_trace(go.Candlestick(
+        x=candles['x'],
+        open=candles['open'],
+        high=candles['high'],
+        low=candles['low'],
+        close=candles['close'],
+        increasing=dict(line=dict(color=THEME['GREEN'], width=1), fillcolor=THEME['GREEN']),
+        decreasing=dict(line=dict(color=THEME['RED'], width=1), fillcolor=THEME['RED']),
+        name=st.session_state.symbol,
+        whiskerwidth=0.4,
+    ))
 
+    # Overlays from cache
+    overlay_idx = 0
+    overlay_colors = [THEME['BLUE'], THEME['YELLOW'], THEME['PURPLE'], THEME['CYAN']]
+    for sym in st.session_state.overlay_symbols:
+        if sym in st.session_state.overlay_cache:
+            overlay, rows = st.session_state.overlay_cache[sym]
+            ov_view = replay.line_payload(pd.DataFrame(
+                lod.line(bars, overlay, rows, view_start, st.session_state.cursor + 1, len(view_df))
+            ))
+            color = overlay_colors[overlay_idx % len(overlay_colors)]
+            yaxis_key = f'y{overlay_idx + 2}'
+
+            fig.add_trace(go.Scatter(
+                x=ov_view['x'], y=ov_view['y'],
+                mode='lines', name=sym, yaxis=yaxis_key,
+                line=dict(color=color, width=1.5),
+            ))
+            overlay_idx += 1
+
+    # Indicators: moving averages / bands on the price axis, oscillators in panes below
+    if view_level:
+        view_rows = lod.bounds(view_start, st.session_state.cursor + 1, view_level)[1:] - 1
+    else:
+        view_rows = np.arange(view_start, st.session_state.cursor + 1)
+    indicator_colors = [THEME['YELLOW'], THEME['CYAN'], THEME['PURPLE'], THEME['WHITE'], THEME['GREEN']]
+    panes = [spec for spec in st.session_state.indicators if indicators.parse(spec)[0] not in indicators.PRICE_PANE]
+    for spec, name, values in indicator_lines:
+        line = replay.value_line(bars, values)(view_rows)
+        if name in indicator_at:
+            value = indicator_at[name]
+            line['y'][-1] = None if value != value else round(value, replay.PRICE_DECIMALS)
         fig.add_trace(go.Scatter(
-            x=ov_view['Date'], y=ov_view['Close'],
-            mode='lines', name=sym, yaxis=yaxis_key,
-            line=dict(color=color, width=1.5),
+            x=line['x'], y=line['y'],
+            mode='lines', name=name,
+            yaxis=f'y{PANE_AXIS + panes.index(spec)}' if spec in panes else 'y',
+            line=dict(color=indicator_colors[st.session_state.indicators.index(spec) % len(indicator_colors)], width=1),
         ))
-        overlay_idx += 1
-
-# SL / TP / Entry lines
-if st.session_state.sl_price > 0:
-    fig.add_hline(
-        y=st.session_state.sl_price, line_dash="dash",
-        line_color=THEME['RED'], line_width=1,
-        annotation_text="SL", annotation_font_color=THEME['RED'],
-        annotation_font_size=10,
-    )
-if st.session_state.tp_price > 0:
-    fig.add_hline(
-        y=st.session_state.tp_price, line_dash="dash",
-        line_color=THEME['GREEN'], line_width=1,
-        annotation_text="TP", annotation_font_color=THEME['GREEN'],
-        annotation_font_size=10,
-    )
-if st.session_state.entry_price > 0:
-    fig.add_hline(
-        y=st.session_state.entry_price, line_dash="dot",
-        line_color=THEME['BLUE'], line_width=1,
-        annotation_text="ENTRY", annotation_font_color=THEME['BLUE'],
-        annotation_font_size=10,
-    )
-
-# Current price marker — horizontal dashed line + annotation on right
-fig.add_shape(
-    type="line",
-    x0=view_df['Date'].iloc[0], x1=view_df['Date'].iloc[-1],
-    y0=curr['Close'], y1=curr['Close'],
-    line=dict(color=THEME['BLUE'], width=0.8, dash="dot"),
-)
-fig.add_annotation(
-    x=view_df['Date'].iloc[-1], y=curr['Close'],
-    text=f" {curr['Close']:,.5f}" if curr['Close'] < 10 else f" {curr['Close']:,.2f}",
-    showarrow=False, xanchor="left",
-    font=dict(family="JetBrains Mono", size=10, color=THEME['WHITE']),
-    bgcolor=THEME['BLUE'], borderpad=3,
-)
 
-# Build layout
-layout = dict(CHART_LAYOUT)
-
-if overlay_idx > 0:
-    # Each overlay axis gets ~7% of chart width on the right
-    chart_right = max(0.65, 0.93 - (overlay_idx * 0.07))
-    layout['xaxis']['domain'] = [0, chart_right]
-    layout['margin'] = dict(l=0, r=10, t=0, b=0)
-
-    for i in range(overlay_idx):
-        color = overlay_colors[i % len(overlay_colors)]
-        # Place each axis in its own slot after the chart area
-        axis_pos = chart_right + 0.02 + (i * 0.07)
-        layout[f'yaxis{i + 2}'] = dict(
-            title=dict(text=st.session_state.overlay_symbols[i], font=dict(color=color, size=10)),
-            tickfont=dict(color=color, family="JetBrains Mono", size=9),
-            overlaying='y', side='right', anchor='free', position=min(axis_pos, 0.99),
-            showgrid=False,
+    # SL / TP / Entry lines
+    if st.session_state.sl_price > 0:
+        fig.add_hline(
+            y=st.session_state.sl_price, line_dash="dash",
+            line_color=THEME['RED'], line_width=1,
+            annotation_text="SL", annotation_font_color=THEME['RED'],
+            annotation_font_size=10,
+        )
+    if st.session_state.tp_price > 0:
+        fig.add_hline(
+            y=st.session_state.tp_price, line_dash="dash",
+            line_color=THEME['GREEN'], line_width=1,
+            annotation_text="TP", annotation_font_color=THEME['GREEN'],
+            annotation_font_size=10,
+        )
+    if st.session_state.entry_price > 0:
+        fig.add_hline(
+            y=st.session_state.entry_price, line_dash="dot",
+            line_color=THEME['BLUE'], line_width=1,
+            annotation_text="ENTRY", annotation_font_color=THEME['BLUE'],
+            annotation_font_size=10,
         )
-else:
-    layout['margin'] = dict(l=0, r=60, t=0, b=0)
 
-fig.update_layout(**layout)
+    # Current price marker — horizontal dashed line + annotation on right
+    fig.add_shape(
+        type="line",
+        x0=candles['x'][0], x1=candles['x'][-1],
+        y0=float(curr['Close']), y1=float(curr['Close']),
+        line=dict(color=THEME['BLUE'], width=0.8, dash="dot"),
+        name='price',
+    )
+    fig.add_annotation(
+        x=candles['x'][-1], y=float(curr['Close']),
+        text=replay.price_text(curr['Close']),
+        showarrow=False, xanchor="left",
+        font=dict(family="JetBrains Mono", size=10, color=THEME['WHITE']),
+        bgcolor=THEME['BLUE'], borderpad=3,
+        name='price',
+    )
 
-st.plotly_chart(
-    fig, use_container_width=True,
+    # Build layout
+    layout = copy.deepcopy(CHART_LAYOUT)
+
+    if overlay_idx > 0:
+        # Each overlay axis gets ~7% of chart width on the right
+        chart_right = max(0.65, 0.93 - (overlay_idx * 0.07))
+        layout['xaxis']['domain'] = [0, chart_right]
+        layout['margin'] = dict(l=0, r=10, t=0, b=0)
+
+        for i in range(overlay_idx):
+            color = overlay_colors[i % len(overlay_colors)]
+            # Place each axis in its own slot after the chart area
+            axis_pos = chart_right + 0.02 + (i * 0.07)
+            layout[f'yaxis{i + 2}'] = dict(
+                title=dict(text=st.session_state.overlay_symbols[i], font=dict(color=color, size=10)),
+                tickfont=dict(color=color, family="JetBrains Mono", size=9),
+                overlaying='y', side='right', anchor='free', position=min(axis_pos, 0.99),
+                showgrid=False,
+            )
+    else:
+        layout['margin'] = dict(l=0, r=60, t=0, b=0)
+
+    if panes:
+        layout['yaxis']['domain'] = [PANE_HEIGHT * len(panes), 1]
+        for i, spec in enumerate(panes):
+            layout[f'yaxis{PANE_AXIS + i}'] = dict(
+                layout['yaxis'], domain=[i * PANE_HEIGHT, (i + 1) * PANE_HEIGHT - 0.02], anchor='x',
+                title=dict(text=spec, font=dict(size=9, color=THEME['DIM'])),
+            )
+
+    fig.update_layout(**layout)
+    return fig
+
+
+# Anything that changes what is drawn besides the window forces a full frame
+chart_key = (
+    st.session_state.symbol, st.session_state.timeframe,
+    tuple(st.session_state.overlay_symbols), tuple(st.session_state.indicators), st.session_state.zoom,
+    st.session_state.sl_price, st.session_state.tp_price, st.session_state.entry_price,
+    st.session_state.minute,
+)
+# A cursor move not made by the browser's own playback
+jumped = st.session_state.cursor != st.session_state.replay_anchor
+st.session_state.replay_anchor = st.session_state.cursor
+
+telemetry.phase('chart')
+replay.replay_chart(
+    st.session_state.chart_sync, build_figure, bars,
+    [replay.overlay_line(bars, *st.session_state.overlay_cache[sym])
+     for sym in st.session_state.overlay_symbols if sym in st.session_state.overlay_cache]
+    + [replay.value_line(bars, values) for _, _, values in indicator_lines],
+    key=chart_key,
+    cursor=st.session_state.cursor,
+    zoom=st.session_state.zoom,
+    speed_ms=st.session_state.playback_speed,
+    playing=st.session_state.is_playing,
+    jumped=jumped,
+    seq=st.session_state.replay_seq,
+    level=view_level,
     config={
         'displaylogo': False,
         'scrollZoom': True,
+        'responsive': True,
         'modeBarButtonsToAdd': ['drawline', 'drawrect', 'eraseshape'],
         'modeBarButtonsToRemove': ['autoScale2d'],
     },
+    component_key='replay_chart',
 )
 
 # ==============================================================================
 # TRADE PANEL
 # ==============================================================================
-
+telemetry.phase('panel')
 tr1, tr2, tr3, tr4, tr5 = st.columns([1, 1, 1, 1, 1])
 
 with tr1:
@@ -412,6 +752,9 @@ with tr3:
             st.session_state.position = 100000
             st.session_state.position_type = "LONG"
             st.session_state.entry_price = curr['Close']
+            # On a forming bar the entry is the replay minute's close: its later minutes still count
+            st.session_state.trade_checked = st.session_state.cursor - (in_progress is not None)
+            st.session_state.trade_minute = None if in_progress is None else st.session_state.minute + 1
             st.rerun()
 
 with tr4:
@@ -423,22 +766,16 @@ with tr4:
             st.session_state.position = 100000
             st.session_state.position_type = "SHORT"
             st.session_state.entry_price = curr['Close']
+            # On a forming bar the entry is the replay minute's close: its later minutes still count
+            st.session_state.trade_checked = st.session_state.cursor - (in_progress is not None)
+            st.session_state.trade_minute = None if in_progress is None else st.session_state.minute + 1
             st.rerun()
 
 with tr5:
     st.markdown(playback_section_label("CLOSE POSITION"), unsafe_allow_html=True)
     if st.button("CLOSE", use_container_width=True, disabled=(st.session_state.position == 0)):
         if st.session_state.position != 0:
-            # Calculate PnL
-            if st.session_state.position_type == "LONG":
-                pnl = (curr['Close'] - st.session_state.entry_price) * st.session_state.position
-            else:
-                pnl = (st.session_state.entry_price - curr['Close']) * st.session_state.position
-            st.session_state.realized_pnl += pnl
-            st.session_state.balance += pnl
-            st.session_state.position = 0
-            st.session_state.position_type = None
-            st.session_state.entry_price = 0.0
+            close_position(float(curr['Close']), 'MANUAL')
             st.rerun()
 
 
@@ -454,21 +791,49 @@ st.markdown(
         position_size=st.session_state.position,
         cursor=st.session_state.cursor,
         total=max_idx,
+        frame_info=replay.frame_info(st.session_state.chart_sync),
     ),
     unsafe_allow_html=True,
 )
 
 
 # ==============================================================================
-# AUTO-REPLAY ENGINE (unchanged logic)
+# DIAGNOSTICS (sidebar)
 # ==============================================================================
-if st.session_state.is_playing:
-    sleep_time = st.session_state.playback_speed / 1000.0
-    time.sleep(max(0.01, sleep_time))
-
-    if st.session_state.cursor < max_idx:
-        st.session_state.cursor += 1
-        st.rerun()
-    else:
-        st.session_state.is_playing = False
+rerun_record = rerun_trace.finish(
+    symbol=st.session_state.symbol, timeframe=st.session_state.timeframe,
+    zoom=st.session_state.zoom, level=view_level, cursor=st.session_state.cursor,
+    overlays=len(st.session_state.overlay_symbols), indicators=len(st.session_state.indicators),
+    playing=st.session_state.is_playing, op=st.session_state.chart_sync.op,
+)
+if rerun_profiler is not None:
+    report, saved = rerun_profiler.stop(folder=telemetry.PROFILE_DIR, name='rerun')
+    st.session_state.profile_report = (rerun_profiler.kind, report, saved.stem if saved else 'rerun')
+
+with st.sidebar:
+    st.markdown(section_divider("DIAGNOSTICS"), unsafe_allow_html=True)
+    st.caption(f"LAST RERUN {rerun_record['total_ms']:.1f} ms")
+    st.dataframe(
+        pd.DataFrame({'ms': rerun_record['phases']}).round(2),
+        use_container_width=True,
+    )
+    for name, counts in rerun_record['cache'].items():
+        st.caption(f"CACHE {name.upper()}: {counts['hit']} HIT / {counts['miss']} MISS")
+    if local_cache() is not None:
+        disk = local_cache().stats()
+        st.caption(f"LOCAL DISK: {disk['series']} SERIES, {disk['bytes'] / 1024 ** 3:,.2f} / {disk['quota'] / 1024 ** 3:,.0f} GB"
+                   f" · {disk['hits']} HIT / {disk['misses']} MISS / {disk['evictions']} EVICTED")
+
+    if st.button("PROFILE NEXT RERUN", use_container_width=True):
+        st.session_state.profile_next = True
         st.rerun()
+    if st.session_state.profile_report:
+        kind, report, stem = st.session_state.profile_report
+        html = kind == 'pyinstrument'
+        st.download_button(
+            "DOWNLOAD PROFILE", report, file_name=f"{stem}.{'html' if html else 'txt'}",
+            mime='text/html' if html else 'text/plain', use_container_width=True,
+        )
+        if not html:
+            with st.expander("cProfile (cumulative)"):
+                st.code(report, language=None)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# backtest.py — Kgosi_View Vectorized Backtest Engine
+# ==============================================================================
+"""
+Headless backtests over a whole bar store, with no per-bar Python loop.
+
+A strategy is a signal array (or a callable returning one from a BarStore):
++1 long, -1 short, 0 flat, decided at each bar's close. The position is taken
+at the next bar's open, so a signal never trades on the bar that produced it.
+
+Every run of identical non-zero positions is one trade:
+    entry   open of the run's first bar
+    exit    first bar inside the run whose low/high touches the SL or TP
+            (found for all runs at once with np.minimum.reduceat), else the
+            open of the bar after the run, else the last close
+When a single bar touches both levels the stop is assumed to fill first and
+the trade is counted in stats['ambiguous'], unless an IntrabarResolver is
+given: then the bar's 1M data decides (intrabar.py).
+
+Equity is marked to market at every close; drawdown and Sharpe come from it.
+
+Run:
+    python backtest.py run --symbol EURUSD --timeframe 1H --strategy sma_cross \\
+        --param fast=20 --param slow=50 [--sl 0.0020] [--tp 0.0040] [--intrabar] [--data-path PATH]
+"""
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import barstore
+import warehouse
+from intrabar import IntrabarResolver
+
+POSITION_SIZE = 100_000      # units per trade, as in the app's trade panel
+STARTING_BALANCE = 10_000.0
+YEAR_NS = 365.25 * 86_400 * 1_000_000_000
+
+TRADE_COLUMNS = ['entry_time', 'exit_time', 'side', 'entry', 'exit', 'reason', 'bars', 'pnl']
+
+
+# ========== STRATEGIES ==========
+
+def _sma(values, window):
+    """Trailing mean; NaN until `window` values are available"""
+    sums = np.cumsum(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        out[window - 1:] = (sums[window - 1:] - np.concatenate(([0.0], sums[:-window]))) / window
+    return out
+
+
+def sma_cross(bars, fast=20, slow=50):
+    """Long while the fast SMA of closes is above the slow one, short while below"""
+    close = np.asarray(bars['Close'], dtype=np.float64)
+    fast_ma, slow_ma = _sma(close, int(fast)), _sma(close, int(slow))
+    with np.errstate(invalid='ignore'):
+        return np.sign(fast_ma - slow_ma).astype(np.int8)
+
+
+def breakout(bars, lookback=20):
+    """Long after a close above the prior `lookback`-bar high, short after one below the low; hold until the opposite break"""
+    lookback = int(lookback)
+    close = np.asarray(bars['Close'], dtype=np.float64)
+    high = pd.Series(np.asarray(bars['High'])).rolling(lookback).max().shift(1).to_numpy()
+    low = pd.Series(np.asarray(bars['Low'])).rolling(lookback).min().shift(1).to_numpy()
+
+    events = np.where(close > high, 1.0, np.where(close < low, -1.0, np.nan))
+    return pd.Series(events).ffill().fillna(0).to_numpy(dtype=np.int8)
+
+
+STRATEGIES = {
+    'sma_cross': sma_cross,
+    'breakout': breakout,
+}
+
+
+# ========== ENGINE ==========
+
+class BacktestResult:
+    """Trades table, per-bar equity/drawdown and summary stats of one run"""
+
+    def __init__(self, trades, dates, equity, stats):
+        self.trades = trades
+        self.dates = dates
+        self.equity = equity
+        self.stats = stats
+
+    @property
+    def drawdown(self):
+        """Fraction below the running equity peak at every bar (<= 0)"""
+        return self.equity / np.maximum.accumulate(self.equity) - 1.0
+
+
+def run(bars, signal, sl=None, tp=None, size=POSITION_SIZE, balance=STARTING_BALANCE, cost=0.0,
+        intrabar=None):
+    """
+    Backtest one signal over a BarStore (what the app's get_data() returns).
+
+    signal: array of -1/0/+1 per bar, or callable(bars) -> such an array
+    sl, tp: stop / target distance from the entry price, in price units (None = off)
+    cost: round-trip cost per unit (spread + commission), in price units
+    intrabar: IntrabarResolver for `bars`, to settle exit bars that touch both levels
+    """
+    if callable(signal):
+        signal = signal(bars)
+    n = len(bars)
+    signal = np.sign(np.nan_to_num(np.asarray(signal, dtype=np.float64))).astype(np.int8)
+    if len(signal) != n:
+        raise ValueError(f"signal has {len(signal)} values for {n} bars")
+
+    o, h, l, c = (np.asarray(bars[k], dtype=np.float64) for k in ('Open', 'High', 'Low', 'Close'))
+    dates = np.asarray(bars['Date'])
+    if n == 0:
+        trades = pd.DataFrame(columns=TRADE_COLUMNS)
+        return BacktestResult(trades, dates, np.empty(0), _stats(trades, dates, np.empty(0), balance, 0))
+
+    # Position held during bar i was decided at the close of bar i - 1
+    held = np.zeros(n, dtype=np.int8)
+    held[1:] = signal[:-1]
+
+    # Runs of identical positions (flat runs included); every bar knows its run
+    starts = np.flatnonzero(np.concatenate(([True], held[1:] != held[:-1])))
+    ends = np.append(starts[1:], n)
+    run_of = np.repeat(np.arange(len(starts)), ends - starts)
+
+    entry = o[starts]
+    side = held[starts].astype(np.float64)
+    stop = entry - side * (sl or 0.0)
+    target = entry + side * (tp or 0.0)
+
+    bar_entry, bar_side = entry[run_of], side[run_of]
+    long_bar = bar_side > 0
+    hit_sl = np.zeros(n, dtype=bool)
+    hit_tp = np.zeros(n, dtype=bool)
+    if sl:
+        hit_sl = np.where(long_bar, l <= stop[run_of], h >= stop[run_of]) & (bar_side != 0)
+    if tp:
+        hit_tp = np.where(long_bar, h >= target[run_of], l <= target[run_of]) & (bar_side != 0)
+    index = np.arange(n)
+
+    # First SL/TP touch of every run (n where there is none)
+    first = np.minimum.reduceat(np.where(hit_sl | hit_tp, index, n), starts)
+    touched = first < ends
+    t = np.minimum(first, n - 1)
+
+    # Levels fill at the level, or at the open when the bar gapped through it
+    is_long = side > 0
+    stop_px = np.where(is_long, np.minimum(o[t], stop), np.maximum(o[t], stop))
+    target_px = np.where(is_long, np.maximum(o[t], target), np.minimum(o[t], target))
+    # A bar touching both levels: the stop, unless its minutes say otherwise
+    both = touched & hit_sl[t] & hit_tp[t]
+    stop_first = np.ones(len(ends), dtype=bool)
+    unresolved = both.copy()
+    if intrabar is not None and both.any():
+        k = np.flatnonzero(both)
+        stop_first[k], resolved = intrabar.first_touch(t[k], side[k], stop[k], target[k])
+        unresolved[k] = ~resolved
+    by_stop = touched & hit_sl[t] & (~both | stop_first)
+    by_target = touched & ~by_stop
+    at_end = ~touched & (ends >= n)
+
+    after = np.minimum(ends, n - 1)
+    exit_bar = np.where(touched, first, after)
+    exit_px = np.select([by_stop, by_target, at_end], [stop_px, target_px, np.full(len(ends), c[-1])], o[after])
+    reason = np.select([by_stop, by_target, at_end], ['SL', 'TP', 'END'], 'SIGNAL')
+    pnl = (side * (exit_px - entry) - cost * np.abs(side)) * size
+
+    # Mark to market: a trade is open at every close before its exit bar,
+    # and its realized PnL counts from the exit bar on
+    is_open = (bar_side != 0) & (index < exit_bar[run_of])
+    realized = np.zeros(n)
+    np.add.at(realized, exit_bar, pnl)
+    equity = balance + np.cumsum(realized) + np.where(is_open, bar_side * (c - bar_entry) * size, 0.0)
+
+    trade = side != 0
+    trades = pd.DataFrame({
+        'entry_time': dates[starts[trade]],
+        'exit_time': dates[exit_bar[trade]],
+        'side': np.where(is_long[trade], 'LONG', 'SHORT'),
+        'entry': entry[trade],
+        'exit': exit_px[trade],
+        'reason': reason[trade],
+        'bars': (np.where(touched, first + 1, ends) - starts)[trade],
+        'pnl': pnl[trade],
+    }, columns=TRADE_COLUMNS)
+    return BacktestResult(trades, dates, equity, _stats(trades, dates, equity, balance, int(unresolved[trade].sum())))
+
+
+def _stats(trades, dates, equity, balance, ambiguous):
+    n = len(equity)
+    returns = np.diff(equity) / equity[:-1] if n > 1 else np.empty(0)
+    span = (dates[-1] - dates[0]).astype('timedelta64[ns]').astype(np.int64) if n > 1 else 0
+    bars_per_year = (n - 1) / (span / YEAR_NS) if span > 0 else 0.0
+    std = returns.std() if len(returns) else 0.0
+
+    return {
+        'trades': len(trades),
+        'win_rate': float((trades['pnl'] > 0).mean()) if len(trades) else 0.0,
+        'net_pnl': float(trades['pnl'].sum()),
+        'return_pct': float((equity[-1] / balance - 1) * 100) if n else 0.0,
+        'max_drawdown': float((equity / np.maximum.accumulate(equity) - 1).min()) if n else 0.0,
+        'sharpe': float(returns.mean() / std * np.sqrt(bars_per_year)) if std > 0 else 0.0,
+        'ambiguous': ambiguous,
+    }
+
+
+# ========== CLI ==========
+
+def parse_params(pairs):
+    """['fast=20', 'slow=50'] -> {'fast': 20.0, 'slow': 50.0}"""
+    params = {}
+    for pair in pairs or []:
+        key, value = pair.split('=', 1)
+        params[key] = float(value)
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View vectorized backtest")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    bt = sub.add_parser('run', help="Backtest one strategy over a symbol's full history")
+    bt.add_argument('--symbol', default='EURUSD')
+    bt.add_argument('--timeframe', default='1H')
+    bt.add_argument('--strategy', choices=sorted(STRATEGIES), default='sma_cross')
+    bt.add_argument('--param', action='append', help="Strategy parameter, e.g. fast=20")
+    bt.add_argument('--sl', type=float, default=None)
+    bt.add_argument('--tp', type=float, default=None)
+    bt.add_argument('--cost', type=float, default=0.0)
+    bt.add_argument('--intrabar', action='store_true', help="Settle bars touching both SL and TP from 1M data")
+    bt.add_argument('--data-path', default=warehouse.DATA_PATH)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        bars = barstore.open_store(args.symbol, args.timeframe, root=args.data_path)
+        params = parse_params(args.param)
+        started = time.perf_counter()
+        resolver = None
+        if args.intrabar and args.timeframe != warehouse.BASE_TIMEFRAME:
+            minutes = barstore.open_store(args.symbol, warehouse.BASE_TIMEFRAME, root=args.data_path)
+            resolver = IntrabarResolver(bars, minutes)
+        result = run(bars, lambda b: STRATEGIES[args.strategy](b, **params), sl=args.sl, tp=args.tp, cost=args.cost,
+                     intrabar=resolver)
+        elapsed = time.perf_counter() - started
+
+        print(f"--- {args.symbol} {args.timeframe} {args.strategy} {params} — {len(bars):,} bars in {elapsed:.2f}s ---")
+        for key, value in result.stats.items():
+            print(f"   {key:<13} {value:,.4f}" if isinstance(value, float) else f"   {key:<13} {value:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# barstore.py — Kgosi_View Memory-Mapped Bar Store
+# ==============================================================================
+"""
+Fixed-record bar files the chart can slice without loading a full history.
+
+Every symbol/timeframe is exported from the warehouse to one .npy file holding
+a NumPy structured array (BAR_DTYPE). The app opens it with mmap_mode='r', so
+column access (store['Close']) and cursor/zoom windows are views on the page
+cache. Only the rows actually drawn are copied into a DataFrame, which keeps
+a Streamlit session's resident memory proportional to the visible window.
+
+Layout:
+    <DATA_PATH>/barstore/EURUSD/1H.npy
+    <DATA_PATH>/barstore/EURUSD/1H.lod1.npy, 1H.lod2.npy, ...   (lod.py pyramid)
+
+Build after ingest (the refinery and harvester do this automatically):
+    python barstore.py build [--data-path PATH] [--symbols EURUSD GBPUSD]
+"""
+
+import os
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import lod
+import pyramid
+import warehouse
+from timeindex import TimeIndex
+
+STORE_DIR = "barstore"
+TIMEFRAMES = [warehouse.BASE_TIMEFRAME] + list(pyramid.TIMEFRAMES)
+
+BAR_DTYPE = np.dtype([
+    ('Date', '<M8[ns]'),
+    ('Open', '<f4'),
+    ('High', '<f4'),
+    ('Low', '<f4'),
+    ('Close', '<f4'),
+    ('Volume', '<i8'),
+])
+
+
+def store_path(symbol, timeframe, root=None):
+    return Path(root or warehouse.DATA_PATH) / STORE_DIR / symbol.upper() / f"{timeframe}.npy"
+
+
+def level_path(path, level):
+    """Level-of-detail file next to a store: 1H.npy -> 1H.lod2.npy"""
+    return path.with_name(f"{path.stem}.lod{level}.npy")
+
+
+def to_records(df):
+    """Warehouse-schema DataFrame -> BAR_DTYPE structured array"""
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    for name in BAR_DTYPE.names:
+        bars[name] = df[name].to_numpy()
+    return bars
+
+
+class BarStore:
+    """Read-only view over one symbol/timeframe of bars"""
+
+    def __init__(self, bars, path=None):
+        self.bars = bars
+        self.path = path
+        self._index = None
+        self._levels = None
+
+    @classmethod
+    def open(cls, path):
+        return cls(np.load(path, mmap_mode='r'), path=Path(path))
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(to_records(df))
+
+    def __len__(self):
+        return len(self.bars)
+
+    def __getitem__(self, column):
+        """Whole column as a strided view (no copy for memmapped stores)"""
+        return self.bars[column]
+
+    @property
+    def empty(self):
+        return len(self.bars) == 0
+
+    @property
+    def index(self):
+        """TimeIndex over the Date column (built lazily, no copy)"""
+        if self._index is None:
+            self._index = TimeIndex(self.bars['Date'])
+        return self._index
+
+    @property
+    def levels(self):
+        """lod.build_levels() pyramid: the exported files if current, else built in memory"""
+        if self._levels is None:
+            self._levels = self._open_levels() or lod.build_levels(self.bars)
+        return self._levels
+
+    def _open_levels(self):
+        if self.path is None:
+            return None
+        levels = []
+        for level, rows in enumerate(lod.level_lengths(len(self.bars)), 1):
+            path = level_path(self.path, level)
+            if not path.exists():
+                return None
+            levels.append(np.load(path, mmap_mode='r'))
+            if len(levels[-1]) != rows:
+                return None
+        return levels
+
+    def window(self, start, stop):
+        """Bars [start, stop) as a DataFrame; only these rows are copied"""
+        return pd.DataFrame(np.asarray(self.bars[max(0, start):stop]))
+
+    def take(self, rows):
+        """Arbitrary rows (e.g. overlay alignment) as a DataFrame"""
+        return pd.DataFrame(self.bars[np.asarray(rows)])
+
+    def row(self, i):
+        return self.window(i, i + 1).iloc[0]
+
+    def between(self, start=None, end=None):
+        """Bars with start <= Date <= end, located by binary search"""
+        return self.window(*self.index.between(start, end))
+
+
+# ========== BUILD ==========
+
+def export(symbol, timeframe, root=None):
+    """Write one symbol/timeframe from the warehouse. Returns rows written."""
+    df = warehouse.read_bars(symbol, timeframe, root=root)
+    if df.empty:
+        return 0
+
+    path = store_path(symbol, timeframe, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bars = to_records(df)
+    # Levels first: a reader that sees the new store also finds matching levels
+    for level, coarse in enumerate(lod.build_levels(bars), 1):
+        _save(level_path(path, level), coarse)
+    _save(path, bars)
+    return len(df)
+
+
+def _save(path, bars):
+    tmp = path.with_name(path.stem + '.tmp.npy')
+    np.save(tmp, bars)
+    # Readers that already mapped the old file keep their (unlinked) copy
+    os.replace(tmp, path)
+
+
+def export_all(symbol, root=None):
+    return {tf: export(symbol, tf, root) for tf in TIMEFRAMES}
+
+
+def open_store(symbol, timeframe, root=None):
+    """
+    Memory-map the exported file, or build an in-memory store straight from
+    the warehouse for symbols that have not been exported yet.
+    """
+    path = store_path(symbol, timeframe, root)
+    if path.exists():
+        return BarStore.open(path)
+
+    df = warehouse.read_bars(symbol, timeframe, root=root)
+    if df.empty and timeframe != warehouse.BASE_TIMEFRAME:
+        df = pyramid.resample(warehouse.read_bars(symbol, root=root), timeframe)
+    return BarStore.from_frame(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View memory-mapped bar store")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="Export every timeframe from the warehouse")
+    build.add_argument('--data-path', default=warehouse.DATA_PATH)
+    build.add_argument('--symbols', nargs='*', default=None)
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        import catalog  # catalog reads this module's files; imported here to keep the import one-way
+
+        symbols = args.symbols or warehouse.list_symbols(args.data_path, include_legacy=False)
+        for symbol in symbols:
+            print(f"   Exporting {symbol}...", end=" ")
+            rows = export_all(symbol, root=args.data_path)
+            print(", ".join(f"{tf}={n:,}" for tf, n in rows.items()))
+        catalog.update(symbols, root=args.data_path)
+
+
+if __name__ == "__main__":
+    main()
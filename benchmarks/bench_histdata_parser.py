@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+HistData parser benchmark: current pd.to_datetime path vs histdata.read_histdata_csv
+
+    python benchmarks/bench_histdata_parser.py [--rows 370000] [--repeat 5]
+"""
+
+import io
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import histdata
+
+
+def synthetic_year(rows, seed=0):
+    """One year-file worth of HistData M1 lines"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2015-01-01 17:00', periods=rows, freq='1min')
+    close = 1.2 + np.cumsum(rng.normal(0, 1e-4, rows))
+    body = pd.DataFrame({
+        'DateStr': dates.strftime('%Y%m%d %H%M%S'),
+        'Open': close, 'High': close + 2e-4, 'Low': close - 2e-4, 'Close': close, 'Vol': 0,
+    })
+    return body.to_csv(sep=';', header=False, index=False, float_format='%.6f').encode()
+
+
+def legacy_parse(raw):
+    """The refinery's parse before histdata.py existed"""
+    df = pd.read_csv(io.BytesIO(raw), sep=';', header=None)
+    df.columns = ['DateStr', 'Open', 'High', 'Low', 'Close', 'Vol']
+    df['Date'] = pd.to_datetime(df['DateStr'], format='%Y%m%d %H%M%S')
+    return df[['Date', 'Open', 'High', 'Low', 'Close', 'Vol']]
+
+
+def best_of(fn, raw, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(raw)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=370_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    raw = synthetic_year(args.rows)
+    print(f"{args.rows:,} rows, {len(raw) / 1e6:.1f} MB")
+
+    legacy_s, legacy = best_of(legacy_parse, raw, args.repeat)
+    fast_s, fast = best_of(histdata.read_histdata_csv, raw, args.repeat)
+
+    stamps = pd.read_csv(io.BytesIO(raw), sep=';', header=None, usecols=[0], dtype=str)[0]
+    ts_legacy_s, _ = best_of(lambda s: pd.to_datetime(s, format='%Y%m%d %H%M%S'), stamps, args.repeat)
+    ts_fast_s, _ = best_of(histdata.parse_timestamps, stamps.to_numpy(), args.repeat)
+
+    assert (legacy['Date'].to_numpy() == fast['Date'].to_numpy()).all(), "timestamps differ"
+
+    print(f"timestamps only : pd.to_datetime {ts_legacy_s * 1e3:8.1f} ms | parse_timestamps   {ts_fast_s * 1e3:8.1f} ms | {ts_legacy_s / ts_fast_s:5.1f}x")
+    print(f"full file parse : legacy         {legacy_s * 1e3:8.1f} ms | read_histdata_csv  {fast_s * 1e3:8.1f} ms | {legacy_s / fast_s:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Kgosi_View benchmark suite: ingestion and every hot path of the chart engine
+
+Writes synthetic HistData ZIPs to a scratch directory, ingests them with the
+refinery (process_raw_dump.refine) and then times, over the resulting
+multi-year 1M series:
+
+    ingest          refinery: parse + warehouse + pyramid + bar store
+    harvester       harvester_pipeline.process_zip_to_csv per yearly ZIP
+    get_data[TF]    open the bar store + slice the default 150-bar view
+    get_data_server same through the shared-memory data server
+    align[TF]       TimeIndex.align of two symbols (what aligncache builds)
+    goto_date       GO TO DATE lookup (TimeIndex.nearest)
+    figure[zoom]    full chart frame: candles + overlay + JSON, 150 bars and ALL
+    indicators      batch indicators.PRESETS over the 1M series
+    backtest        backtest.run(sma_cross) over the 1M series
+
+Each stage runs in its own spawned process, so its peak RSS is its own.
+Results (latency percentiles, rows/s, peak RSS) are appended to a JSON-lines
+history and compared with the last run of the same size.
+
+    python benchmarks/bench_suite.py [--symbols 2] [--years 3] [--rows-per-year 370000]
+                                     [--repeat 20] [--only get_data align] [--history PATH]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+import subprocess
+import multiprocessing
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+HISTORY = ROOT / "benchmarks" / "history.jsonl"
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCHF']
+TIMEFRAMES = ['1M', '5M', '15M', '1H', '4H', '1D']
+VIEW = 150
+
+
+# ========== SYNTHETIC DATA ==========
+
+def synthetic_csv(year, rows, start_price, seed):
+    """HistData M1 lines for one year (a random walk, one bar per minute from Jan 1)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f'{year}-01-01', periods=rows, freq='1min')
+    close = start_price + np.cumsum(rng.normal(0, 1e-4, rows))
+    spread = np.abs(rng.normal(0, 1.5e-4, (2, rows)))
+    body = pd.DataFrame({
+        'DateStr': dates.strftime('%Y%m%d %H%M%S'),
+        'Open': np.concatenate(([start_price], close[:-1])), 'High': close + spread[0],
+        'Low': close - spread[1], 'Close': close, 'Vol': 0,
+    })
+    body['High'] = body[['Open', 'High', 'Close']].max(axis=1)
+    body['Low'] = body[['Open', 'Low', 'Close']].min(axis=1)
+    return body.to_csv(sep=';', header=False, index=False, float_format='%.6f').encode()
+
+
+def write_zips(folder, symbols, years, rows_per_year):
+    """HISTDATA_COM_ASCII_<SYM>_M1<YEAR>.zip files, as the harvester downloads them"""
+    folder.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for s, symbol in enumerate(symbols):
+        for y, year in enumerate(years):
+            raw = synthetic_csv(year, rows_per_year, 1.0 + 0.2 * s, seed=s * 100 + y)
+            with zipfile.ZipFile(folder / f"HISTDATA_COM_ASCII_{symbol}_M1{year}.zip", 'w', zipfile.ZIP_DEFLATED) as z:
+                z.writestr(f"DAT_ASCII_{symbol}_M1_{year}.csv", raw)
+                z.writestr(f"DAT_ASCII_{symbol}_M1_{year}.txt", "synthetic benchmark data\n")
+            total += rows_per_year
+    return total
+
+
+# ========== MEASUREMENT ==========
+
+def timed(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return samples, result
+
+
+def summary(samples, rows=None, **extra):
+    ms = np.asarray(samples) * 1e3
+    out = {
+        'n': len(ms),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+    if rows:
+        out['rows_per_s'] = rows / float(np.median(samples))
+    out.update(extra)
+    return out
+
+
+def _rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+# ========== STAGES ==========
+# Each stage gets the run context and returns {label: summary}.
+
+def stage_ingest(ctx):
+    import process_raw_dump
+
+    dest = Path(ctx['data'])
+    shutil.rmtree(dest, ignore_errors=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        samples, _ = timed(lambda: process_raw_dump.refine(ctx['zips'], str(dest), ctx['workers']), 1)
+    return {'ingest': summary(samples, ctx['rows'], workers=ctx['workers'], children_rss_mb=_rss_mb(resource.RUSAGE_CHILDREN))}
+
+
+def stage_harvester(ctx):
+    try:
+        import harvester_pipeline
+    except ImportError as e:
+        return {'harvester': {'skipped': str(e)}}
+
+    scratch = Path(ctx['scratch']) / "harvester"
+    shutil.rmtree(scratch, ignore_errors=True)
+    (scratch / "zips").mkdir(parents=True)
+    harvester_pipeline.FINAL_DIR = scratch / "data"
+
+    zips = sorted(Path(ctx['zips']).glob(f"*_{ctx['symbols'][0]}_*.zip"))
+    samples = []
+    for path in zips:
+        # process_zip_to_csv deletes its ZIP when done
+        copy = shutil.copy(path, scratch / "zips" / path.name)
+        year = int(path.stem[-4:])
+        started = time.perf_counter()
+        harvester_pipeline.process_zip_to_csv(copy, ctx['symbols'][0].lower(), year)
+        samples.append(time.perf_counter() - started)
+    return {'harvester': summary(samples, ctx['rows_per_year'])}
+
+
+def stage_get_data(ctx):
+    import barstore
+
+    results = {}
+    for tf in TIMEFRAMES:
+        def load():
+            bars = barstore.open_store(ctx['symbols'][0], tf, root=ctx['data'])
+            cursor = len(bars) - 1
+            return bars, bars.window(cursor - VIEW, cursor + 1)
+
+        samples, (bars, _) = timed(load, ctx['repeat'])
+        results[f'get_data[{tf}]'] = summary(samples, bars=len(bars))
+    return results
+
+
+def stage_get_data_server(ctx):
+    import dataserver
+
+    # The real service, in its own process, as systemd runs it
+    socket_path = Path(ctx['scratch']) / "bench.sock"
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / "dataserver.py"), 'serve', '--socket', str(socket_path), '--data-path', ctx['data']],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while not socket_path.exists():
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("data server did not start")
+            time.sleep(0.05)
+
+        client = dataserver.DataClient(str(socket_path))
+        results = {}
+        for tf in TIMEFRAMES:
+            started = time.perf_counter()
+            client.get(ctx['symbols'][0], tf)
+            miss = time.perf_counter() - started
+
+            def load():
+                bars = client.get(ctx['symbols'][0], tf)
+                cursor = len(bars) - 1
+                return bars.window(cursor - VIEW, cursor + 1)
+
+            samples, _ = timed(load, ctx['repeat'])
+            results[f'get_data_server[{tf}]'] = summary(samples, miss_ms=miss * 1e3)
+        return results
+    finally:
+        # SIGTERM: the server unlinks its shared-memory blocks on the way out
+        server.terminate()
+        server.wait()
+
+
+def stage_align(ctx):
+    import barstore
+
+    results = {}
+    for tf in TIMEFRAMES:
+        main = barstore.open_store(ctx['symbols'][0], tf, root=ctx['data'])
+        overlay = barstore.open_store(ctx['symbols'][1 % len(ctx['symbols'])], tf, root=ctx['data'])
+        # What aligncache builds once per pair and version
+        samples, _ = timed(lambda: overlay.index.align(main.index), ctx['repeat'])
+        results[f'align[{tf}]'] = summary(samples, rows=len(main))
+    return results
+
+
+def stage_goto_date(ctx):
+    import barstore
+
+    bars = barstore.open_store(ctx['symbols'][0], '1M', root=ctx['data'])
+    dates = np.asarray(bars['Date'])
+    targets = np.random.default_rng(0).choice(dates, size=max(ctx['repeat'], 1000)) + np.timedelta64(30, 's')
+    found = iter(targets)
+    samples, _ = timed(lambda: bars.index.nearest(next(found)), len(targets))
+    return {'goto_date': summary(samples, bars=len(bars))}
+
+
+def stage_figure(ctx):
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    import barstore
+    import lod
+    import replay
+
+    bars = barstore.open_store(ctx['symbols'][0], '1M', root=ctx['data'])
+    overlay = barstore.open_store(ctx['symbols'][1 % len(ctx['symbols'])], '1M', root=ctx['data'])
+    rows = overlay.index.align(bars.index)
+    cursor = len(bars) - 1
+
+    results = {}
+    for label, zoom in (('150', VIEW), ('ALL', len(bars))):
+        start = max(0, cursor - zoom)
+        level = lod.level_for(cursor + 1 - start)
+
+        def frame():
+            # What build_figure() + replay_chart() do for a full frame
+            candles = replay.bar_payload(pd.DataFrame(lod.candles(bars, start, cursor + 1, level)))
+            line = replay.line_payload(pd.DataFrame(lod.line(bars, overlay, rows, start, cursor + 1, len(candles['x']))))
+            fig = go.Figure()
+            fig.add_trace(go.Candlestick(x=candles['x'], open=candles['open'], high=candles['high'],
+                                         low=candles['low'], close=candles['close']))
+            fig.add_trace(go.Scatter(x=line['x'], y=line['y'], mode='lines', yaxis='y2'))
+            return pio.to_json({'op': 'full', 'figure': fig.to_plotly_json()}, validate=False)
+
+        samples, text = timed(frame, ctx['repeat'])
+        results[f'figure[{label}]'] = summary(samples, bars=cursor + 1 - start, level=level, frame_kb=len(text) / 1024)
+    return results
+
+
+def stage_indicators(ctx):
+    import barstore
+    import indicators
+
+    bars = barstore.open_store(ctx['symbols'][0], '1M', root=ctx['data'])
+    samples, _ = timed(lambda: [indicators.compute(bars, spec) for spec in indicators.PRESETS], max(1, ctx['repeat'] // 4))
+    return {'indicators': summary(samples, rows=len(bars), specs=len(indicators.PRESETS))}
+
+
+def stage_backtest(ctx):
+    import backtest
+    import barstore
+
+    bars = barstore.open_store(ctx['symbols'][0], '1M', root=ctx['data'])
+    samples, result = timed(
+        lambda: backtest.run(bars, lambda b: backtest.sma_cross(b, 60, 240), sl=0.002, tp=0.004),
+        max(1, ctx['repeat'] // 4),
+    )
+    return {'backtest': summary(samples, rows=len(bars), trades=result.stats['trades'])}
+
+
+STAGES = {
+    'ingest': stage_ingest,
+    'harvester': stage_harvester,
+    'get_data': stage_get_data,
+    'get_data_server': stage_get_data_server,
+    'align': stage_align,
+    'goto_date': stage_goto_date,
+    'figure': stage_figure,
+    'indicators': stage_indicators,
+    'backtest': stage_backtest,
+}
+
+
+def run_stage(name, ctx):
+    """Runs in a fresh spawned process"""
+    base = _rss_mb()
+    results = STAGES[name](ctx)
+    peak = _rss_mb()
+    for result in results.values():
+        result.setdefault('rss_base_mb', base)
+        result.setdefault('rss_peak_mb', peak)
+    return results
+
+
+# ========== HISTORY ==========
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(history, params):
+    if not history.exists():
+        return None
+    last = None
+    for line in history.read_text().splitlines():
+        record = json.loads(line)
+        if record.get('params') == params:
+            last = record
+    return last
+
+
+def report(results, previous):
+    before = previous['results'] if previous else {}
+    for label, result in results.items():
+        if 'skipped' in result:
+            print(f"   {label:<24} skipped ({result['skipped']})")
+            continue
+        line = f"   {label:<24} p50 {result['p50_ms']:10.3f} ms  p99 {result['p99_ms']:10.3f} ms"
+        if 'rows_per_s' in result:
+            line += f"  {result['rows_per_s'] / 1e6:8.2f} M rows/s"
+        line += f"  peak {result['rss_peak_mb']:7.0f} MB"
+        old = before.get(label, {}).get('p50_ms')
+        if old:
+            line += f"  ({(result['p50_ms'] / old - 1) * 100:+.0f}% vs {previous['commit'] or 'last run'})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=2)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--rows-per-year', type=int, default=370_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--only', nargs='*', choices=sorted(STAGES), default=None,
+                        help="Stages to run (ingest always runs: it builds the data)")
+    parser.add_argument('--history', default=str(HISTORY))
+    parser.add_argument('--workdir', default=None, help="Scratch directory (default: a temporary one, removed after)")
+    args = parser.parse_args()
+
+    symbols = SYMBOLS[:max(2, args.symbols)]
+    years = list(range(2015, 2015 + args.years))
+    scratch = Path(args.workdir or tempfile.mkdtemp(prefix="kgosi_bench_"))
+    params = {'symbols': len(symbols), 'years': args.years, 'rows_per_year': args.rows_per_year, 'repeat': args.repeat}
+
+    print(f"--- BENCHMARK: {len(symbols)} symbols x {args.years} years x {args.rows_per_year:,} rows in {scratch} ---")
+    rows = write_zips(scratch / "zips", symbols, years, args.rows_per_year)
+    ctx = {
+        'scratch': str(scratch), 'zips': str(scratch / "zips"), 'data': str(scratch / "data"),
+        'symbols': symbols, 'rows': rows, 'rows_per_year': args.rows_per_year,
+        'repeat': args.repeat, 'workers': args.workers,
+    }
+
+    names = ['ingest'] + [n for n in STAGES if n != 'ingest' and (args.only is None or n in args.only)]
+    results = {}
+    spawn = multiprocessing.get_context('spawn')
+    try:
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                results.update(pool.submit(run_stage, name, ctx).result())
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    history = Path(args.history)
+    previous = previous_run(history, params)
+    report(results, previous)
+
+    record = {
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'cpus': os.cpu_count(),
+        'params': params,
+        'results': results,
+    }
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"\nAppended to {history}")
+
+
+if __name__ == "__main__":
+    main()
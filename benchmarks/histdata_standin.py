@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the HistData download site, for exercising the harvester offline
+
+Serves the same two steps harvester_pipeline.py talks to:
+
+    GET  <DOWNLOAD_PAGE>    the download page, with the file_down form and its tk token
+    POST <DOWNLOAD_PAGE>    tk + fxpair + date -> HISTDATA_COM_ASCII_<PAIR>_M1<YEAR>.zip
+                            from --zips, streamed as application/zip (404 if absent)
+
+Archives can be written with write_archive(), optionally with data descriptors
+(general purpose flag 0x8, sizes after the data), as streaming ZIP writers do.
+
+    python benchmarks/histdata_standin.py --zips DIR [--port 8765]
+    KGOSI_HISTDATA_URL=http://127.0.0.1:8765 python harvester_pipeline.py
+"""
+
+import io
+import argparse
+import threading
+import zipfile
+from pathlib import Path
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOKEN = "standin-token-0123456789"
+PAGE_PREFIX = "/download-free-forex-historical-data/"
+CHUNK = 64 * 1024
+
+PAGE = f"""<html><body>
+<form id="file_down" method="POST">
+<input type="hidden" name="tk" value="{TOKEN}">
+</form>
+</body></html>"""
+
+
+class _Unseekable(io.RawIOBase):
+    """A file zipfile cannot seek back in, so every member gets a data descriptor"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self.f.write(b)
+
+
+def archive_name(symbol, year):
+    return f"HISTDATA_COM_ASCII_{symbol.upper()}_M1{year}.zip"
+
+
+def write_archive(folder, symbol, year, raw, descriptors=False):
+    """One HistData yearly archive holding the CSV bytes `raw`; returns its path"""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / archive_name(symbol, year)
+    with open(path, 'wb') as f:
+        with zipfile.ZipFile(_Unseekable(f) if descriptors else f, 'w', zipfile.ZIP_DEFLATED) as z:
+            z.writestr(f"DAT_ASCII_{symbol.upper()}_M1_{year}.csv", raw)
+            z.writestr(f"DAT_ASCII_{symbol.upper()}_M1_{year}.txt", "stand-in data\n")
+    return path
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def _send(self, status, body, content_type='text/html'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/' or self.path.startswith(PAGE_PREFIX):
+            self._send(200, PAGE.encode())
+        else:
+            self._send(404, b"not found")
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+        if not self.path.startswith(PAGE_PREFIX) or form.get('tk') != [TOKEN]:
+            # The real site answers a bad token with an HTML page, not an archive
+            self._send(200, b"<html>trap</html>")
+            return
+        path = self.server.zips / archive_name(form['fxpair'][0], form['date'][0])
+        if not path.exists():
+            self._send(404, b"no such archive")
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Length', str(path.stat().st_size))
+        self.end_headers()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK), b''):
+                self.wfile.write(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(zips, port=0, host='127.0.0.1'):
+    """Start the stand-in on a daemon thread; returns the server (server.url is its base URL)"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.zips = Path(zips)
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name='histdata-standin', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the HistData download site")
+    parser.add_argument('--zips', required=True, help="Folder of HISTDATA_COM_ASCII_<PAIR>_M1<YEAR>.zip files")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = serve(args.zips, args.port)
+    print(f"--- HISTDATA STAND-IN on {server.url} serving {args.zips} ---")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# catalog.py — Kgosi_View Symbol Catalog
+# ==============================================================================
+"""
+One small JSON index of everything the chart can open, so a rerun never lists
+or probes the NFS share:
+
+    <DATA_PATH>/catalog.json
+    {"updated": "...",
+     "symbols": {"EURUSD": {"warehouse_bytes": 81234567,
+                            "timeframes": {"1H": {"rows": 61234, "first": "...", "last": "...",
+                                                  "bytes": 1959520, "mtime_ns": ..., "hash": "9f2c..."}}}}}
+
+Entries describe the exported bar store files (barstore.py), which is what
+the app maps: row count, first/last bar, file size and a BLAKE2 content hash.
+The hash is only recomputed when a file's size or mtime changed, and the app
+uses it in cache keys, so a re-exported series is picked up by every session.
+
+The refinery, the harvester and `barstore.py build` call update() after
+exporting. load() re-reads the file only when its mtime changes (one stat).
+
+Run:
+    python catalog.py build [--data-path PATH]     # rebuild from the bar store
+    python catalog.py show [--data-path PATH]
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import barstore
+import warehouse
+
+CATALOG_NAME = "catalog.json"
+HASH_CHUNK = 8 * 1024 * 1024
+
+_cache = {}             # catalog path -> (mtime_ns, catalog)
+_lock = threading.Lock()
+
+
+def catalog_path(root=None):
+    return Path(root or warehouse.DATA_PATH) / CATALOG_NAME
+
+
+# ========== BUILD ==========
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store_entry(path, previous=None):
+    stat = path.stat()
+    bars = np.load(path, mmap_mode='r')
+    entry = {
+        'rows': len(bars),
+        'first': pd.Timestamp(bars['Date'][0]).isoformat() if len(bars) else None,
+        'last': pd.Timestamp(bars['Date'][-1]).isoformat() if len(bars) else None,
+        'bytes': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+    if previous and previous.get('bytes') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+        entry['hash'] = previous['hash']
+    else:
+        entry['hash'] = file_hash(path)
+    return entry
+
+
+def _symbol_entry(symbol, root=None, previous=None):
+    timeframes = {}
+    for tf in barstore.TIMEFRAMES:
+        path = barstore.store_path(symbol, tf, root)
+        if path.exists():
+            timeframes[tf] = _store_entry(path, ((previous or {}).get('timeframes') or {}).get(tf))
+    parts = warehouse.load_manifest(symbol, root).get(warehouse.BASE_TIMEFRAME, {})
+    return {
+        'warehouse_bytes': sum(p['bytes'] for p in parts.values()),
+        'timeframes': timeframes,
+    }
+
+
+def _read(root=None):
+    path = catalog_path(root)
+    return json.loads(path.read_text()) if path.exists() else {'symbols': {}}
+
+
+def _write(catalog, root=None):
+    catalog['updated'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    path = catalog_path(root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(catalog, indent=1, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def _refresh(entries, symbols, root):
+    for symbol in (s.upper() for s in symbols):
+        entry = _symbol_entry(symbol, root, entries.get(symbol))
+        if entry['timeframes']:
+            entries[symbol] = entry
+        else:
+            entries.pop(symbol, None)
+
+
+def update(symbols, root=None):
+    """Refresh the entries of `symbols` (after an export); returns the catalog"""
+    catalog = _read(root)
+    _refresh(catalog.setdefault('symbols', {}), symbols, root)
+    _write(catalog, root)
+    return catalog
+
+
+def build(root=None):
+    """Rebuild from every exported symbol (hashes of unchanged files are reused)"""
+    store = Path(root or warehouse.DATA_PATH) / barstore.STORE_DIR
+    symbols = sorted(p.name for p in store.iterdir() if p.is_dir()) if store.is_dir() else []
+    previous = _read(root).get('symbols', {})
+    catalog = {'symbols': {s: previous[s] for s in symbols if s in previous}}
+    _refresh(catalog['symbols'], symbols, root)
+    _write(catalog, root)
+    return catalog
+
+
+# ========== READ ==========
+
+def load(root=None):
+    """The catalog ({'symbols': {}} when there is none), re-read only when the file changed"""
+    path = catalog_path(root)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return {'symbols': {}}
+    with _lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _cache[path] = (mtime, json.loads(path.read_text()))
+        return cached[1]
+
+
+def symbols(root=None):
+    return sorted(load(root)['symbols'])
+
+
+def entry(symbol, timeframe, root=None):
+    """Catalog entry of one exported series, or None"""
+    return load(root)['symbols'].get(symbol.upper(), {}).get('timeframes', {}).get(timeframe)
+
+
+def version(symbol, timeframe, root=None):
+    """Content hash of the exported series (None when not cataloged); use it in cache keys"""
+    found = entry(symbol, timeframe, root)
+    return found['hash'] if found else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View symbol catalog")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    bd = sub.add_parser('build', help="Rebuild the catalog from the bar store")
+    bd.add_argument('--data-path', default=warehouse.DATA_PATH)
+    sh = sub.add_parser('show', help="Print the catalog")
+    sh.add_argument('--data-path', default=warehouse.DATA_PATH)
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        catalog = build(args.data_path)
+        print(f"--- CATALOG: {len(catalog['symbols'])} symbols -> {catalog_path(args.data_path)} ---")
+    elif args.command == 'show':
+        for symbol, info in sorted(load(args.data_path)['symbols'].items()):
+            print(f"   {symbol}  warehouse {info['warehouse_bytes'] / 1e6:,.1f} MB")
+            for tf, e in info['timeframes'].items():
+                print(f"      {tf:<4} {e['rows']:>10,} bars  {e['first']} -> {e['last']}  "
+                      f"{e['bytes'] / 1e6:,.1f} MB  {e['hash'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
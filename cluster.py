@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# cluster.py — Kgosi_View Cluster Job Queue
+# ==============================================================================
+"""
+Spread refinery ingests and sweep chunks over every node's cores.
+
+One coordinator process holds the queue; any number of worker processes, on
+any node that mounts the NFS share, connect to it over TCP, take one task at
+a time and report back. Tasks carry paths on the share (archives, the data
+root), never bars, so every node reads its inputs straight from NFS.
+
+    ingest    one HistData archive (one symbol/year) -> warehouse partitions
+    build     pyramid + bar store export of one symbol, after its ingests
+    catalog   refresh the catalog, after every build of the submission
+    sweep     one chunk of sweep.py parameter combinations
+
+Scheduling:
+    A task runs once the tasks it depends on have finished; it receives the
+    results of those that succeeded.
+    Tasks with the same lock run one at a time, in submission order (the
+    ingests and the build of one symbol share its manifest).
+    A failed task is retried after a delay, on whichever worker asks next,
+    up to --attempts times. A worker sends a heartbeat while it runs a task;
+    a task whose lease runs out (worker killed, node down) counts as failed.
+    Every lease is one attempt: heartbeats, done and fail name it, and the
+    coordinator refuses them once that lease has run out. A worker that
+    cannot renew its lease exits before the lease ends, so a retry never
+    runs next to the attempt it replaces.
+
+Every finished task adds to its worker's per-kind counts (tasks, failures,
+units: bar rows ingested or combinations backtested, busy seconds), which
+`stats` prints as throughput per worker.
+
+Protocol: one JSON request line -> one JSON response line (as dataserver.py).
+Every request also carries "token" (KGOSI_CLUSTER_TOKEN).
+    {"op": "submit", "tasks": [{"kind", "args", "lock", "after": [batch index]}]}
+        -> {"ok": true, "job": 3, "ids": [...]}
+    {"op": "take", "worker": "t560:4121"}       -> {"ok": true, "task": {...} | null, "lease": 300}
+    {"op": "heartbeat" | "done" | "fail", "worker", "id", "attempt", ...}
+        -> {"ok": true, "held" | "accepted": false} once that attempt's lease has run out
+    {"op": "results", "job": 3, "since": 0}     -> {"ok": true, "results": [...], "pending": 12}
+    {"op": "cancel", "job": 3} | {"op": "stats"}
+
+The queue lives in the coordinator's memory: restarting it drops unfinished
+jobs (sweeps resume from their checkpoint, ingests skip covered years).
+
+Run:
+    python cluster.py coordinator [--bind 10.0.0.106:7077] [--attempts 3] [--lease 300]
+    python cluster.py worker [--coordinator HOST:PORT] [--processes 4]
+    python cluster.py stats [--coordinator HOST:PORT]
+
+Submit with `python process_raw_dump.py --cluster HOST:PORT` or
+`python sweep.py run ... --cluster HOST:PORT`. Workers and submitters find
+the coordinator through KGOSI_COORDINATOR when the flag is left out.
+
+The coordinator listens on 127.0.0.1 unless --bind (or KGOSI_CLUSTER_BIND)
+names the node's internal address. Every process of the cluster needs the
+same KGOSI_CLUSTER_TOKEN: each request carries it and the coordinator
+refuses any request without it, since a task names paths the workers write.
+"""
+
+import os
+import hmac
+import json
+import time
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+import multiprocessing
+import multiprocessing.connection
+from collections import OrderedDict
+
+import pandas as pd
+
+import barstore
+import catalog
+import process_raw_dump
+import pyramid
+import sweep
+import telemetry
+import warehouse
+
+COORDINATOR = os.environ.get('KGOSI_COORDINATOR', '127.0.0.1:7077')
+BIND = os.environ.get('KGOSI_CLUSTER_BIND', '127.0.0.1:7077')
+TOKEN = os.environ.get('KGOSI_CLUSTER_TOKEN', '')
+MAX_ATTEMPTS = 3
+LEASE_SECONDS = 300       # a running task without a heartbeat for this long is failed
+RETRY_SECONDS = 5         # delay before retry n is n * RETRY_SECONDS
+POLL_SECONDS = 1.0        # idle workers and waiting submitters ask again after this
+LEASE_MARGIN = 0.1        # a worker gives up its task this fraction of the lease early
+LEASE_LOST = 75           # exit status of a worker process that lost its lease
+FINISHED = ('done', 'failed')
+
+
+def parse_address(address):
+    """'host:port' -> (host, port)"""
+    host, _, port = str(address).rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+# ========== COORDINATOR ==========
+
+class TaskQueue:
+    """Tasks, jobs and per-worker counts; every method holds the lock"""
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, lease=LEASE_SECONDS):
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.tasks = {}               # id -> task
+        self.pending = OrderedDict()  # ids not finished yet, in submission order
+        self.jobs = {}                # job -> {'ids': [...], 'finished': [ids in finishing order]}
+        self.workers = {}             # worker -> {'seen', 'task', 'kinds': {kind: counts}}
+        self.next_id = 1
+        self.next_job = 1
+        self.lock = threading.Lock()
+
+    def submit(self, tasks):
+        with self.lock:
+            job, self.next_job = self.next_job, self.next_job + 1
+            ids = list(range(self.next_id, self.next_id + len(tasks)))
+            self.next_id += len(tasks)
+            for task_id, spec in zip(ids, tasks):
+                self.tasks[task_id] = {
+                    'id': task_id, 'job': job, 'kind': spec['kind'], 'args': spec.get('args', {}),
+                    'lock': spec.get('lock'), 'after': [ids[i] for i in spec.get('after', [])],
+                    'status': 'queued', 'attempts': 0, 'worker': None, 'deadline': None,
+                    'not_before': 0.0, 'started': None, 'result': None, 'error': None,
+                }
+                self.pending[task_id] = None
+            self.jobs[job] = {'ids': ids, 'finished': []}
+            return job, ids
+
+    def _worker(self, name, seen=True):
+        worker = self.workers.setdefault(name, {'seen': 0.0, 'task': None, 'kinds': {}})
+        if seen:
+            worker['seen'] = time.time()
+        return worker
+
+    def _count(self, name, kind, seconds, units=0, failed=False):
+        # Lease expiry counts against a worker that has gone quiet: not a sign of life
+        counts = self._worker(name, seen=False)['kinds'].setdefault(kind, {'tasks': 0, 'failed': 0, 'units': 0, 'seconds': 0.0})
+        counts['failed' if failed else 'tasks'] += 1
+        counts['units'] += units
+        counts['seconds'] += seconds
+
+    def _finish(self, task, status, result=None, error=None):
+        task.update(status=status, result=result, error=error, deadline=None)
+        self.pending.pop(task['id'], None)
+        self.jobs[task['job']]['finished'].append(task['id'])
+
+    def _failed_attempt(self, task, error):
+        worker = self.workers.get(task['worker'])
+        if worker is not None and worker['task'] == task['id']:
+            worker['task'] = None
+        if task['attempts'] >= self.max_attempts:
+            self._finish(task, 'failed', error=error)
+        else:
+            task.update(status='queued', error=error, deadline=None,
+                        not_before=time.time() + task['attempts'] * RETRY_SECONDS)
+
+    def _expire(self, now):
+        for task_id in list(self.pending):
+            task = self.tasks[task_id]
+            if task['status'] == 'running' and task['deadline'] < now:
+                self._count(task['worker'], task['kind'], now - task['started'], failed=True)
+                self._failed_attempt(task, f"lease expired on {task['worker']}")
+
+    def take(self, name):
+        """The oldest runnable task, now leased to `name`; None when nothing can run"""
+        with self.lock:
+            now = time.time()
+            worker = self._worker(name)
+            self._expire(now)
+            held = set()
+            for task_id in self.pending:
+                task = self.tasks[task_id]
+                lock = task['lock']
+                free = lock is None or lock not in held
+                if lock is not None:
+                    # An earlier task with this lock (running or queued) goes first
+                    held.add(lock)
+                if not free or task['status'] != 'queued' or task['not_before'] > now:
+                    continue
+                if any(self.tasks[dep]['status'] not in FINISHED for dep in task['after']):
+                    continue
+                task.update(status='running', worker=name, started=now, deadline=now + self.lease)
+                task['attempts'] += 1
+                worker['task'] = task_id
+                inputs = [self.tasks[dep]['result'] for dep in task['after'] if self.tasks[dep]['status'] == 'done']
+                return {'id': task_id, 'kind': task['kind'], 'args': task['args'],
+                        'inputs': inputs, 'attempt': task['attempts']}
+            return None
+
+    def _running(self, name, task_id, attempt):
+        """
+        The task if `name` still holds the lease of this attempt; None once the
+        lease ran out, even if the task was not handed to anyone else yet
+        """
+        self._expire(time.time())
+        task = self.tasks.get(task_id)
+        if task is None or task['status'] != 'running' or task['worker'] != name or task['attempts'] != attempt:
+            return None
+        return task
+
+    def heartbeat(self, name, task_id, attempt):
+        with self.lock:
+            self._worker(name)
+            task = self._running(name, task_id, attempt)
+            if task is not None:
+                task['deadline'] = time.time() + self.lease
+            return task is not None
+
+    def done(self, name, task_id, attempt, result, units=0):
+        with self.lock:
+            self._worker(name)
+            task = self._running(name, task_id, attempt)
+            if task is None:
+                return False
+            self._count(name, task['kind'], time.time() - task['started'], units=units)
+            self.workers[name]['task'] = None
+            self._finish(task, 'done', result=result)
+            return True
+
+    def fail(self, name, task_id, attempt, error):
+        with self.lock:
+            task = self._running(name, task_id, attempt)
+            if task is None:
+                return False
+            self._count(name, task['kind'], time.time() - task['started'], failed=True)
+            self._failed_attempt(task, error)
+            return True
+
+    def results(self, job, since=0):
+        """Tasks of `job` finished after the first `since`, and how many are still pending"""
+        with self.lock:
+            record = self.jobs[job]
+            finished = record['finished'][since:]
+            return {
+                'results': [
+                    {k: self.tasks[i][k] for k in ('id', 'kind', 'status', 'result', 'error', 'attempts', 'worker')}
+                    for i in finished
+                ],
+                'pending': len(record['ids']) - len(record['finished']),
+            }
+
+    def cancel(self, job):
+        """Fail the job's queued tasks (running ones finish; their results are kept)"""
+        with self.lock:
+            cancelled = 0
+            for task_id in self.jobs[job]['ids']:
+                task = self.tasks[task_id]
+                if task['status'] == 'queued':
+                    self._finish(task, 'failed', error='cancelled')
+                    cancelled += 1
+            return cancelled
+
+    def stats(self):
+        with self.lock:
+            self._expire(time.time())
+            counts = {status: 0 for status in ('queued', 'running', 'done', 'failed')}
+            for task in self.tasks.values():
+                counts[task['status']] += 1
+            return {
+                'tasks': counts,
+                'jobs': {job: len(r['ids']) - len(r['finished']) for job, r in self.jobs.items()
+                         if len(r['finished']) < len(r['ids'])},
+                'workers': [
+                    {'worker': name, 'seen': w['seen'], 'task': w['task'], 'kinds': w['kinds']}
+                    for name, w in sorted(self.workers.items())
+                ],
+            }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        queue = self.server.queue
+        try:
+            for line in self.rfile:
+                self._answer(queue, line)
+        except ConnectionError:
+            # Worker killed mid-request; its lease runs out on its own
+            pass
+
+    def _answer(self, queue, line):
+        try:
+            request = json.loads(line)
+            op = request['op']
+            if not hmac.compare_digest(str(request.get('token', '')).encode(), self.server.token.encode()):
+                response = {'ok': False, 'error': "bad cluster token (check KGOSI_CLUSTER_TOKEN)"}
+            elif op == 'take':
+                response = {'ok': True, 'task': queue.take(request['worker']), 'lease': queue.lease}
+            elif op == 'heartbeat':
+                response = {'ok': True, 'held': queue.heartbeat(request['worker'], request['id'], request['attempt'])}
+            elif op == 'done':
+                accepted = queue.done(request['worker'], request['id'], request['attempt'],
+                                      request.get('result'), request.get('units', 0))
+                response = {'ok': True, 'accepted': accepted}
+            elif op == 'fail':
+                accepted = queue.fail(request['worker'], request['id'], request['attempt'], request['error'])
+                response = {'ok': True, 'accepted': accepted}
+            elif op == 'submit':
+                job, ids = queue.submit(request['tasks'])
+                response = {'ok': True, 'job': job, 'ids': ids}
+            elif op == 'results':
+                response = {'ok': True, **queue.results(request['job'], request.get('since', 0))}
+            elif op == 'cancel':
+                response = {'ok': True, 'cancelled': queue.cancel(request['job'])}
+            elif op == 'stats':
+                response = {'ok': True, **queue.stats()}
+            else:
+                response = {'ok': False, 'error': f"unknown op {op!r}"}
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write((json.dumps(response, default=str) + "\n").encode())
+        self.wfile.flush()
+
+
+class Coordinator(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, bind=BIND, max_attempts=MAX_ATTEMPTS, lease=LEASE_SECONDS, token=None):
+        token = TOKEN if token is None else token
+        if not token:
+            raise ValueError("the coordinator needs a shared token: set KGOSI_CLUSTER_TOKEN on every node")
+        super().__init__(parse_address(bind), _Handler)
+        self.queue = TaskQueue(max_attempts, lease)
+        self.token = token
+
+
+# ========== CLIENT ==========
+
+class Client:
+
+    def __init__(self, address=COORDINATOR, timeout=30.0, token=None):
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.token = TOKEN if token is None else token
+
+    def _call(self, request):
+        with socket.create_connection(self.address, timeout=self.timeout) as sock:
+            sock.sendall((json.dumps({**request, 'token': self.token}) + "\n").encode())
+            with sock.makefile('rb') as f:
+                line = f.readline()
+        if not line:
+            raise ConnectionError(f"coordinator {self.address[0]}:{self.address[1]} closed the connection")
+        response = json.loads(line)
+        if not response.pop('ok'):
+            raise RuntimeError(response['error'])
+        return response
+
+    def submit(self, tasks):
+        """Queue a batch; `after` holds indexes into the batch. Returns (job, task ids)"""
+        response = self._call({'op': 'submit', 'tasks': tasks})
+        return response['job'], response['ids']
+
+    def take(self, worker):
+        return self._call({'op': 'take', 'worker': worker})
+
+    def heartbeat(self, worker, task_id, attempt):
+        return self._call({'op': 'heartbeat', 'worker': worker, 'id': task_id, 'attempt': attempt})['held']
+
+    def done(self, worker, task_id, attempt, result, units=0):
+        return self._call({'op': 'done', 'worker': worker, 'id': task_id, 'attempt': attempt,
+                           'result': result, 'units': units})['accepted']
+
+    def fail(self, worker, task_id, attempt, error):
+        return self._call({'op': 'fail', 'worker': worker, 'id': task_id, 'attempt': attempt, 'error': error})['accepted']
+
+    def cancel(self, job):
+        return self._call({'op': 'cancel', 'job': job})['cancelled']
+
+    def stats(self):
+        return self._call({'op': 'stats'})
+
+    def wait(self, job, poll=POLL_SECONDS):
+        """Yield the job's finished tasks as they finish, until none is pending"""
+        since = 0
+        while True:
+            response = self._call({'op': 'results', 'job': job, 'since': since})
+            since += len(response['results'])
+            yield from response['results']
+            if response['pending'] == 0:
+                return
+            if not response['results']:
+                time.sleep(poll)
+
+
+# ========== TASKS ==========
+# handler(args, inputs) -> (JSON result, units done); inputs: results of the tasks it waited for
+
+def _ingest(args, inputs):
+    symbol, df, _ = process_raw_dump.parse_zip(args['zip'])
+    with telemetry.span('warehouse'):
+        years = warehouse.write_bars(symbol, df, root=args['root'])
+    since = df.loc[df['Date'].dt.year == years[0], 'Date'].iloc[0].isoformat() if years else None
+    return {'symbol': symbol, 'rows': len(df), 'years': years, 'since': since}, len(df)
+
+
+def _build(args, inputs):
+    written = [pd.Timestamp(r['since']) for r in inputs if r['since']]
+    if not written:
+        return {'symbol': args['symbol'], 'since': None}, 0
+    # Rebuild only from the first minute any archive of this symbol added
+    since = min(written)
+    with telemetry.span('pyramid'):
+        pyramid.build_pyramid(args['symbol'], since=since, root=args['root'])
+    with telemetry.span('barstore'):
+        barstore.export_all(args['symbol'], root=args['root'])
+    return {'symbol': args['symbol'], 'since': since.isoformat()}, 0
+
+
+def _catalog(args, inputs):
+    with telemetry.span('catalog'):
+        catalog.update(args['symbols'], root=args['root'])
+    return {'symbols': args['symbols']}, 0
+
+
+_opened = {}
+
+
+def _sweep(args, inputs):
+    series = (args['symbol'], args['timeframe'], args['root'], args['intrabar'])
+    if _opened.get('series') != series:
+        # Same initializer as the local pool: the stores stay mapped for the next chunk
+        sweep._init_worker(*series)
+        _opened['series'] = series
+    rows = sweep._run_chunk(args['strategy'], args['combos'], args['sl'], args['tp'], args['cost'])
+    return rows, len(rows)
+
+
+TASKS = {'ingest': _ingest, 'build': _build, 'catalog': _catalog, 'sweep': _sweep}
+
+
+# ========== WORKER ==========
+
+def _heartbeat(address, name, task, lease, taken, stop):
+    """
+    Renew the lease every lease / 3 while the task runs. Once the lease is
+    lost (refused, or not renewed for LEASE_MARGIN short of its length) the
+    coordinator may hand the task to another worker, so this process exits
+    on the spot rather than write alongside it; run_workers starts a new one.
+    Writes go through temp files and os.replace, so nothing is left half-written.
+    """
+    client = Client(address, timeout=lease / 3)
+    held_until = taken + lease * (1 - LEASE_MARGIN)
+    while not stop.wait(max(0.0, min(lease / 3, held_until - time.monotonic()))):
+        sent = time.monotonic()
+        try:
+            held = client.heartbeat(name, task['id'], task['attempt'])
+        except OSError:
+            held = None
+        if held:
+            held_until = sent + lease * (1 - LEASE_MARGIN)
+        elif held is False or time.monotonic() >= held_until:
+            if stop.is_set():
+                return
+            print(f"   [{name}] lost the lease of task {task['id']} ({task['kind']}); stopping")
+            os._exit(LEASE_LOST)
+
+
+def work(address=COORDINATOR, name=None, poll=POLL_SECONDS):
+    """Take and run tasks until killed"""
+    client = Client(address)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        taken = time.monotonic()
+        try:
+            response = client.take(name)
+        except OSError:
+            # Coordinator down or restarting: keep asking
+            time.sleep(poll)
+            continue
+        except RuntimeError as e:
+            # Refused (wrong token): say so, keep asking until it is fixed
+            print(f"   [{name}] {e}")
+            time.sleep(max(poll, 30.0))
+            continue
+        task = response['task']
+        if task is None:
+            time.sleep(poll)
+            continue
+
+        stop = threading.Event()
+        threading.Thread(
+            target=_heartbeat, args=(address, name, task, response['lease'], taken, stop),
+            name='kgosi-heartbeat', daemon=True,
+        ).start()
+        trace = telemetry.start('task', kind=task['kind'], worker=name, attempt=task['attempt'])
+        error = None
+        try:
+            result, units = TASKS[task['kind']](task['args'], task['inputs'])
+        except Exception as e:
+            result, units, error = None, 0, f"{type(e).__name__}: {e}"
+            print(f"   [{name}] task {task['id']} ({task['kind']}) failed: {error}")
+        stop.set()
+        trace.finish(status='failed' if error else 'done', units=units)
+        try:
+            if error:
+                client.fail(name, task['id'], task['attempt'], error)
+            else:
+                client.done(name, task['id'], task['attempt'], result, units)
+        except OSError:
+            # Unreported: the lease runs out and the task runs again
+            pass
+
+
+def _work_process(address):
+    # Ctrl-C reaches the whole process group; the parent stops its workers with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(address)
+
+
+def _start_worker(address):
+    proc = multiprocessing.Process(target=_work_process, args=(address,), daemon=True)
+    proc.start()
+    return proc
+
+
+def run_workers(address=COORDINATOR, processes=process_raw_dump.WORKERS):
+    """One worker process per core, replaced when one exits; blocks until interrupted"""
+    procs = [_start_worker(address) for _ in range(processes)]
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while True:
+            multiprocessing.connection.wait([proc.sentinel for proc in procs])
+            for i, proc in enumerate(procs):
+                if not proc.is_alive():
+                    proc.join()
+                    procs[i] = _start_worker(address)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join()
+
+
+# ========== SUBMITTERS ==========
+
+def refine(address, zip_files, dest_dir=process_raw_dump.DEST_DIR):
+    """process_raw_dump.refine on the cluster: one ingest task per archive"""
+    client = Client(address)
+    dest_dir = os.path.abspath(dest_dir)
+    by_symbol = {}
+    for path in sorted(zip_files, key=lambda p: p.name):
+        by_symbol.setdefault(process_raw_dump.archive_symbol(path), []).append(path)
+
+    tasks, names, builds = [], {}, []
+    for symbol, paths in sorted(by_symbol.items()):
+        ingests = []
+        for path in paths:
+            names[len(tasks)] = path.name
+            ingests.append(len(tasks))
+            tasks.append({'kind': 'ingest', 'lock': symbol, 'args': {'zip': str(path.resolve()), 'root': dest_dir}})
+        builds.append(len(tasks))
+        tasks.append({'kind': 'build', 'lock': symbol, 'after': ingests, 'args': {'symbol': symbol, 'root': dest_dir}})
+    tasks.append({'kind': 'catalog', 'lock': 'catalog', 'after': builds,
+                  'args': {'symbols': sorted(by_symbol), 'root': dest_dir}})
+
+    started = time.perf_counter()
+    trace = telemetry.start('refine', coordinator=address, files=len(zip_files))
+    job, ids = client.submit(tasks)
+    names = {ids[i]: name for i, name in names.items()}
+    print(f"Submitted job {job}: {len(zip_files)} archives of {len(by_symbol)} symbols to {address}")
+
+    failed = rows = done = 0
+    for entry in client.wait(job):
+        result = entry['result'] or {}
+        if entry['kind'] == 'ingest':
+            done += 1
+            if entry['status'] == 'failed':
+                failed += 1
+                print(f"   [{done}/{len(zip_files)}] Error on {names[entry['id']]} after {entry['attempts']} attempts: {entry['error']}")
+                continue
+            rows += result['rows']
+            print(f"   [{done}/{len(zip_files)}] {result['symbol']} {names[entry['id']]}: {result['rows']:,} rows, "
+                  f"years {result['years'] or 'already covered'} on {entry['worker']}")
+        elif entry['status'] == 'failed':
+            print(f"   {entry['kind']} failed after {entry['attempts']} attempts: {entry['error']}")
+        elif entry['kind'] == 'build':
+            print(f"   {result['symbol']}: pyramid and bar store {'rebuilt from ' + result['since'] if result['since'] else 'unchanged'}")
+
+    trace.finish(files=len(zip_files), failed=failed, symbols=len(by_symbol), rows=rows)
+    print(f"\n--- REFINERY FINISHED in {time.perf_counter() - started:.1f}s on the cluster ({failed} failed) ---")
+
+
+def map_chunks(address, symbol, timeframe, strategy, chunks, sl, tp, cost, intrabar, root):
+    """Yield the rows of each sweep chunk as a worker finishes it (see sweep.run_sweep)"""
+    client = Client(address)
+    common = {'symbol': symbol, 'timeframe': timeframe, 'strategy': strategy, 'sl': sl, 'tp': tp,
+              'cost': cost, 'intrabar': intrabar, 'root': os.path.abspath(root or warehouse.DATA_PATH)}
+    job, _ = client.submit([{'kind': 'sweep', 'args': {**common, 'combos': chunk}} for chunk in chunks])
+    finished = False
+    try:
+        for entry in client.wait(job):
+            if entry['status'] == 'failed':
+                raise RuntimeError(f"sweep chunk failed after {entry['attempts']} attempts: {entry['error']}")
+            yield entry['result']
+        finished = True
+    finally:
+        if not finished:
+            client.cancel(job)
+
+
+# ========== STATS ==========
+
+def print_stats(stats, address):
+    tasks = stats['tasks']
+    print(f"--- COORDINATOR {address}: {tasks['queued']} queued, {tasks['running']} running, "
+          f"{tasks['done']} done, {tasks['failed']} failed ---")
+    for job, pending in stats['jobs'].items():
+        print(f"   job {job}: {pending} pending")
+    print(f"   {'worker':<28} {'kind':<8} {'tasks':>6} {'failed':>6} {'units':>12} {'units/s':>10} {'tasks/min':>9} {'busy':>8}  seen")
+    now = time.time()
+    for worker in stats['workers']:
+        for kind, c in sorted(worker['kinds'].items()) or [('-', None)]:
+            if c is None:
+                print(f"   {worker['worker']:<28} {'-':<8}")
+                continue
+            busy = max(c['seconds'], 1e-9)
+            print(f"   {worker['worker']:<28} {kind:<8} {c['tasks']:>6} {c['failed']:>6} {c['units']:>12,} "
+                  f"{c['units'] / busy:>10,.0f} {60 * c['tasks'] / busy:>9.1f} {c['seconds']:>7.0f}s  {now - worker['seen']:.0f}s ago")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View cluster job queue")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    coord = sub.add_parser('coordinator', help="Run the queue")
+    coord.add_argument('--bind', default=BIND, help="Address to listen on: the node's internal address (default 127.0.0.1:7077)")
+    coord.add_argument('--attempts', type=int, default=MAX_ATTEMPTS, help="Runs per task before it fails")
+    coord.add_argument('--lease', type=float, default=LEASE_SECONDS, help="Seconds without a heartbeat before a task is retried")
+
+    worker = sub.add_parser('worker', help="Run tasks from the queue")
+    worker.add_argument('--coordinator', default=COORDINATOR)
+    worker.add_argument('--processes', type=int, default=process_raw_dump.WORKERS, help="Worker processes (default: all cores)")
+
+    stats = sub.add_parser('stats', help="Queue counts and per-worker throughput")
+    stats.add_argument('--coordinator', default=COORDINATOR)
+    stats.add_argument('--json', action='store_true')
+
+    args = parser.parse_args()
+    if not TOKEN:
+        parser.error("set KGOSI_CLUSTER_TOKEN (the same secret on every node)")
+    if args.command == 'coordinator':
+        server = Coordinator(args.bind, max(1, args.attempts), args.lease)
+        print(f"--- COORDINATOR on {args.bind} ({args.attempts} attempts, {args.lease:.0f}s lease) ---")
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    elif args.command == 'worker':
+        print(f"--- {max(1, args.processes)} WORKERS on {socket.gethostname()} -> {args.coordinator} ---")
+        run_workers(args.coordinator, max(1, args.processes))
+    elif args.command == 'stats':
+        response = Client(args.coordinator).stats()
+        if args.json:
+            print(json.dumps(response, indent=2))
+        else:
+            print_stats(response, args.coordinator)
+
+
+if __name__ == "__main__":
+    main()
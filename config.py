@@ -242,8 +242,8 @@ def metric_card(label, value, color=None):
     )
 
 
-def status_bar(balance, realized_pnl, unrealized_pnl, position_type, position_size, cursor, total):
-    """Bottom status bar like TradeZella / FX Replay."""
+def status_bar(balance, realized_pnl, unrealized_pnl, position_type, position_size, cursor, total, frame_info=None):
+    """Bottom status bar like TradeZella / FX Replay. frame_info: chart payload/latency readout."""
     pnl_color = THEME['GREEN'] if realized_pnl >= 0 else THEME['RED']
     upnl_color = THEME['GREEN'] if unrealized_pnl >= 0 else THEME['RED']
     pos_label = f"{position_type} {position_size:,}" if position_type else "FLAT"
@@ -262,7 +262,8 @@ def status_bar(balance, realized_pnl, unrealized_pnl, position_type, position_si
         f'border-radius:8px; padding:7px 14px; margin-top:4px; flex-wrap:wrap; gap:6px;">'
         f'<div style="display:flex; gap:8px; align-items:center;">{cards}</div>'
         f'<div style="font-family:JetBrains Mono,monospace; font-size:0.7rem; '
-        f'color:{THEME["DIM"]}; letter-spacing:0.5px;">BAR {cursor} / {total}</div>'
+        f'color:{THEME["DIM"]}; letter-spacing:0.5px;">'
+        f'{frame_info + " &nbsp;|&nbsp; " if frame_info else ""}BAR {cursor} / {total}</div>'
         f'</div>'
     )
 
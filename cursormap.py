@@ -0,0 +1,67 @@
+# ==============================================================================
+# cursormap.py — Kgosi_View Cursor Translation
+# ==============================================================================
+"""
+The replay's position as a 1M minute, so it survives a timeframe switch.
+
+The session cursor is a bar index into the loaded series; the same index in
+another timeframe is a different date. A CursorMap holds two arrays between
+one series and its 1M base:
+
+    offsets[i]   first 1M row of bar i (bar i covers [offsets[i], offsets[i + 1]))
+    owner[m]     bar holding 1M row m
+
+so bar -> minute and minute -> bar are single array reads. Both come from one
+np.searchsorted of the bar dates into the memory-mapped 1M Date column (the
+same offsets intrabar.py settles SL/TP with), built once per loaded series.
+
+Switching timeframe keeps the minute: the new cursor is the bar holding it,
+and when that minute is not the bar's last one the bar is drawn in progress,
+rebuilt from its 1M rows up to the minute (partial()), so no later price
+leaks onto the chart.
+"""
+
+import numpy as np
+
+import lod
+
+
+class CursorMap:
+    """Bar <-> 1M row translation for one symbol/timeframe"""
+
+    def __init__(self, bars, minutes):
+        self.bars = bars
+        self.minutes = minutes
+        starts = np.searchsorted(minutes.index.ns, bars.index.ns, side='left')
+        self.offsets = np.append(starts, len(minutes)).astype(np.int64)
+        # Minutes before the first bar belong to it; int32 keeps 10 years of 1M at ~20 MB
+        counts = np.diff(self.offsets)
+        counts[0] += self.offsets[0]
+        self.owner = np.repeat(np.arange(len(bars), dtype=np.int32), counts)
+
+    def bar_of(self, minute):
+        """Bar holding 1M row `minute`"""
+        return int(self.owner[min(max(minute, 0), len(self.owner) - 1)])
+
+    def first_minute(self, row):
+        return int(self.offsets[row])
+
+    def last_minute(self, row):
+        """1M row at which bar `row` is complete"""
+        return max(int(self.offsets[row + 1]) - 1, int(self.offsets[row]))
+
+    def minute_at(self, ts_ns):
+        """Last 1M row at or before an epoch-ns timestamp (another symbol's minute)"""
+        return max(0, int(np.searchsorted(self.minutes.index.ns, ts_ns, side='right')) - 1)
+
+    def partial(self, row, minute):
+        """
+        Bar `row` as it stood at 1M row `minute` (a one-row BAR_DTYPE array),
+        or None when the bar is already complete by then.
+        """
+        lo = self.first_minute(row)
+        if minute >= self.last_minute(row) or minute < lo:
+            return None
+        bar = lod.aggregate(self.minutes.bars[lo:minute + 1], [0])
+        bar['Date'] = self.bars['Date'][row]
+        return bar
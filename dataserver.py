@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# dataserver.py — Kgosi_View Shared Bar Cache Service
+# ==============================================================================
+"""
+One process per node owns every loaded series; Streamlit workers share it.
+
+The server loads a symbol/timeframe once (from the bar store / warehouse),
+copies it into a multiprocessing.shared_memory block and hands out the block
+name over a Unix socket. Clients map the block as a read-only BAR_DTYPE array,
+so every session on every worker reads the same physical pages (no pickling,
+no per-process copies). Blocks are evicted least-recently-used once the total
+exceeds --max-mb. Every get response lists the blocks still cached; clients
+forget the others then, and an evicted block's pages are freed once no
+session of that client still holds the series.
+
+Protocol: one JSON request line -> one JSON response line.
+    {"op": "get", "symbol": "EURUSD", "timeframe": "1H"}
+        -> {"ok": true, "name": "psm_...", "rows": 91234, "live": ["psm_...", ...]}
+    {"op": "stats"}
+        -> {"ok": true, "hits": 10, "misses": 2, "evictions": 0, "bytes": ..., "entries": [...]}
+
+Run:
+    python dataserver.py serve [--socket PATH] [--max-mb 2048] [--data-path PATH]
+    python dataserver.py stats [--socket PATH]
+
+The app uses the server when KGOSI_DATASERVER points at its socket.
+"""
+
+import os
+import json
+import time
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+from collections import OrderedDict
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+import barstore
+import warehouse
+
+SOCKET_PATH = os.environ.get('KGOSI_DATASERVER', '/tmp/kgosi_dataserver.sock')
+MAX_MB = 2048
+
+
+# ========== SERVER ==========
+
+class SeriesCache:
+    """Size-bounded LRU of shared-memory series"""
+
+    def __init__(self, max_bytes, root=None):
+        self.max_bytes = max_bytes
+        self.root = root
+        self.entries = OrderedDict()     # (symbol, timeframe) -> dict(shm, rows, version)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loading = {}                # key -> Event set when its load ends
+        self.lock = threading.Lock()
+
+    def _version(self, symbol, timeframe):
+        path = barstore.store_path(symbol, timeframe, self.root)
+        return path.stat().st_mtime_ns if path.exists() else 0
+
+    def get(self, symbol, timeframe):
+        key = (symbol.upper(), timeframe)
+        while True:
+            version = self._version(*key)
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry['version'] == version:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                loading = self.loading.get(key)
+                if loading is None:
+                    self.misses += 1
+                    loading = self.loading[key] = threading.Event()
+                    break
+            # Another client is loading this series: wait for it, then look again
+            loading.wait()
+
+        try:
+            # The NFS read and the copy run without the lock: other series stay served
+            entry = self._load(key, version)
+            with self.lock:
+                if key in self.entries:
+                    self._drop(key)
+                self.entries[key] = entry
+                self.bytes += entry['bytes']
+                self._evict()
+            return entry
+        finally:
+            with self.lock:
+                self.loading.pop(key).set()
+
+    def _load(self, key, version):
+        bars = barstore.open_store(*key, root=self.root).bars
+        entry = {'shm': None, 'rows': len(bars), 'bytes': bars.nbytes, 'version': version, 'loaded': time.time()}
+        if len(bars):
+            shm = shared_memory.SharedMemory(create=True, size=bars.nbytes)
+            np.ndarray(len(bars), dtype=barstore.BAR_DTYPE, buffer=shm.buf)[:] = bars
+            entry['shm'] = shm
+        return entry
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.bytes -= entry['bytes']
+        if entry['shm'] is not None:
+            entry['shm'].close()
+            entry['shm'].unlink()
+
+    def _evict(self):
+        # Never evict the entry just requested (the most recent one)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def names(self):
+        """Names of the blocks cached now"""
+        with self.lock:
+            return [e['shm'].name for e in self.entries.values() if e['shm'] is not None]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'entries': [
+                    {'symbol': s, 'timeframe': tf, 'rows': e['rows'], 'bytes': e['bytes']}
+                    for (s, tf), e in self.entries.items()
+                ],
+            }
+
+    def close(self):
+        with self.lock:
+            for key in list(self.entries):
+                self._drop(key)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request['op'] == 'get':
+                    entry = self.server.cache.get(request['symbol'], request['timeframe'])
+                    name = entry['shm'].name if entry['shm'] is not None else None
+                    response = {'ok': True, 'name': name, 'rows': entry['rows'], 'live': self.server.cache.names()}
+                elif request['op'] == 'stats':
+                    response = {'ok': True, **self.server.cache.stats()}
+                else:
+                    response = {'ok': False, 'error': f"unknown op {request['op']!r}"}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+            self.wfile.flush()
+
+
+class DataServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path=SOCKET_PATH, max_mb=MAX_MB, root=None):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _Handler)
+        self.cache = SeriesCache(max_mb * 1024 * 1024, root=root)
+
+    def server_close(self):
+        super().server_close()
+        self.cache.close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+# ========== CLIENT ==========
+
+def _attach(name):
+    """Map an existing block without letting this process's tracker unlink it"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+class SharedBarStore(barstore.BarStore):
+    """BarStore over a server-owned block; keeps the mapping alive"""
+
+    def __init__(self, shm, rows):
+        bars = np.ndarray(rows, dtype=barstore.BAR_DTYPE, buffer=shm.buf)
+        bars.flags.writeable = False
+        super().__init__(bars)
+        self.shm = shm
+
+
+class DataClient:
+
+    def __init__(self, socket_path=SOCKET_PATH, timeout=30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.stores = {}     # (symbol, timeframe) -> (block name, store)
+        self.lock = threading.Lock()
+
+    def _call(self, request):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(request) + "\n").encode())
+            with sock.makefile('rb') as f:
+                response = json.loads(f.readline())
+        if not response.pop('ok'):
+            raise RuntimeError(response['error'])
+        return response
+
+    def get(self, symbol, timeframe):
+        """Zero-copy BarStore for symbol/timeframe"""
+        key = (symbol.upper(), timeframe)
+        response = self._call({'op': 'get', 'symbol': key[0], 'timeframe': timeframe})
+
+        with self.lock:
+            # Forget blocks the server evicted: each is unmapped once no session references it
+            live = set(response.get('live', ()))
+            for other, (name, _) in list(self.stores.items()):
+                if name is not None and name not in live:
+                    del self.stores[other]
+            cached = self.stores.get(key)
+            if cached is not None and cached[0] == response['name']:
+                return cached[1]
+            if response['name'] is None:
+                store = barstore.BarStore(np.empty(0, dtype=barstore.BAR_DTYPE))
+            else:
+                store = SharedBarStore(_attach(response['name']), response['rows'])
+            # The previous block (if any) is released once no session references it
+            self.stores[key] = (response['name'], store)
+            return store
+
+    def stats(self):
+        return self._call({'op': 'stats'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View shared bar cache")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="Run the cache service")
+    serve.add_argument('--socket', default=SOCKET_PATH)
+    serve.add_argument('--max-mb', type=int, default=MAX_MB)
+    serve.add_argument('--data-path', default=warehouse.DATA_PATH)
+
+    stats = sub.add_parser('stats', help="Print hit/miss statistics")
+    stats.add_argument('--socket', default=SOCKET_PATH)
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        server = DataServer(args.socket, args.max_mb, root=args.data_path)
+        print(f"--- DATA SERVER on {args.socket} ({args.max_mb} MB) ---")
+        # systemd stops us with SIGTERM; unlink the blocks on the way out
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    elif args.command == 'stats':
+        print(json.dumps(DataClient(args.socket).stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
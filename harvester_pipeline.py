@@ -2,13 +2,20 @@
 """
 HistData Harvester with Anti-Detection
 Ethical approach: Mimics real browser behavior, respects rate limits
+
+Downloads are streamed straight into the warehouse: the archive is inflated,
+parsed and written in blocks while it arrives (histdata.iter_histdata_frames
+-> warehouse.write_bar_stream), so no ZIP is written to disk and memory stays
+at one block. Skip decisions read only the warehouse manifest.
+
+KGOSI_HISTDATA_URL points the harvester at another host (e.g. a local stand-in
+server serving the same form and archives).
 """
 
 import os
 import sys
 import time
 import random
-import zipfile
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -17,17 +24,23 @@ import pandas as pd
 import cloudscraper  # pip install cloudscraper
 from bs4 import BeautifulSoup
 
+import barstore
+import catalog
+import histdata
+import pyramid
+import telemetry
+import warehouse
+
 # ========== CONFIG ==========
-RAW_DIR = Path("/mnt/kgosi_view_data/projects/finance/data/raw")
-FINAL_DIR = Path("/mnt/kgosi_view_data/projects/finance/data")
+FINAL_DIR = Path(warehouse.DATA_PATH)
+HISTDATA_URL = os.environ.get('KGOSI_HISTDATA_URL', 'https://www.histdata.com')
+DOWNLOAD_PAGE = '/download-free-forex-historical-data/?/ascii/1-minute-bar-quotes'
+DOWNLOAD_CHUNK = 1024 * 1024
 
 PAIRS = ["eurusd", "gbpusd", "audusd", "usdjpy", "usdchf"]
 YEARS = list(range(2015, 2025))
 
 # ========== SETUP ==========
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-FINAL_DIR.mkdir(parents=True, exist_ok=True)
-
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s"
@@ -60,7 +73,7 @@ class BrowserSession:
     def _warm_up(self):
         """Visit homepage first to establish session cookies"""
         try:
-            self.session.get('https://www.histdata.com', timeout=10)
+            self.session.get(HISTDATA_URL, timeout=10)
             time.sleep(random.uniform(2.0, 4.0))
         except Exception as e:
             logger.warning(f"Warmup failed: {e}")
@@ -89,13 +102,37 @@ class BrowserSession:
 
 # ========== DOWNLOAD LOGIC ==========
 
+def last_trading_minute(year):
+    """
+    The last 1M bar of a full HistData year: 16:59 EST on the year's last
+    weekday (FX closes 17:00 New York). A year cut short by a holiday close
+    is fetched once more and then known complete from the manifest.
+    """
+    day = pd.Timestamp(year, 12, 31)
+    while day.dayofweek >= 5:
+        day -= pd.Timedelta(days=1)
+    return day + pd.Timedelta(hours=16, minutes=59)
+
+def have_year(manifest, year):
+    """
+    The warehouse already holds all of `year`, per the manifest alone: its
+    archive was ingested after the year ended (marked complete), or its
+    stored bars reach the year's last trading minute. A running (or
+    cut-short) year is fetched again; rows already stored are dropped on the
+    way in.
+    """
+    entry = manifest.get(warehouse.BASE_TIMEFRAME, {}).get(str(year))
+    if entry is None:
+        return False
+    return bool(entry.get('complete')) or pd.Timestamp(entry['last']) >= last_trading_minute(year)
+
+
 def download_histdata_year(browser, pair, year):
     """
-    Download single year for a pair using token extraction
-    Returns: Path to downloaded ZIP or None
+    Request single year for a pair using token extraction
+    Returns: the streaming download response (body not yet read) or None
     """
-    pair_lower = pair.lower()
-    url = 'https://www.histdata.com/download-free-forex-historical-data/?/ascii/1-minute-bar-quotes'
+    url = HISTDATA_URL + DOWNLOAD_PAGE
     
     try:
         browser.session.headers.update(browser.get_headers())
@@ -125,70 +162,82 @@ def download_histdata_year(browser, pair, year):
         logger.info(f"[{pair} {year}] ✓ Token extracted: {token_value[:8]}...")
         
         browser.human_delay(4, 7)
-        
-        post_data = {
-            'tk': token_value,
-            'date': str(year),
-            'dateTo': str(year),
-            'platform': 'ASCII',
-            'timeframe': 'M1',
-            'fxpair': pair_lower.upper()
-        }
-        
-        download_resp = browser.session.post(
-            url, 
-            data=post_data, 
-            timeout=30,
-            stream=True
-        )
-        
-        if download_resp.status_code != 200:
-            logger.error(f"[{pair} {year}] Download failed: {download_resp.status_code}")
-            return None
-        
-        content_type = download_resp.headers.get('Content-Type', '')
-        if 'zip' not in content_type and 'octet-stream' not in content_type:
-            logger.error(f"[{pair} {year}] Not a ZIP file: {content_type}")
-            return None
-        
-        zip_path = RAW_DIR / f"{pair}_{year}.zip"
-        with open(zip_path, 'wb') as f:
-            for chunk in download_resp.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
-        logger.info(f"[{pair} {year}] Downloaded {zip_path.stat().st_size / 1024:.1f} KB")
-        return zip_path
+        return request_archive(browser.session, url, token_value, pair, year)
         
     except Exception as e:
         logger.error(f"[{pair} {year}] Exception: {e}")
         return None
 
+def request_archive(session, url, token_value, pair, year):
+    """POST the download form; Returns: the streaming response or None"""
+    post_data = {
+        'tk': token_value,
+        'date': str(year),
+        'dateTo': str(year),
+        'platform': 'ASCII',
+        'timeframe': 'M1',
+        'fxpair': pair.upper()
+    }
+    
+    download_resp = session.post(
+        url, 
+        data=post_data, 
+        timeout=30,
+        stream=True
+    )
+    
+    if download_resp.status_code != 200:
+        logger.error(f"[{pair} {year}] Download failed: {download_resp.status_code}")
+        download_resp.close()
+        return None
+    
+    content_type = download_resp.headers.get('Content-Type', '')
+    if 'zip' not in content_type and 'octet-stream' not in content_type:
+        logger.error(f"[{pair} {year}] Not a ZIP file: {content_type}")
+        download_resp.close()
+        return None
+    return download_resp
+
+def ingest_archive(source, pair, year):
+    """
+    Parse a HistData archive block by block into the warehouse and rebuild
+    the pyramid from that year. source: ZIP path or an iterator of byte chunks.
+    Returns: years written
+    """
+    frames = histdata.iter_histdata_frames(source)
+    with telemetry.span('warehouse'):
+        years = warehouse.write_bar_stream(pair.upper(), frames, root=FINAL_DIR)
+    if years:
+        with telemetry.span('pyramid'):
+            pyramid.build_pyramid(pair.upper(), since=pd.Timestamp(min(years), 1, 1), root=FINAL_DIR)
+    return years
+
+def ingest_download(response, pair, year):
+    """Stream a download response into the warehouse; Returns: True on success"""
+    received = 0
+
+    def chunks():
+        nonlocal received
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK):
+            received += len(chunk)
+            yield chunk
+
+    try:
+        years = ingest_archive(chunks(), pair, year)
+        telemetry.size('zip', received)
+        logger.info(f"[{pair} {year}] Streamed {received / 1024:.1f} KB into warehouse/{pair.upper()} (years {years or 'already covered'})")
+        return True
+    except Exception as e:
+        logger.error(f"[{pair} {year}] Processing failed: {e}")
+        return False
+    finally:
+        response.close()
+
 def process_zip_to_csv(zip_path, pair, year):
-    """Extract and format ZIP to standardized CSV"""
+    """Ingest a ZIP already on disk (same streaming path), then delete it"""
     try:
-        with zipfile.ZipFile(zip_path, 'r') as z:
-            csv_name = [f for f in z.namelist() if f.endswith('.csv')][0]
-            
-            with z.open(csv_name) as f:
-                # HistData format: YYYYMMDD HHMMSS;Open;High;Low;Close;Vol
-                df = pd.read_csv(f, sep=';', header=None)
-                df.columns = ['DateStr', 'Open', 'High', 'Low', 'Close', 'Volume']
-                
-                # Convert to datetime
-                df['datetime'] = pd.to_datetime(df['DateStr'], format='%Y%m%d %H%M%S')
-                df = df[['datetime', 'Open', 'High', 'Low', 'Close', 'Volume']]
-                
-                # Save
-                output_path = FINAL_DIR / f"{pair.upper()}_1M.csv"
-                
-                # Append if file exists
-                if output_path.exists():
-                    existing = pd.read_csv(output_path)
-                    existing['datetime'] = pd.to_datetime(existing['datetime'])
-                    df = pd.concat([existing, df]).drop_duplicates(subset=['datetime']).sort_values('datetime')
-                
-                df.to_csv(output_path, index=False)
-                logger.info(f"[{pair} {year}] Saved to {output_path.name}")
+        years = ingest_archive(zip_path, pair, year)
+        logger.info(f"[{pair} {year}] Saved to warehouse/{pair.upper()} (years {years or 'already covered'})")
                 
         # Cleanup ZIP
         os.remove(zip_path)
@@ -208,32 +257,53 @@ def main():
     total_success = 0
     total_failed = 0
     
+    FINAL_DIR.mkdir(parents=True, exist_ok=True)
+    
     for pair in PAIRS:
         logger.info(f"\n{'='*50}\n TARGET: {pair.upper()}\n{'='*50}")
         
+        # One small JSON read decides every skip for this pair
+        manifest = warehouse.load_manifest(pair.upper(), root=FINAL_DIR)
+        todo = [year for year in YEARS if not have_year(manifest, year)]
+        if not todo:
+            logger.info(f"[{pair}] ⏭Already have {YEARS[0]}-{YEARS[-1]}")
+            continue
+        
         for year in YEARS:
             # Check if we already have data for this year
-            output_path = FINAL_DIR / f"{pair.upper()}_1M.csv"
-            if output_path.exists():
-                df = pd.read_csv(output_path)
-                df['datetime'] = pd.to_datetime(df['datetime'])
-                if any(df['datetime'].dt.year == year):
-                    logger.info(f"[{pair} {year}] ⏭Already have data")
-                    continue
+            if year not in todo:
+                logger.info(f"[{pair} {year}] ⏭Already have data")
+                continue
             
             # Download
-            zip_path = download_histdata_year(browser, pair, year)
+            trace = telemetry.start('harvest', pair=pair.upper(), year=year)
+            trace.phase('request')
+            response = download_histdata_year(browser, pair, year)
             
-            if zip_path:
-                if process_zip_to_csv(zip_path, pair, year):
-                    total_success += 1
-                else:
-                    total_failed += 1
+            ok = False
+            if response is not None:
+                # Download, inflate, parse and store in one pass
+                trace.phase('ingest')
+                ok = ingest_download(response, pair, year)
+            if ok:
+                total_success += 1
+                if year < datetime.now().year:
+                    # A finished year's archive is the whole year: never fetch it again
+                    warehouse.mark_complete(pair.upper(), [year], root=FINAL_DIR)
             else:
                 total_failed += 1
+            trace.finish(ok=ok)
             
             browser.human_delay(5, 10)
         
+        # Refresh the chart's memory-mapped files once per pair, not per year
+        trace = telemetry.start('harvest', pair=pair.upper())
+        with trace.span('barstore'):
+            barstore.export_all(pair.upper(), root=FINAL_DIR)
+        with trace.span('catalog'):
+            catalog.update([pair.upper()], root=FINAL_DIR)
+        trace.finish()
+        
         logger.info(f"Completed {pair.upper()}. Cooling down...")
         time.sleep(random.uniform(30, 60))
     
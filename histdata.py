@@ -0,0 +1,256 @@
+# ==============================================================================
+# histdata.py — Kgosi_View HistData ASCII Parser
+# ==============================================================================
+"""
+Fast reader for HistData M1 ASCII files:
+
+    20150101 170000;1.209600;1.209600;1.209600;1.209600;0
+
+The timestamp is always 15 fixed-width digits, so instead of handing strings
+to pd.to_datetime we gather those bytes straight out of the raw buffer, turn
+them into integer date/time fields with NumPy and assemble datetime64[ns]
+values arithmetically. Only the numeric columns go through the CSV parser.
+
+Archives arriving over HTTP are parsed as they download: iter_zip_stream()
+walks the ZIP's local headers in order and inflates the data member chunk by
+chunk, and iter_histdata_frames() cuts the text at line boundaries into
+blocks of about BLOCK_BYTES. Neither the archive nor the whole CSV is held.
+
+Shared by process_raw_dump.py and harvester_pipeline.py.
+"""
+
+import io
+import zlib
+import struct
+import zipfile
+from os import PathLike
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+STAMP_WIDTH = 15           # "YYYYMMDD HHMMSS"
+_ZERO = ord('0')
+_NS_PER_SEC = 1_000_000_000
+
+BLOCK_BYTES = 4 * 1024 * 1024      # CSV text per parsed frame (~100k bars)
+READ_BYTES = 1024 * 1024           # reads from a local archive
+
+# ZIP local file header: signature, version, flags, method, time, date, crc, sizes, name/extra lengths
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_LOCAL_SIG = 0x04034b50
+_DESCRIPTOR_SIG = 0x08074b50
+_HAS_DESCRIPTOR = 0x08       # sizes follow the data instead of the header
+_STORED, _DEFLATED = 0, 8
+
+
+def _fields(digits, *positions):
+    """Combine digit columns into one integer field (most significant first)"""
+    out = np.zeros(len(digits), dtype=np.int64)
+    for pos in positions:
+        out = out * 10 + digits[:, pos]
+    return out
+
+
+def parse_stamp_matrix(stamps):
+    """
+    (n, 15) uint8 matrix of 'YYYYMMDD HHMMSS' bytes -> datetime64[ns] array
+    """
+    digits = stamps.astype(np.int64) - _ZERO
+
+    year = _fields(digits, 0, 1, 2, 3)
+    month = _fields(digits, 4, 5)
+    day = _fields(digits, 6, 7)
+    seconds = _fields(digits, 9, 10) * 3600 + _fields(digits, 11, 12) * 60 + _fields(digits, 13, 14)
+
+    # Month arithmetic is exact in datetime64[M]; days and seconds are plain offsets
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]').astype(np.int64) + day - 1
+    ns = days * (86_400 * _NS_PER_SEC) + seconds * _NS_PER_SEC
+    return ns.astype('datetime64[ns]')
+
+
+def parse_timestamps(values):
+    """Sequence of 'YYYYMMDD HHMMSS' strings -> datetime64[ns] array"""
+    stamps = np.asarray(values, dtype=f'S{STAMP_WIDTH}')
+    return parse_stamp_matrix(stamps.view(np.uint8).reshape(-1, STAMP_WIDTH))
+
+
+def _line_starts(buf):
+    starts = np.flatnonzero(buf == ord('\n')) + 1
+    starts = np.concatenate(([0], starts))
+    # Drop the position after a trailing newline and any blank lines
+    starts = starts[starts < len(buf)]
+    return starts[buf[starts] >= _ZERO]
+
+
+def read_histdata_csv(raw):
+    """Parse the bytes of one HistData ASCII file into warehouse columns"""
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    starts = _line_starts(buf)
+
+    prices = pd.read_csv(
+        io.BytesIO(raw), sep=';', header=None, usecols=[1, 2, 3, 4, 5],
+        names=['DateStr'] + COLUMNS[1:],
+        dtype={'Open': 'float64', 'High': 'float64', 'Low': 'float64', 'Close': 'float64', 'Volume': 'int64'},
+    )
+
+    fixed_width = len(starts) == len(prices) and (starts + STAMP_WIDTH < len(buf)).all()
+    if fixed_width:
+        stamps = buf[starts[:, None] + np.arange(STAMP_WIDTH)]
+        fixed_width = (stamps[:, 8] == ord(' ')).all() and (buf[starts + STAMP_WIDTH] == ord(';')).all()
+
+    if fixed_width:
+        dates = parse_stamp_matrix(stamps)
+    else:
+        # Not the fixed-width layout we expect: take the slow, forgiving path
+        date_str = pd.read_csv(io.BytesIO(raw), sep=';', header=None, usecols=[0], dtype=str)[0]
+        dates = pd.to_datetime(date_str, format='%Y%m%d %H%M%S').to_numpy()
+
+    prices.insert(0, 'Date', dates)
+    return prices
+
+
+def read_histdata_zip(source):
+    """
+    Open a HistData archive (path or file-like) and parse its data file.
+    The archive also carries a .txt status report, so .csv is preferred.
+    """
+    with zipfile.ZipFile(source, 'r') as z:
+        names = z.namelist()
+        target = ([f for f in names if f.endswith('.csv')] or [f for f in names if f.endswith('.txt')])[0]
+        return read_histdata_csv(z.read(target))
+
+
+# ========== STREAMING ==========
+
+class _ChunkReader:
+    """Exact-size reads over an iterator of byte chunks"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buf = b''
+
+    def read(self, n):
+        while len(self.buf) < n:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buf += chunk
+        out, self.buf = self.buf[:n], self.buf[n:]
+        return out
+
+    def pending(self):
+        """Buffered bytes first, then the rest of the stream"""
+        if self.buf:
+            out, self.buf = self.buf, b''
+            yield out
+        yield from self.chunks
+
+    def unread(self, data):
+        self.buf = data + self.buf
+
+
+def _inflate(reader, flags, method, size):
+    """Decompressed chunks of one member; leaves the reader after its data (and descriptor)"""
+    if method == _STORED:
+        if flags & _HAS_DESCRIPTOR:
+            raise ValueError("stored ZIP member without sizes cannot be streamed")
+        while size:
+            chunk = reader.read(min(size, READ_BYTES))
+            if not chunk:
+                raise ValueError("truncated ZIP member")
+            size -= len(chunk)
+            yield chunk
+        return
+    if method != _DEFLATED:
+        raise ValueError(f"unsupported ZIP compression method {method}")
+
+    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+    for chunk in reader.pending():
+        out = inflater.decompress(chunk)
+        if out:
+            yield out
+        if inflater.eof:
+            reader.unread(inflater.unused_data)
+            break
+    else:
+        raise ValueError("truncated ZIP member")
+    tail = inflater.flush()
+    if tail:
+        yield tail
+
+    if flags & _HAS_DESCRIPTOR:
+        # crc + sizes, optionally preceded by a signature
+        head = reader.read(4)
+        if struct.unpack('<I', head)[0] != _DESCRIPTOR_SIG:
+            reader.unread(head)
+        reader.read(12)
+
+
+def iter_zip_stream(chunks):
+    """
+    (name, iterator of decompressed chunks) for every member of a ZIP that
+    arrives as an iterator of byte chunks (e.g. an HTTP response), in archive
+    order. Each member's iterator must be used before advancing to the next;
+    an unread member is skipped.
+    """
+    reader = _ChunkReader(chunks)
+    while True:
+        raw = reader.read(_LOCAL_HEADER.size)
+        if len(raw) < 4 or struct.unpack('<I', raw[:4])[0] != _LOCAL_SIG:
+            # Central directory (or the end of the stream): no more members
+            return
+        if len(raw) < _LOCAL_HEADER.size:
+            raise ValueError("truncated ZIP header")
+        _, _, flags, method, _, _, _, size, _, name_len, extra_len = _LOCAL_HEADER.unpack(raw)
+        name = reader.read(name_len).decode('utf-8', 'replace')
+        reader.read(extra_len)
+
+        data = _inflate(reader, flags, method, size)
+        yield name, data
+        for _ in data:
+            pass
+
+
+def _member_chunks(source):
+    """Decompressed chunks of an archive's data file (.csv preferred, as in read_histdata_zip)"""
+    if isinstance(source, (str, bytes, PathLike)) or hasattr(source, 'seek'):
+        # Local archive: zipfile reads the central directory and inflates lazily
+        with zipfile.ZipFile(source, 'r') as z:
+            names = z.namelist()
+            target = ([f for f in names if f.endswith('.csv')] or [f for f in names if f.endswith('.txt')])[0]
+            with z.open(target) as member:
+                yield from iter(lambda: member.read(READ_BYTES), b'')
+        return
+
+    # A download: members arrive in order and the data file comes first
+    for name, data in iter_zip_stream(source):
+        if name.endswith('.csv'):
+            yield from data
+            return
+    raise ValueError("archive has no .csv member")
+
+
+def iter_histdata_frames(source, block_bytes=BLOCK_BYTES):
+    """
+    Parse a HistData archive in blocks of about block_bytes of text.
+    source: a path / file object (local archive) or an iterator of byte chunks
+    (the archive as it downloads). Yields DataFrames in file order.
+    """
+    parts, size = [], 0
+    for chunk in _member_chunks(source):
+        parts.append(chunk)
+        size += len(chunk)
+        if size < block_bytes:
+            continue
+        pending = b''.join(parts)
+        cut = pending.rfind(b'\n') + 1
+        if cut:
+            yield read_histdata_csv(pending[:cut])
+            pending = pending[cut:]
+        parts, size = [pending], len(pending)
+    pending = b''.join(parts)
+    if pending.strip():
+        yield read_histdata_csv(pending)
@@ -0,0 +1,382 @@
+# ==============================================================================
+# indicators.py — Kgosi_View Chart Indicators
+# ==============================================================================
+"""
+Technical indicators with two faces.
+
+Batch: compute(bars, spec) runs over a whole BarStore with vectorized pandas
+(ewm / rolling) and returns one float64 array per output line, aligned to the
+bars. IndicatorCache keeps these per symbol/timeframe/spec for the process,
+so a cursor move is a slice of cached arrays and the chart is only sent the
+visible window. The cache is an LRU bounded by KGOSI_INDICATOR_CACHE_MB
+(default 256).
+
+Streaming: every indicator also has an O(1)-per-bar updater (STREAMS) that
+continues from the state at any bar. When a series grows (new bars ingested,
+a re-exported store picked up from the data server), the cache advances the
+updaters over the new bars only instead of recomputing the history; a
+re-export that changed bars it already had is computed afresh.
+
+Replay: CursorStream keeps an updater at the replay cursor and gives the
+value at the cursor bar from that bar as it stands, so a bar still forming
+at the replay minute shows the indicator of its partial OHLC, not of the
+completed bar.
+
+Specs are short strings, e.g. 'EMA 20', 'BB 20 2', 'RSI 14'.
+"""
+
+import os
+import copy
+import zlib
+import threading
+from collections import deque, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PRESETS = ['EMA 20', 'EMA 50', 'SMA 200', 'BB 20 2', 'RSI 14', 'ATR 14']
+
+# Indicators drawn on the price axis; the rest get their own pane
+PRICE_PANE = {'SMA', 'EMA', 'BB'}
+
+# IndicatorCache budget (full-history float64 lines: ~8 bytes per bar per line)
+CACHE_MB = int(os.environ.get('KGOSI_INDICATOR_CACHE_MB', 256))
+
+
+def parse(spec):
+    """'BB 20 2' -> ('BB', (20, 2.0))"""
+    kind, *params = spec.split()
+    kind = kind.upper()
+    if kind not in BATCH:
+        raise ValueError(f"unknown indicator {spec!r}")
+    period = int(params[0]) if params else 14
+    return kind, (period, *(float(p) for p in params[1:]))
+
+
+def line_names(spec):
+    kind, _ = parse(spec)
+    if kind == 'BB':
+        return [f"{spec} UPPER", f"{spec} MID", f"{spec} LOWER"]
+    return [spec]
+
+
+# ========== BATCH ==========
+
+def _columns(bars):
+    return (np.asarray(bars[k], dtype=np.float64) for k in ('High', 'Low', 'Close'))
+
+
+def _wilder(values, period):
+    # Wilder smoothing is an EMA with alpha = 1 / period
+    return pd.Series(values).ewm(alpha=1.0 / period, adjust=False, min_periods=period).mean().to_numpy()
+
+
+def sma(bars, period):
+    return [pd.Series(np.asarray(bars['Close'], dtype=np.float64)).rolling(period).mean().to_numpy()]
+
+
+def ema(bars, period):
+    close = pd.Series(np.asarray(bars['Close'], dtype=np.float64))
+    return [close.ewm(span=period, adjust=False, min_periods=period).mean().to_numpy()]
+
+
+def bollinger(bars, period, width=2.0):
+    close = pd.Series(np.asarray(bars['Close'], dtype=np.float64)).rolling(period)
+    mid, std = close.mean().to_numpy(), close.std(ddof=0).to_numpy()
+    return [mid + width * std, mid, mid - width * std]
+
+
+def rsi(bars, period):
+    _, _, close = _columns(bars)
+    change = np.diff(close, prepend=np.nan)
+    gain = _wilder(np.where(change > 0, change, 0.0)[1:], period)
+    loss = _wilder(np.where(change < 0, -change, 0.0)[1:], period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + gain / loss)
+    out = np.where(loss == 0, 100.0, out)
+    return [np.concatenate(([np.nan], np.where(np.isnan(gain), np.nan, out)))]
+
+
+def atr(bars, period):
+    high, low, close = _columns(bars)
+    prev = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return [_wilder(true_range, period)]
+
+
+BATCH = {'SMA': sma, 'EMA': ema, 'BB': bollinger, 'RSI': rsi, 'ATR': atr}
+
+
+def compute(bars, spec):
+    """{line name: float64 array aligned to bars} for one spec"""
+    kind, params = parse(spec)
+    return dict(zip(line_names(spec), BATCH[kind](bars, *params)))
+
+
+# ========== STREAMING ==========
+
+class _Rolling:
+    """Last `period` closes with a running sum / sum of squares"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def push(self, x):
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.sum -= old
+            self.sumsq -= old * old
+        self.window.append(x)
+        self.sum += x
+        self.sumsq += x * x
+
+    def mean(self):
+        return self.sum / self.period if len(self.window) == self.period else np.nan
+
+
+class SMAStream:
+
+    def __init__(self, period):
+        self.rolling = _Rolling(period)
+
+    def seed(self, bars, stop, lines):
+        for x in np.asarray(bars['Close'][max(0, stop - self.rolling.period):stop], dtype=np.float64):
+            self.rolling.push(float(x))
+
+    def update(self, high, low, close):
+        self.rolling.push(close)
+        return [self.rolling.mean()]
+
+
+class BBStream(SMAStream):
+
+    def __init__(self, period, width=2.0):
+        super().__init__(period)
+        self.width = width
+
+    def update(self, high, low, close):
+        self.rolling.push(close)
+        mid = self.rolling.mean()
+        std = np.sqrt(max(self.rolling.sumsq / self.rolling.period - mid * mid, 0.0))
+        return [mid + self.width * std, mid, mid - self.width * std]
+
+
+class EMAStream:
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+        self.count = 0
+
+    def seed(self, bars, stop, lines):
+        # The batch holds NaN until `period` bars; replaying those few is exact
+        if stop < self.period:
+            for x in np.asarray(bars['Close'][:stop], dtype=np.float64):
+                self.update(0.0, 0.0, float(x))
+        else:
+            self.value, self.count = float(lines[0][stop - 1]), stop
+
+    def update(self, high, low, close):
+        self.value = close if self.value is None else self.value + self.alpha * (close - self.value)
+        self.count += 1
+        return [self.value if self.count >= self.period else np.nan]
+
+
+class RSIStream:
+
+    def __init__(self, period):
+        self.period = period
+        self.prev = None
+        self.gain = None
+        self.loss = None
+        self.count = 0
+
+    def seed(self, bars, stop, lines):
+        # The RSI line does not hold the two averages; rebuild them vectorized
+        close = np.asarray(bars['Close'][:stop], dtype=np.float64)
+        self.prev = float(close[-1])
+        change = np.diff(close)
+        if len(change):
+            smooth = pd.Series(np.where(change > 0, change, 0.0)).ewm(alpha=1.0 / self.period, adjust=False)
+            self.gain = float(smooth.mean().iloc[-1])
+            smooth = pd.Series(np.where(change < 0, -change, 0.0)).ewm(alpha=1.0 / self.period, adjust=False)
+            self.loss = float(smooth.mean().iloc[-1])
+        self.count = len(change)
+
+    def update(self, high, low, close):
+        if self.prev is None:
+            self.prev = close
+            return [np.nan]
+        change, self.prev = close - self.prev, close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        a = 1.0 / self.period
+        self.gain = gain if self.gain is None else self.gain + a * (gain - self.gain)
+        self.loss = loss if self.loss is None else self.loss + a * (loss - self.loss)
+        self.count += 1
+        if self.count < self.period:
+            return [np.nan]
+        return [100.0 if self.loss == 0 else 100.0 - 100.0 / (1.0 + self.gain / self.loss)]
+
+
+class ATRStream:
+
+    def __init__(self, period):
+        self.period = period
+        self.prev = None
+        self.value = None
+        self.count = 0
+
+    def seed(self, bars, stop, lines):
+        if stop < self.period:
+            high, low, close = _columns(bars)
+            for i in range(stop):
+                self.update(float(high[i]), float(low[i]), float(close[i]))
+        else:
+            self.value, self.count = float(lines[0][stop - 1]), stop
+            self.prev = float(bars['Close'][stop - 1])
+
+    def update(self, high, low, close):
+        true_range = high - low if self.prev is None else max(high - low, abs(high - self.prev), abs(low - self.prev))
+        self.prev = close
+        self.value = true_range if self.value is None else self.value + (true_range - self.value) / self.period
+        self.count += 1
+        return [self.value if self.count >= self.period else np.nan]
+
+
+STREAMS = {'SMA': SMAStream, 'EMA': EMAStream, 'BB': BBStream, 'RSI': RSIStream, 'ATR': ATRStream}
+
+
+def stream(spec, bars=None, stop=0, lines=None):
+    """Updater for spec, positioned after bar `stop - 1` of bars (with that spec's batch lines)"""
+    kind, params = parse(spec)
+    updater = STREAMS[kind](*params)
+    if stop:
+        updater.seed(bars, stop, lines)
+    return updater
+
+
+class CursorStream:
+    """
+    Updater for one spec kept at the replay cursor (after bar stop - 1).
+    Stepping forward advances it over the bars passed; a jump back, a long
+    jump ahead or another series re-seeds it from the batch lines.
+    """
+
+    RESEED_BARS = 1000
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.names = line_names(spec)
+        self.updater = None
+        self.stop = 0
+        self.series = None
+
+    def at(self, bars, lines, cursor, partial=None, series=None):
+        """
+        {line name: value at bar `cursor`}; `partial` (a one-row BAR_DTYPE
+        array) is that bar as it stands when it is still forming. lines:
+        the spec's batch lines for bars; series: anything that changes
+        when bars does (the catalog version).
+        """
+        if self.updater is None or series != self.series or not self.stop <= cursor <= self.stop + self.RESEED_BARS:
+            self.updater = stream(self.spec, bars, cursor, [lines[n] for n in self.names])
+            self.stop, self.series = cursor, series
+        high, low, close = (np.asarray(bars[k][self.stop:cursor], dtype=np.float64) for k in ('High', 'Low', 'Close'))
+        for h, l, c in zip(high, low, close):
+            self.updater.update(float(h), float(l), float(c))
+        self.stop = cursor
+        bar = bars[cursor:cursor + 1] if partial is None else partial
+        # The bar may still be forming: update a copy, the updater stays before it
+        values = copy.deepcopy(self.updater).update(*(float(bar[k][0]) for k in ('High', 'Low', 'Close')))
+        return dict(zip(self.names, values))
+
+
+# ========== CACHE ==========
+
+def _checksums(bars, start, stop, previous=None):
+    """CRC of each input column over bars[start:stop], continuing `previous`"""
+    return tuple(
+        zlib.crc32(np.ascontiguousarray(bars[k][start:stop], dtype=np.float64), 0 if previous is None else previous[i])
+        for i, k in enumerate(('High', 'Low', 'Close'))
+    )
+
+
+class _Entry:
+
+    def __init__(self, spec, bars, version=None):
+        self.spec = spec
+        self.lines = compute(bars, spec)
+        self.rows = len(bars)
+        self.first = bars['Date'][0] if self.rows else None
+        self.last = bars['Date'][-1] if self.rows else None
+        self.version = version
+        self.checksums = _checksums(bars, 0, self.rows)
+        self.updater = None
+
+    def matches(self, bars, version=None):
+        """bars is this series, possibly with newer bars appended"""
+        if not (
+            self.rows and len(bars) >= self.rows
+            and bars['Date'][0] == self.first and bars['Date'][self.rows - 1] == self.last
+        ):
+            return False
+        # A new export over the same dates may have corrected prices: only
+        # keep the lines when the bars they were computed from are unchanged
+        return version == self.version or _checksums(bars, 0, self.rows) == self.checksums
+
+    def extend(self, bars, version=None):
+        names = list(self.lines)
+        if self.updater is None:
+            self.updater = stream(self.spec, bars, self.rows, [self.lines[n] for n in names])
+        high, low, close = (np.asarray(bars[k][self.rows:], dtype=np.float64) for k in ('High', 'Low', 'Close'))
+        new = np.array([self.updater.update(h, l, c) for h, l, c in zip(high, low, close)]).reshape(-1, len(names))
+        for k, name in enumerate(names):
+            self.lines[name] = np.concatenate((self.lines[name], new[:, k]))
+        self.checksums = _checksums(bars, self.rows, len(bars), self.checksums)
+        self.rows = len(bars)
+        self.last = bars['Date'][-1]
+        self.version = version
+
+    @property
+    def nbytes(self):
+        return sum(line.nbytes for line in self.lines.values())
+
+
+class IndicatorCache:
+    """
+    Process-wide batch results per (symbol, timeframe, spec), least recently
+    used evicted once their arrays exceed max_bytes
+    """
+
+    def __init__(self, max_bytes=CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()     # key -> _Entry
+        self.bytes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, symbol, timeframe, spec, bars, version=None):
+        """{line name: array aligned to bars}; version: the series' catalog version"""
+        key = (symbol.upper(), timeframe, spec)
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry.nbytes
+            if entry is not None and entry.matches(bars, version):
+                if entry.rows < len(bars):
+                    entry.extend(bars, version)
+                entry.version = version
+            else:
+                entry = _Entry(spec, bars, version)
+            self.entries[key] = entry
+            self.bytes += entry.nbytes
+            # Never evict the entry just requested (the most recent one)
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+            return entry.lines
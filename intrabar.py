@@ -0,0 +1,133 @@
+# ==============================================================================
+# intrabar.py — Kgosi_View Intrabar SL/TP Resolution
+# ==============================================================================
+"""
+Which level was hit first inside a higher-timeframe bar.
+
+A 1H candle whose range spans both the stop and the target cannot tell which
+one came first. The 1M base data can: chart bar i covers the minute rows
+[offsets[i], offsets[i + 1]), i.e. every minute from its own Date up to the
+next bar's (the pyramid labels buckets by their left edge and every minute
+lands in one). The offsets come from a single np.searchsorted of the bar
+dates into the memory-mapped 1M Date column, so settling a bar reads only
+that bar's minutes — the 1M file is never reloaded or scanned.
+
+Levels are absolute prices; NaN disables one. A minute that touches both
+levels is still a tie and settles as the stop, the same pessimistic rule as
+the bar-level check.
+
+Used by backtest.run(intrabar=...) and by the app's trade panel.
+"""
+
+import numpy as np
+
+_NEVER = np.iinfo(np.int64).max
+
+
+def touches(side, low, high, stop, target):
+    """Per-row (stop hit, target hit) for a long (+1) or short (-1) position"""
+    with np.errstate(invalid='ignore'):
+        hit_sl = np.where(side > 0, low <= stop, high >= stop)
+        hit_tp = np.where(side > 0, high >= target, low <= target)
+    return hit_sl, hit_tp
+
+
+def fill_price(side, level, open_, is_stop):
+    """A level fills at its price, or at the bar's open when the bar gapped through it"""
+    worse = np.minimum if (side > 0) == is_stop else np.maximum
+    return float(worse(open_, level))
+
+
+class IntrabarResolver:
+    """Bar -> 1M row ranges of one symbol/timeframe, and first-touch checks over them"""
+
+    def __init__(self, bars, minutes, offsets=None):
+        self.bars = bars
+        self.minutes = minutes
+        if offsets is None:
+            # Already built when the app holds a cursormap.CursorMap of the same series
+            starts = np.searchsorted(minutes.index.ns, bars.index.ns, side='left')
+            offsets = np.append(starts, len(minutes)).astype(np.int64)
+        self.offsets = offsets
+
+    def minutes_of(self, row):
+        """1M row range [lo, hi) of chart bar `row`"""
+        return int(self.offsets[row]), int(self.offsets[row + 1])
+
+    def first_touch(self, rows, sides, stops, targets):
+        """
+        Settle bars that touched both levels of a position.
+
+        rows: chart bar per position; sides: +1/-1; stops, targets: price levels.
+        Returns (stop_first, resolved): whether the stop came first, and whether
+        the minutes actually decided it (False for minute ties or bars without 1M data).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lo, hi = self.offsets[rows], self.offsets[rows + 1]
+        counts = hi - lo
+        stop_first = np.ones(len(rows), dtype=bool)
+        resolved = np.zeros(len(rows), dtype=bool)
+        has = counts > 0
+        if not has.any():
+            return stop_first, resolved
+
+        # Every minute of every bar in one flat array: minute m of bar k is lo[k] + m
+        lo, counts = lo[has], counts[has]
+        owner = np.repeat(np.arange(len(lo)), counts)
+        seg = np.cumsum(counts) - counts
+        mins = np.arange(counts.sum()) - seg[owner] + lo[owner]
+
+        side = np.asarray(sides, dtype=np.float64)[has]
+        hit_sl, hit_tp = touches(
+            side[owner], self.minutes['Low'][mins], self.minutes['High'][mins],
+            np.asarray(stops, dtype=np.float64)[has][owner], np.asarray(targets, dtype=np.float64)[has][owner],
+        )
+        pos = np.arange(len(mins))
+        first_sl = np.minimum.reduceat(np.where(hit_sl, pos, _NEVER), seg)
+        first_tp = np.minimum.reduceat(np.where(hit_tp, pos, _NEVER), seg)
+
+        stop_first[has] = first_sl <= first_tp
+        resolved[has] = first_sl != first_tp
+        return stop_first, resolved
+
+    def exit_in_minutes(self, lo, hi, side, sl=None, tp=None):
+        """
+        First 1M row in [lo, hi) where a position's SL or TP price is touched
+        (a position opened inside a bar only counts that bar's later minutes).
+        Returns (1M row, 'SL' | 'TP', fill price) or None.
+        """
+        hi = min(hi, len(self.minutes))
+        if lo >= hi or (not sl and not tp):
+            return None
+        sl_level, tp_level = sl or np.nan, tp or np.nan
+        hit_sl, hit_tp = touches(side, self.minutes['Low'][lo:hi], self.minutes['High'][lo:hi], sl_level, tp_level)
+
+        hits = np.flatnonzero(hit_sl | hit_tp)
+        if len(hits) == 0:
+            return None
+        i = int(hits[0])
+        is_stop = bool(hit_sl[i])
+        level = sl_level if is_stop else tp_level
+        return lo + i, 'SL' if is_stop else 'TP', fill_price(side, level, float(self.minutes['Open'][lo + i]), is_stop)
+
+    def exit_between(self, start, stop, side, sl=None, tp=None):
+        """
+        First chart bar in [start, stop) where a position's SL or TP price is touched.
+        Returns (row, 'SL' | 'TP', fill price) or None.
+        """
+        stop = min(stop, len(self.bars))
+        if start >= stop or (not sl and not tp):
+            return None
+        sl_level, tp_level = sl or np.nan, tp or np.nan
+        hit_sl, hit_tp = touches(side, self.bars['Low'][start:stop], self.bars['High'][start:stop], sl_level, tp_level)
+
+        hits = np.flatnonzero(hit_sl | hit_tp)
+        if len(hits) == 0:
+            return None
+        i = int(hits[0])
+        is_stop = bool(hit_sl[i])
+        if hit_sl[i] and hit_tp[i]:
+            is_stop = bool(self.first_touch([start + i], [side], [sl_level], [tp_level])[0][0])
+
+        level = sl_level if is_stop else tp_level
+        return start + i, 'SL' if is_stop else 'TP', fill_price(side, level, float(self.bars['Open'][start + i]), is_stop)
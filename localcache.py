@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# localcache.py — Kgosi_View Local Read-Through Cache
+# ==============================================================================
+"""
+Local-disk mirror of bar store series on the compute node.
+
+The app memory-maps the exported stores (barstore.py). Mapped from the NFS
+share, every page fault of a cold series crosses the network; mapped from a
+local copy it does not. LocalCache.series() returns the path of a local copy
+of one symbol/timeframe (the .npy plus its .lodN.npy levels), copying it on
+first use:
+
+    A copy is valid while the size and mtime of every source file match
+    what was copied (one stat per file, only when a series is opened).
+    The store file is hashed while it is copied and checked against the
+    catalog's BLAKE2 hash, so a file replaced mid-copy is never served.
+    Series are evicted least-recently-used to stay under the quota.
+    The lock guards only the index and counters, never a copy: while one
+    series copies, other series (and stats()) are served, and a request for
+    the series being copied waits for that copy alone.
+    Every app process on the node may share the directory. Temp files carry
+    the process and thread, and index.json is only changed under a file lock
+    by merging into what is on disk, so one process never drops another's
+    series from the quota. A hit only notes its time in memory; those times
+    reach the index with the next copy, or at most every USED_SAVE_SECONDS.
+
+prefetch() copies series from a background thread. The app prefetches the
+timeframes next to the one on screen, which a TF switch opens next.
+
+Environment:
+    KGOSI_LOCAL_CACHE       local directory (unset = read straight from the share)
+    KGOSI_LOCAL_CACHE_GB    disk quota (default 20)
+
+Run:
+    python localcache.py stats | clear [--cache-dir DIR]
+"""
+
+import os
+import json
+import fcntl
+import time
+import queue
+import shutil
+import hashlib
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+
+import barstore
+import catalog
+import warehouse
+
+CACHE_DIR = os.environ.get('KGOSI_LOCAL_CACHE')
+QUOTA_BYTES = int(float(os.environ.get('KGOSI_LOCAL_CACHE_GB', 20)) * 1024 ** 3)
+INDEX_NAME = "index.json"
+LOCK_NAME = "index.lock"
+USED_SAVE_SECONDS = 60    # hits reach the shared index at most this often
+COPY_CHUNK = 8 * 1024 * 1024
+
+
+class LocalCache:
+    """Series copies under cache_dir, mirroring source_root's bar store layout"""
+
+    def __init__(self, cache_dir, source_root=None, quota_bytes=QUOTA_BYTES):
+        self.dir = Path(cache_dir)
+        self.source = Path(source_root or warehouse.DATA_PATH)
+        self.quota = quota_bytes
+        self.lock = threading.RLock()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+        self.used = {}           # key -> time of the last hit, not saved yet
+        self.saved = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.queue = queue.Queue()
+        self.queued = set()
+        self.copying = {}        # key -> Event set when its copy ends
+        self.worker = None
+
+    # ── Index: {"EURUSD/1H": {"files": {name: [bytes, mtime_ns]}, "hash", "bytes", "used"}} ──
+
+    def _load_index(self):
+        path = self.dir / INDEX_NAME
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp = self.dir / f"{INDEX_NAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps(self.index, indent=1, sort_keys=True))
+        os.replace(tmp, self.dir / INDEX_NAME)
+
+    @contextlib.contextmanager
+    def _shared_index(self):
+        """
+        self.index reloaded from disk with this process's hits merged in, for a
+        change that is saved on exit; other processes wait on the file lock.
+        """
+        with open(self.dir / LOCK_NAME, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.index = self._load_index()
+                for key, used in self.used.items():
+                    if key in self.index:
+                        self.index[key]['used'] = max(self.index[key]['used'], used)
+                self.used.clear()
+                yield self.index
+                self._save_index()
+                self.saved = time.time()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _current(self, entry, files, local):
+        return entry is not None and entry['files'] == files and all((local / n).exists() for n in files)
+
+    # ── Files ──
+
+    def _source_files(self, symbol, timeframe):
+        """{file name: [bytes, mtime_ns]} of the series on the share, or None if not exported"""
+        store = barstore.store_path(symbol, timeframe, self.source)
+        try:
+            stat = store.stat()
+        except FileNotFoundError:
+            return None
+        files = {store.name: [stat.st_size, stat.st_mtime_ns]}
+        for level in sorted(store.parent.glob(f"{timeframe}.lod*.npy")):
+            if '.tmp' in level.name:
+                continue
+            stat = level.stat()
+            files[level.name] = [stat.st_size, stat.st_mtime_ns]
+        return files
+
+    def _local_dir(self, symbol):
+        return self.dir / barstore.STORE_DIR / symbol.upper()
+
+    def _copy(self, source, target):
+        """Copy through a temp file; returns the BLAKE2 hash of what was written"""
+        digest = hashlib.blake2b(digest_size=16)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+        with open(source, 'rb') as src, open(tmp, 'wb') as dst:
+            for chunk in iter(lambda: src.read(COPY_CHUNK), b''):
+                digest.update(chunk)
+                dst.write(chunk)
+        os.replace(tmp, target)
+        return digest.hexdigest()
+
+    def _drop(self, key):
+        entry = self.index.pop(key, None)
+        if entry is None:
+            return
+        symbol, _ = key.split('/')
+        for name in entry['files']:
+            # A process that still maps the file keeps its pages until it unmaps
+            (self._local_dir(symbol) / name).unlink(missing_ok=True)
+
+    def _evict(self, keep):
+        total = sum(e['bytes'] for e in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['used']):
+            if total <= self.quota:
+                break
+            if key == keep:
+                continue
+            total -= self.index[key]['bytes']
+            self._drop(key)
+            self.evictions += 1
+
+    # ── Public ──
+
+    def series(self, symbol, timeframe):
+        """
+        Local path of the series' store file (copied now if missing or stale),
+        the share's path if it cannot be cached, or None if it is not exported.
+        """
+        symbol = symbol.upper()
+        key = f"{symbol}/{timeframe}"
+        source_path = barstore.store_path(symbol, timeframe, self.source)
+        local = self._local_dir(symbol)
+        while True:
+            files = self._source_files(symbol, timeframe)
+            if files is None:
+                return None
+            with self.lock:
+                if not self._current(self.index.get(key), files, local):
+                    # Another process sharing the directory may have copied it
+                    self.index = self._load_index()
+                if self._current(self.index.get(key), files, local):
+                    self.hits += 1
+                    self.used[key] = time.time()
+                    if self.used[key] - self.saved > USED_SAVE_SECONDS:
+                        with self._shared_index():
+                            pass
+                    return local / source_path.name
+                copying = self.copying.get(key)
+                if copying is None:
+                    self.misses += 1
+                    size = sum(f[0] for f in files.values())
+                    if size > self.quota:
+                        return source_path
+                    self._drop(key)
+                    copying = self.copying[key] = threading.Event()
+                    break
+            # Another thread is copying this series: wait for it, then look again
+            copying.wait()
+
+        try:
+            return self._fill(key, symbol, timeframe, files, size, source_path, local)
+        finally:
+            with self.lock:
+                self.copying.pop(key).set()
+
+    def _fill(self, key, symbol, timeframe, files, size, source_path, local):
+        """Copy one series without holding the lock; only the index update takes it"""
+        local.mkdir(parents=True, exist_ok=True)
+        expected = catalog.version(symbol, timeframe, self.source)
+        # Levels first, as barstore.export writes them: the store never outruns its levels
+        for name in sorted(files, key=lambda n: n == source_path.name):
+            digest = self._copy(source_path.parent / name, local / name)
+            if name == source_path.name and expected and digest != expected:
+                # Replaced while we copied (or the catalog is behind); serve the share this time
+                for copied in files:
+                    (local / copied).unlink(missing_ok=True)
+                return source_path
+        if self._source_files(symbol, timeframe) != files:
+            for copied in files:
+                (local / copied).unlink(missing_ok=True)
+            return source_path
+
+        with self.lock, self._shared_index() as index:
+            index[key] = {'files': files, 'hash': expected, 'bytes': size, 'used': time.time()}
+            self._evict(keep=key)
+        return local / source_path.name
+
+    def prefetch(self, symbol, timeframes):
+        """Copy these series in the background (skipped when already current per the catalog)"""
+        for timeframe in timeframes:
+            key = f"{symbol.upper()}/{timeframe}"
+            version = catalog.version(symbol, timeframe, self.source)
+            with self.lock:
+                entry = self.index.get(key)
+                current = entry is not None and entry['hash'] and entry['hash'] == version
+                if current or key in self.queued or key in self.copying:
+                    continue
+                self.queued.add(key)
+                if self.worker is None or not self.worker.is_alive():
+                    self.worker = threading.Thread(target=self._prefetch_loop, name='kgosi-prefetch', daemon=True)
+                    self.worker.start()
+            self.queue.put((symbol, timeframe))
+
+    def _prefetch_loop(self):
+        while True:
+            symbol, timeframe = self.queue.get()
+            try:
+                self.series(symbol, timeframe)
+            except OSError:
+                pass
+            finally:
+                with self.lock:
+                    self.queued.discard(f"{symbol.upper()}/{timeframe}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                'series': len(self.index),
+                'bytes': sum(e['bytes'] for e in self.index.values()),
+                'quota': self.quota,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def neighbours(timeframe):
+    """The timeframes either side of this one in the toolbar order"""
+    i = barstore.TIMEFRAMES.index(timeframe)
+    return barstore.TIMEFRAMES[max(0, i - 1):i] + barstore.TIMEFRAMES[i + 1:i + 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View local read-through cache")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, text in (('stats', "Cached series and disk use"), ('clear', "Delete every cached series")):
+        cmd = sub.add_parser(name, help=text)
+        cmd.add_argument('--cache-dir', default=CACHE_DIR, required=CACHE_DIR is None)
+
+    args = parser.parse_args()
+    cache_dir = Path(args.cache_dir)
+    if args.command == 'stats':
+        index = json.loads((cache_dir / INDEX_NAME).read_text()) if (cache_dir / INDEX_NAME).exists() else {}
+        total = sum(e['bytes'] for e in index.values())
+        print(f"--- LOCAL CACHE {cache_dir}: {len(index)} series, {total / 1e6:,.1f} MB of {QUOTA_BYTES / 1024 ** 3:,.1f} GB ---")
+        for key, entry in sorted(index.items(), key=lambda item: -item[1]['used']):
+            print(f"   {key:<12} {entry['bytes'] / 1e6:>10,.1f} MB  used {time.ctime(entry['used'])}")
+    elif args.command == 'clear':
+        shutil.rmtree(cache_dir / barstore.STORE_DIR, ignore_errors=True)
+        (cache_dir / INDEX_NAME).unlink(missing_ok=True)
+        print(f"Cleared {cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
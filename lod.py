@@ -0,0 +1,164 @@
+# ==============================================================================
+# lod.py — Kgosi_View Level-of-Detail Views
+# ==============================================================================
+"""
+Chart windows wider than the screen, drawn at a fixed number of candles.
+
+go.Candlestick stalls once a window holds tens of thousands of bars, and a
+chart cannot show more candles than it has pixel columns anyway. Past
+PIXEL_BUDGET bars the chart draws OHLC buckets instead (first open, max high,
+min low, last close, summed volume), so every wick extreme of the window is
+still on screen.
+
+Buckets are aligned to multiples of LOD_FACTOR ** level rows. That lets the
+interior of any window come straight from a precomputed pyramid of coarser
+series (BarStore.levels, exported next to the store as 1H.lod1.npy, ...);
+only the partial buckets at the two edges are aggregated from base bars, and
+the last one never reaches past the cursor.
+
+Overlay lines are thinned with Largest-Triangle-Three-Buckets, which keeps
+the peaks and troughs that plain striding drops.
+"""
+
+import numpy as np
+
+LOD_FACTOR = 4
+PIXEL_BUDGET = 1500       # most candles drawn for one window
+TOP_LEVEL_ROWS = 256      # the pyramid stops once a level is this small
+LTTB_OVERSAMPLE = 4       # overlay points sampled per drawn point before thinning
+
+
+# ========== AGGREGATION ==========
+
+def aggregate(bars, starts):
+    """
+    OHLCV buckets of a BAR_DTYPE array: bucket i covers bars[starts[i]:starts[i + 1]]
+    (the last one runs to the end). starts must be increasing and inside bars.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    out = np.empty(len(starts), dtype=bars.dtype)
+    if len(starts) == 0:
+        return out
+    ends = np.append(starts[1:], len(bars))
+    out['Date'] = bars['Date'][starts]
+    out['Open'] = bars['Open'][starts]
+    out['High'] = np.maximum.reduceat(bars['High'], starts)
+    out['Low'] = np.minimum.reduceat(bars['Low'], starts)
+    out['Close'] = bars['Close'][ends - 1]
+    out['Volume'] = np.add.reduceat(bars['Volume'], starts)
+    return out
+
+
+def downsample(bars, factor=LOD_FACTOR):
+    """Every `factor` consecutive bars merged into one (last bucket may be short)"""
+    return aggregate(bars, np.arange(0, len(bars), factor))
+
+
+def build_levels(bars, factor=LOD_FACTOR, top_rows=TOP_LEVEL_ROWS):
+    """
+    Pyramid of coarser series, finest first: row j of level k merges base bars
+    [j * factor**k, (j + 1) * factor**k). Each level is built from the previous one.
+    """
+    levels, current = [], bars
+    while len(current) > top_rows:
+        current = downsample(current, factor)
+        levels.append(current)
+    return levels
+
+
+def level_lengths(rows, factor=LOD_FACTOR, top_rows=TOP_LEVEL_ROWS):
+    """Row count of every level build_levels() makes for a series of `rows` bars"""
+    lengths = []
+    while rows > top_rows:
+        rows = -(-rows // factor)
+        lengths.append(rows)
+    return lengths
+
+
+# ========== WINDOWS ==========
+
+def level_for(rows, budget=PIXEL_BUDGET, factor=LOD_FACTOR):
+    """Smallest level that draws `rows` bars in about `budget` candles (0 = raw bars)"""
+    level = 0
+    while rows > budget * factor ** level:
+        level += 1
+    return level
+
+
+def bounds(start, stop, level, factor=LOD_FACTOR):
+    """Bucket edges covering bars [start, stop): multiples of factor**level, clipped to the range"""
+    size = factor ** level
+    inner = np.arange(-(-start // size) * size, stop, size, dtype=np.int64)
+    return np.unique(np.concatenate(([start], inner, [stop])).astype(np.int64))
+
+
+def candles(store, start, stop, level):
+    """
+    Bars [start, stop) of a BarStore as level-`level` buckets (see bounds()).
+    Aligned buckets come from store.levels; the edges are merged from base bars.
+    """
+    if level == 0 or stop - start <= 1:
+        return np.asarray(store.bars[start:stop])
+
+    level = min(level, len(store.levels))
+    size = LOD_FACTOR ** level
+    first, last = -(-start // size), stop // size    # whole buckets [first, last)
+    if first > last:
+        # Both ends inside one bucket
+        return aggregate(store.bars[start:stop], [0])
+
+    parts = []
+    if start < first * size:
+        parts.append(aggregate(store.bars[start:first * size], [0]))
+    if first < last:
+        parts.append(store.levels[level - 1][first:last])
+    if last * size < stop:
+        parts.append(aggregate(store.bars[last * size:stop], [0]))
+    return np.concatenate(parts)
+
+
+# ========== OVERLAY LINES ==========
+
+def lttb(x, y, count):
+    """Indices of `count` points of the line (x, y) picked by Largest-Triangle-Three-Buckets"""
+    n = len(x)
+    if count >= n or count < 3:
+        return np.arange(n)
+
+    x = (np.asarray(x, dtype=np.int64) - int(x[0])).astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # count - 2 buckets over the inner points; first and last points are always kept
+    edges = np.linspace(1, n - 1, count - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    # Each bucket is scored against the mean of the next one (the last point for the last bucket)
+    next_x = np.append((np.add.reduceat(x[:n - 1], edges[:-1]) / sizes)[1:], x[-1])
+    next_y = np.append((np.add.reduceat(y[:n - 1], edges[:-1]) / sizes)[1:], y[-1])
+
+    picked = np.empty(count, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for b in range(count - 2):
+        lo, hi = edges[b], edges[b + 1]
+        area = np.abs((x[a] - next_x[b]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[b] - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[b + 1] = a
+    return picked
+
+
+def line(main, overlay, rows, start, stop, count):
+    """
+    Overlay bars behind main bars [start, stop) (rows: aligned overlay row per
+    main bar), dated at those main bars so the line stays under the candles,
+    thinned to `count` points when there are more.
+    """
+    n = stop - start
+    if n <= count:
+        sample = np.arange(start, stop)
+    else:
+        sample = np.unique(np.linspace(start, stop - 1, min(n, count * LTTB_OVERSAMPLE)).astype(np.int64))
+    points = overlay.bars[rows[sample]]
+    points['Date'] = main['Date'][sample]
+    if n <= count:
+        return points
+    return points[lttb(points['Date'].view('i8'), points['Close'], count)]
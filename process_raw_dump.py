@@ -1,8 +1,16 @@
 import pandas as pd
 import os
-import zipfile
-import glob
+import time
+import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import barstore
+import catalog
+import histdata
+import pyramid
+import telemetry
+import warehouse
 
 # --- CONFIG ---
 
@@ -10,68 +18,112 @@ SOURCE_ROOT = "/mnt/kgosi_view_data/projects/finance/data/raw_incoming/ASCII"
 
 DEST_DIR = "/mnt/kgosi_view_data/projects/finance/data"
 
-print(f"--- REFINERY STARTING ---")
-print(f"Hunting for ZIPs in: {SOURCE_ROOT}")
-
-# Recursive search for all .zip files
-zip_files = list(Path(SOURCE_ROOT).rglob("*.zip"))
-
-if not zip_files:
-    print("No ZIP files found! Check your rsync.")
-    exit()
-
-print(f"Found {len(zip_files)} raw files. Processing...")
-
-for zip_path in zip_files:
-    try:
-        filename = zip_path.name
-        
-        # HistData Format: HISTDATA_COM_ASCII_EURUSD_M12010.zip
-        if "HISTDATA" in filename:
-            # Extract Symbol
-            parts = filename.split('_')
-            
-            symbol = parts[3]
-            
-            print(f"   Processing {symbol} ({filename})...", end=" ")
-            
-            with zipfile.ZipFile(zip_path, 'r') as z:
-                # Find CSV inside
-                target = [f for f in z.namelist() if f.endswith(".csv") or f.endswith(".txt")][0]
-                
-                with z.open(target) as f:
-                    # Read messy format
-                    df = pd.read_csv(f, sep=';', header=None)
-                    df.columns = ['DateStr', 'Open', 'High', 'Low', 'Close', 'Vol']
-                    
-                    # Convert Date
-                    df['Date'] = pd.to_datetime(df['DateStr'], format='%Y%m%d %H%M%S')
-                    df = df[['Date', 'Open', 'High', 'Low', 'Close', 'Vol']]
-                    
-                    # Fix Timezone
-                    df['Date'] = df['Date'].dt.tz_localize(None)
-                    
-                 
-                    df.sort_values('Date', inplace=True)
-                    
-                    # APPEND OR CREATE
-                    final_csv = os.path.join(DEST_DIR, f"{symbol}_1M.csv")
-                    
-                    if os.path.exists(final_csv):
-                        # Merge mode
-                        existing = pd.read_csv(final_csv)
-                        existing['Date'] = pd.to_datetime(existing['Date'])
-                        combined = pd.concat([existing, df])
-                        combined.drop_duplicates(subset=['Date'], inplace=True)
-                        combined.sort_values('Date', inplace=True)
-                        combined.to_csv(final_csv, index=False)
-                    else:
-                        # Create mode
-                        df.to_csv(final_csv, index=False)
-                        
-            print("Done")
-            
-    except Exception as e:
-        print(f"\n Error on {filename}: {e}")
-
-print("\n--- REFINERY FINISHED ---")
+WORKERS = os.cpu_count() or 1
+
+
+def archive_symbol(zip_path):
+    # HistData Format: HISTDATA_COM_ASCII_EURUSD_M12010.zip
+    return Path(zip_path).name.split('_')[3]
+
+
+def parse_zip(zip_path):
+    """
+    Decompress and parse one HistData yearly archive.
+    Runs inside a pool worker. Returns: (symbol, DataFrame, seconds)
+    """
+    started = time.perf_counter()
+    symbol = archive_symbol(zip_path)
+
+    # Fixed-width timestamps are decoded with NumPy, not pd.to_datetime
+    df = histdata.read_histdata_zip(zip_path)
+
+    return symbol, df, time.perf_counter() - started
+
+
+def refine(source_root=SOURCE_ROOT, dest_dir=DEST_DIR, workers=WORKERS, coordinator=None):
+    print(f"--- REFINERY STARTING ---")
+    print(f"Hunting for ZIPs in: {source_root}")
+
+    # Recursive search for all HistData .zip files
+    zip_files = [p for p in Path(source_root).rglob("*.zip") if "HISTDATA" in p.name]
+
+    if not zip_files:
+        print("No ZIP files found! Check your rsync.")
+        return
+
+    if coordinator:
+        import cluster  # cluster runs this module's tasks; imported here to keep the import one-way
+        print(f"Found {len(zip_files)} raw files. Sending them to the cluster...")
+        return cluster.refine(coordinator, zip_files, dest_dir)
+
+    print(f"Found {len(zip_files)} raw files. Parsing on {workers} workers...")
+    started = time.perf_counter()
+    trace = telemetry.start('refine', source=str(source_root), workers=workers)
+    trace.size('zip', sum(p.stat().st_size for p in zip_files))
+    trace.phase('parse')
+
+    # symbol -> parsed yearly frames, written once per symbol at the end
+    parsed = {}
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(parse_zip, str(p)): p for p in zip_files}
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            filename = futures[future].name
+            try:
+                symbol, df, seconds = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"   [{done}/{len(zip_files)}] Error on {filename}: {e}")
+                continue
+
+            parsed.setdefault(symbol, []).append(df)
+            print(f"   [{done}/{len(zip_files)}] {symbol} {filename}: {len(df):,} rows in {seconds:.2f}s")
+
+    parse_seconds = time.perf_counter() - started
+    print(f"\nParsed in {parse_seconds:.1f}s. Writing {len(parsed)} symbols...")
+    trace.phase('store')
+
+    for symbol, frames in sorted(parsed.items()):
+        write_started = time.perf_counter()
+        print(f"   {symbol}...", end=" ")
+
+        # One ordered write per symbol: each year lands in its partition once
+        df = pd.concat(frames).sort_values('Date', kind='stable')
+        with trace.span('warehouse'):
+            years = warehouse.write_bars(symbol, df, root=dest_dir)
+
+        # Rebuild the pyramid only from the first year that changed
+        if years:
+            since = df.loc[df['Date'].dt.year == years[0], 'Date'].iloc[0]
+            with trace.span('pyramid'):
+                pyramid.build_pyramid(symbol, since=since, root=dest_dir)
+            with trace.span('barstore'):
+                barstore.export_all(symbol, root=dest_dir)
+
+        print(f"{len(df):,} rows, years {years or 'already covered'} in {time.perf_counter() - write_started:.1f}s")
+
+    # Symbols, ranges and content hashes for the app's dropdowns and cache keys
+    with trace.span('catalog'):
+        catalog.update(parsed, root=dest_dir)
+
+    trace.finish(files=len(zip_files), failed=failed, symbols=len(parsed),
+                 rows=sum(len(df) for frames in parsed.values() for df in frames))
+    print(f"\n--- REFINERY FINISHED in {time.perf_counter() - started:.1f}s ({failed} failed) ---")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View HistData refinery")
+    parser.add_argument('--source', default=SOURCE_ROOT)
+    parser.add_argument('--dest', default=DEST_DIR)
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Parser processes (default: all cores)")
+    parser.add_argument('--cluster', nargs='?', const=os.environ.get('KGOSI_COORDINATOR', '127.0.0.1:7077'),
+                        default=None, metavar='HOST:PORT', help="Run on the cluster's workers (see cluster.py)")
+    args = parser.parse_args()
+
+    refine(args.source, args.dest, max(1, args.workers), coordinator=args.cluster)
+
+
+if __name__ == "__main__":
+    main()
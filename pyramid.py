@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# pyramid.py — Kgosi_View Multi-Timeframe Bar Pyramid
+# ==============================================================================
+"""
+Materializes every chart timeframe from the 1M base at ingest time.
+
+Each level is stored in the warehouse next to the 1M data
+(warehouse/EURUSD/1H/2015.parquet, ...), so get_data() loads it directly
+instead of resampling the full history on every cache miss.
+
+When new 1M bars arrive, only the tail starting at the day of the earliest
+new bar is re-aggregated, replacing the stored bars it overlaps (the last
+bucket may have been built from a partial day).
+
+Backfill an existing warehouse with:
+    python pyramid.py build [--data-path PATH] [--symbols EURUSD GBPUSD]
+"""
+
+import argparse
+
+import pandas as pd
+
+import timeframes
+import warehouse
+
+# Stored chart timeframes (timeframes.py specs). Every bucket nests inside a
+# UTC day, so per-year and per-day-tail rebuilds produce the same bars as a full pass.
+TIMEFRAMES = ['5M', '15M', '1H', '4H', '1D']
+
+
+def resample(df, timeframe):
+    """Aggregate 1M bars (Date column) to any timeframe (see timeframes.py)"""
+    if df.empty:
+        return df
+    return pd.DataFrame(timeframes.resample(df.to_records(index=False), timeframe))
+
+
+def build_pyramid(symbol, since=None, root=None):
+    """
+    Rebuild all higher timeframes for a symbol.
+
+    since: earliest timestamp that changed in the 1M base. Only bars from the
+    start of that day onward are recomputed. None rebuilds everything.
+    Returns: dict of timeframe -> years written
+    """
+    cutoff = pd.Timestamp(since).floor('D') if since is not None else None
+    years = warehouse.list_years(symbol, root=root)
+    if cutoff is not None:
+        years = [y for y in years if y >= cutoff.year]
+
+    written = {tf: [] for tf in TIMEFRAMES}
+    for year in years:
+        start = pd.Timestamp(year, 1, 1)
+        if cutoff is not None:
+            start = max(start, cutoff)
+        end = pd.Timestamp(year + 1, 1, 1) - pd.Timedelta(1, 'ns')
+        base = warehouse.read_bars(symbol, start=start, end=end, root=root)
+        if base.empty:
+            continue
+        for tf in TIMEFRAMES:
+            written[tf] += warehouse.write_bars(symbol, resample(base, tf), timeframe=tf, root=root, replace=True)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View timeframe pyramid")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="Materialize every timeframe from the 1M warehouse")
+    build.add_argument('--data-path', default=warehouse.DATA_PATH)
+    build.add_argument('--symbols', nargs='*', default=None)
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        symbols = args.symbols or warehouse.list_symbols(args.data_path, include_legacy=False)
+        for symbol in symbols:
+            print(f"   Building {symbol}...", end=" ")
+            build_pyramid(symbol, root=args.data_path)
+            print("Done")
+
+
+if __name__ == "__main__":
+    main()
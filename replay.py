@@ -0,0 +1,273 @@
+# ==============================================================================
+# replay.py — Kgosi_View Chart Component (playback + incremental updates)
+# ==============================================================================
+"""
+Chart component that keeps one persistent Plotly figure per browser session.
+
+Frames: every rerun sends one of
+    full   the whole figure (first render, symbol/TF/overlay/line changes)
+    delta  bars to append/prepend and trim when the window slides, plus the
+           new price-line position; applied to the figure already on screen
+    none   nothing changed on the chart
+Frames carry a revision number; a delta also names the revision it applies
+on top of. If the browser holds a different revision (iframe reloaded, or it
+played ahead on its own) it asks for a full frame instead.
+
+Playback: instead of sleeping and re-running the whole script for every bar,
+the app ships the next few seconds of bars with the frame. The component
+(frontend/replay/index.html) appends them on its own timer with
+Plotly.extendTraces and reports its position when half of the window is used,
+which triggers one rerun to ship the next window while playback continues.
+
+Zoomed out past lod.PIXEL_BUDGET bars, the chart shows level-of-detail
+buckets (lod.py). Window changes then always send full frames, and playback
+advances one bucket per tick; the stream lists the cursor after each one.
+
+Reports from the browser also carry the last render latency and the mean
+per-bar frame time, which the app shows in the status bar next to the size
+of the serialized frame.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import streamlit.components.v1 as components
+
+import lod
+import telemetry
+
+FRONTEND_DIR = Path(__file__).parent / "frontend" / "replay"
+
+# Seconds of bars shipped per window; the app reruns about every half of this
+LOOKAHEAD_SECONDS = 4.0
+MIN_LOOKAHEAD = 20
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# float32 prices widened to float64 print as 0.9951800107955933; quotes have <= 6 decimals
+PRICE_DECIMALS = 6
+
+_component = components.declare_component("kgosi_replay", path=str(FRONTEND_DIR))
+
+
+def lookahead(speed_ms):
+    """Bars per window at the given playback speed"""
+    return max(MIN_LOOKAHEAD, int(LOOKAHEAD_SECONDS * 1000 / max(speed_ms, 1)))
+
+
+def price_text(price):
+    return f" {price:,.5f}" if price < 10 else f" {price:,.2f}"
+
+
+def bar_payload(df):
+    """OHLC columns of a window as JSON-ready lists"""
+    return {
+        'x': df['Date'].dt.strftime(DATE_FORMAT).tolist(),
+        'open': df['Open'].astype(float).round(PRICE_DECIMALS).tolist(),
+        'high': df['High'].astype(float).round(PRICE_DECIMALS).tolist(),
+        'low': df['Low'].astype(float).round(PRICE_DECIMALS).tolist(),
+        'close': df['Close'].astype(float).round(PRICE_DECIMALS).tolist(),
+    }
+
+
+def line_payload(df):
+    return {
+        'x': df['Date'].dt.strftime(DATE_FORMAT).tolist(),
+        'y': df['Close'].astype(float).round(PRICE_DECIMALS).tolist(),
+    }
+
+
+# Line traces after the candles are "line sources": callables that take an
+# array of main-bar rows and return that part of the trace as {x, y}.
+
+def overlay_line(bars, overlay, rows):
+    """Another symbol's closes at the main bars' dates; rows: its aligned row for every main bar"""
+    def payload(main_rows):
+        df = overlay.take(rows[main_rows])
+        # Past the overlay's last bar the row repeats; the main date keeps x moving with the candles
+        df['Date'] = pd.to_datetime(bars['Date'][main_rows])
+        return line_payload(df)
+    return payload
+
+
+def value_line(bars, values):
+    """An array aligned to the main bars (an indicator line); NaN becomes a gap"""
+    def payload(main_rows):
+        y = np.round(values[main_rows], PRICE_DECIMALS)
+        return {
+            'x': pd.to_datetime(bars['Date'][main_rows]).strftime(DATE_FORMAT).tolist(),
+            'y': [None if v != v else v for v in y.tolist()],
+        }
+    return payload
+
+
+# ========== FRAME PLANNING ==========
+
+class ChartSync:
+    """What the browser is showing, as far as the server knows"""
+
+    def __init__(self):
+        self.rev = 0
+        self.key = None
+        self.window = None       # (start, stop) bar range on screen
+        self.playing = False
+        self.stale = True
+        # Stats for the status bar
+        self.op = None
+        self.frame_bytes = 0
+        self.render_ms = None
+        self.frame_ms = None
+
+    def invalidate(self):
+        self.stale = True
+
+    def plan(self, key, window, playing, jumped):
+        """
+        Pick the frame type for this rerun.
+        jumped: the cursor moved by something other than the browser's own playback.
+        """
+        if self.stale or key != self.key:
+            op = 'full'
+        elif playing:
+            # The browser is ahead of us; only a user jump needs a redraw
+            op = 'full' if jumped or (not self.playing and window != self.window) else 'none'
+        elif self.playing:
+            # Just paused: we do not know exactly where the browser stopped
+            op = 'full'
+        elif window == self.window:
+            op = 'none'
+        elif max(window[0], self.window[0]) < min(window[1], self.window[1]):
+            op = 'delta'
+        else:
+            op = 'full'
+
+        self.key, self.playing, self.stale = key, playing, False
+        return op
+
+
+def window_delta(bars, lines, old, new):
+    """Edits that turn the on-screen window `old` into `new` (they overlap)"""
+    (s0, e0), (s1, e1) = old, new
+
+    def edit(make):
+        return {
+            'prepend': make(s1, s0) if s1 < s0 else None,
+            'append': make(e0, e1) if e1 > e0 else None,
+            'trim_start': max(0, s1 - s0),
+            'trim_end': max(0, e0 - e1),
+        }
+
+    traces = [edit(lambda a, b: bar_payload(bars.window(a, b)))]
+    for line in lines:
+        traces.append(edit(lambda a, b, f=line: f(np.arange(a, b))))
+
+    close = float(bars['Close'][e1 - 1])
+    first, last = bars.window(s1, s1 + 1)['Date'].iloc[0], bars.window(e1 - 1, e1)['Date'].iloc[0]
+    return {
+        'traces': traces,
+        'price': {'x0': first.strftime(DATE_FORMAT), 'x1': last.strftime(DATE_FORMAT), 'y': close, 'text': price_text(close)},
+    }
+
+
+def build_stream(bars, lines, cursor, zoom, speed_ms, playing, seq, level=0):
+    """
+    Playback window for the component.
+
+    bars: BarStore of the main series; lines: line sources in trace order
+    (overlay_line / value_line). Upcoming bars start at cursor + 1; at a level above 0 they
+    are buckets, and 'cursors' holds the bar index each one ends on.
+    """
+    stream = {
+        'seq': seq, 'base': int(cursor), 'playing': bool(playing),
+        'speed_ms': int(speed_ms), 'zoom': int(zoom),
+        'upcoming': None, 'overlays': [], 'end': cursor >= len(bars) - 1,
+    }
+    if level:
+        # Candles on screen, which the browser keeps constant while it plays
+        stream['zoom'] = len(lod.bounds(max(0, cursor - zoom), cursor + 1, level)) - 2
+    if not playing:
+        return stream
+
+    if level:
+        size = lod.LOD_FACTOR ** level
+        stop = min(len(bars), (-(-(cursor + 1) // size) + lookahead(speed_ms)) * size)
+        ends = lod.bounds(cursor + 1, stop, level)[1:] - 1
+        stream['upcoming'] = bar_payload(pd.DataFrame(lod.candles(bars, cursor + 1, stop, level)))
+        stream['cursors'] = ends.tolist()
+        stream['end'] = stop >= len(bars)
+        stream['overlays'] = [line(ends) for line in lines]
+        return stream
+
+    stop = min(len(bars), cursor + 1 + lookahead(speed_ms))
+    stream['upcoming'] = bar_payload(bars.window(cursor + 1, stop))
+    stream['end'] = stop >= len(bars)
+    stream['overlays'] = [line(np.arange(cursor + 1, stop)) for line in lines]
+    return stream
+
+
+def frame_info(sync):
+    """Status-bar readout: last frame's type and size, browser render / per-bar times"""
+    parts = [f"{sync.op.upper() if sync.op else '-'} {sync.frame_bytes / 1024:.1f} KB"]
+    if sync.render_ms is not None:
+        parts.append(f"RENDER {sync.render_ms:.1f} ms")
+    if sync.frame_ms is not None:
+        parts.append(f"TICK {sync.frame_ms:.1f} ms")
+    return " · ".join(parts)
+
+
+# ========== RENDER ==========
+
+def apply_report(sync, report):
+    """Fold a browser report into the sync state; returns the reported cursor (or None)"""
+    if report.get('need_full'):
+        sync.invalidate()
+    if report.get('render_ms') is not None:
+        sync.render_ms = report['render_ms']
+    if report.get('frame_ms') is not None:
+        sync.frame_ms = report['frame_ms']
+    return report.get('cursor')
+
+
+def replay_chart(sync, build_figure, bars, lines, key, cursor, zoom, speed_ms, playing, jumped, seq,
+                 level=0, config=None, component_key=None):
+    """
+    Send this rerun's frame to the browser.
+
+    build_figure: callable returning the full go.Figure; only called for full frames.
+    level: lod level the figure is drawn at (0 = one candle per bar).
+    Returns the component's last report:
+    {'seq', 'cursor', 'ended', 'need_full', 'render_ms', 'frame_ms'} or None.
+    """
+    window = (max(0, cursor - zoom), cursor + 1)
+    from_rev = sync.rev
+    op = sync.plan((key, level), window, playing, jumped)
+    if op == 'delta' and level:
+        # Bucket edges move with the window; redraw the (budget-sized) figure
+        op = 'full'
+
+    payload = {
+        'op': op,
+        'rev': from_rev,
+        'from_rev': from_rev,
+        'stream': build_stream(bars, lines, cursor, zoom, speed_ms, playing, seq, level),
+        'config': config or {},
+    }
+    if op != 'none':
+        sync.rev += 1
+        payload['rev'] = sync.rev
+    if op == 'full':
+        with telemetry.span('figure'):
+            payload['figure'] = build_figure().to_plotly_json()
+    elif op == 'delta':
+        payload['delta'] = window_delta(bars, lines, sync.window, window)
+    sync.window = window
+
+    # One JSON encode; the component parses the string itself
+    with telemetry.span('serialize'):
+        text = pio.to_json(payload, validate=False)
+    sync.op, sync.frame_bytes = op, len(text)
+    telemetry.size(f'frame_{op}', len(text))
+
+    return _component(payload=text, key=component_key, default=None)
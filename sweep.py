@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# sweep.py — Kgosi_View Parallel Parameter Sweeps
+# ==============================================================================
+"""
+Run one strategy over a parameter grid (or a random sample of it) on every core.
+
+Workers never receive bars: each one opens the symbol's memory-mapped bar store
+(barstore.open_store) once in its initializer, so every process reads the same
+page-cache pages and only parameter dicts and stats cross the process boundary.
+
+Combinations are sent in chunks and every finished chunk is appended to a JSONL
+checkpoint. Re-running the same command skips whatever the checkpoint already
+holds, so an interrupted sweep resumes where it stopped. With --cluster the
+chunks run on cluster.py workers on every node instead of this machine's cores.
+
+Run:
+    python sweep.py run --symbol EURUSD --timeframe 1H --strategy sma_cross \\
+        --grid fast=5:50:5 --grid slow=20,50,100,200 [--random 500 --seed 7] \\
+        [--sl 0.002] [--tp 0.004] [--rank sharpe] [--out results.csv] [--workers 8 | --cluster HOST:PORT]
+
+Grid values: "a,b,c" or "start:stop:step" (stop included).
+Checkpoints default to <DATA_PATH>/sweeps/<SYMBOL>_<TF>_<strategy>.jsonl.
+"""
+
+import os
+import json
+import time
+import argparse
+import itertools
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import barstore
+import warehouse
+from intrabar import IntrabarResolver
+
+SWEEP_DIR = "sweeps"
+WORKERS = os.cpu_count() or 1
+CHUNK_SIZE = 16        # combinations per task
+STATS = ['sharpe', 'max_drawdown', 'trades', 'net_pnl', 'return_pct', 'win_rate', 'ambiguous']
+
+
+# ========== GRID ==========
+
+def parse_values(spec):
+    """'5:50:5' -> [5, 10, ..., 50]; '20,50,100' -> [20, 50, 100]"""
+    if ':' in spec:
+        start, stop, step = (float(v) for v in spec.split(':'))
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = [float(v) for v in spec.split(',')]
+    return [int(v) if float(v).is_integer() else float(v) for v in values]
+
+
+def grid(space):
+    """{'fast': [5, 10], 'slow': [50]} -> [{'fast': 5, 'slow': 50}, {'fast': 10, 'slow': 50}]"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def sample(combos, count, seed=None):
+    """Random search: `count` distinct combinations of the grid"""
+    if count >= len(combos):
+        return combos
+    picks = np.random.default_rng(seed).choice(len(combos), size=count, replace=False)
+    return [combos[i] for i in sorted(picks)]
+
+
+def _key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+# ========== CHECKPOINTS ==========
+
+def checkpoint_path(symbol, timeframe, strategy, root=None):
+    return Path(root or warehouse.DATA_PATH) / SWEEP_DIR / f"{symbol.upper()}_{timeframe}_{strategy}.jsonl"
+
+
+def load_checkpoint(path, header):
+    """Finished rows of an earlier run of the same sweep (header must match)"""
+    if not path.exists():
+        return []
+    lines = []
+    for line in path.read_text().splitlines():
+        try:
+            lines.append(json.loads(line))
+        except json.JSONDecodeError:
+            # A line cut short by a crash; that chunk simply runs again
+            continue
+    if lines and lines[0].get('sweep') != header:
+        raise ValueError(f"{path} belongs to a different sweep ({lines[0].get('sweep')}); pass --checkpoint")
+    return [line for line in lines[1:] if 'params' in line]
+
+
+# ========== WORKERS ==========
+
+_worker = {}
+
+
+def _init_worker(symbol, timeframe, root, intrabar):
+    # Memory-mapped: every worker shares the same pages instead of a pickled copy
+    bars = barstore.open_store(symbol, timeframe, root=root)
+    _worker['bars'] = bars
+    _worker['intrabar'] = None
+    if intrabar and timeframe != warehouse.BASE_TIMEFRAME:
+        minutes = barstore.open_store(symbol, warehouse.BASE_TIMEFRAME, root=root)
+        _worker['intrabar'] = IntrabarResolver(bars, minutes)
+
+
+def _run_chunk(strategy, combos, sl, tp, cost):
+    bars, rows = _worker['bars'], []
+    for params in combos:
+        result = backtest.run(
+            bars, lambda b: backtest.STRATEGIES[strategy](b, **params),
+            sl=sl, tp=tp, cost=cost, intrabar=_worker['intrabar'],
+        )
+        rows.append({'params': params, 'stats': {k: result.stats[k] for k in STATS}})
+    return rows
+
+
+def _pool_chunks(symbol, timeframe, strategy, chunks, sl, tp, cost, intrabar, root, workers):
+    """Rows of each chunk as this machine's cores finish it"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(symbol, timeframe, root, intrabar)) as pool:
+        futures = [pool.submit(_run_chunk, strategy, chunk, sl, tp, cost) for chunk in chunks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+# ========== SWEEP ==========
+
+def run_sweep(symbol, timeframe, strategy, combos, sl=None, tp=None, cost=0.0, intrabar=False,
+              checkpoint=None, workers=WORKERS, root=None, rank='sharpe', coordinator=None):
+    """
+    Backtest every parameter combination; returns one row per combination
+    (parameters + STATS columns), best `rank` first.
+    coordinator: 'host:port' of a cluster.py coordinator to run the chunks on its workers.
+    """
+    header = {
+        'symbol': symbol.upper(), 'timeframe': timeframe, 'strategy': strategy,
+        'sl': sl, 'tp': tp, 'cost': cost, 'intrabar': intrabar,
+    }
+    checkpoint = Path(checkpoint) if checkpoint else checkpoint_path(symbol, timeframe, strategy, root)
+    done = load_checkpoint(checkpoint, header)
+    finished = {_key(row['params']) for row in done}
+    todo = [params for params in combos if _key(params) not in finished]
+
+    print(f"--- SWEEP {symbol} {timeframe} {strategy}: {len(combos)} combinations, "
+          f"{len(combos) - len(todo)} already in {checkpoint.name}, {len(todo)} to run on "
+          f"{'the cluster at ' + coordinator if coordinator else f'{workers} workers'} ---")
+
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    if not checkpoint.exists() or checkpoint.stat().st_size == 0:
+        checkpoint.write_text(json.dumps({'sweep': header}) + "\n")
+    elif not checkpoint.read_bytes().endswith(b"\n"):
+        with open(checkpoint, 'a') as log:
+            log.write("\n")
+
+    started = time.perf_counter()
+    chunks = [todo[i:i + CHUNK_SIZE] for i in range(0, len(todo), CHUNK_SIZE)]
+    if coordinator:
+        import cluster  # cluster runs this module's chunks; imported here to keep the import one-way
+        finished = cluster.map_chunks(coordinator, symbol, timeframe, strategy, chunks, sl, tp, cost, intrabar, root)
+    else:
+        finished = _pool_chunks(symbol, timeframe, strategy, chunks, sl, tp, cost, intrabar, root, workers)
+    completed = 0
+    with open(checkpoint, 'a') as log:
+        for rows in finished:
+            # One line per combination, flushed per chunk: a crash loses at most the chunks in flight
+            log.writelines(json.dumps(row) + "\n" for row in rows)
+            log.flush()
+            done.extend(rows)
+            completed += len(rows)
+            elapsed = time.perf_counter() - started
+            print(f"   [{completed}/{len(todo)}] {completed / elapsed:.1f} combinations/s")
+
+    wanted = {_key(params) for params in combos}
+    table = pd.DataFrame([{**row['params'], **row['stats']} for row in done if _key(row['params']) in wanted])
+    if table.empty:
+        return table
+    return table.sort_values(rank, ascending=False, kind='stable').reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View parallel parameter sweep")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sw = sub.add_parser('run', help="Backtest a parameter grid on all cores")
+    sw.add_argument('--symbol', default='EURUSD')
+    sw.add_argument('--timeframe', default='1H')
+    sw.add_argument('--strategy', choices=sorted(backtest.STRATEGIES), default='sma_cross')
+    sw.add_argument('--grid', action='append', required=True, help="Parameter values, e.g. fast=5:50:5 or slow=20,50")
+    sw.add_argument('--random', type=int, default=None, help="Run this many random combinations of the grid")
+    sw.add_argument('--seed', type=int, default=None)
+    sw.add_argument('--sl', type=float, default=None)
+    sw.add_argument('--tp', type=float, default=None)
+    sw.add_argument('--cost', type=float, default=0.0)
+    sw.add_argument('--intrabar', action='store_true')
+    sw.add_argument('--rank', choices=STATS, default='sharpe')
+    sw.add_argument('--checkpoint', default=None)
+    sw.add_argument('--out', default=None, help="Write the ranked table to this CSV")
+    sw.add_argument('--top', type=int, default=20)
+    sw.add_argument('--workers', type=int, default=WORKERS)
+    sw.add_argument('--data-path', default=warehouse.DATA_PATH)
+    sw.add_argument('--cluster', nargs='?', const=os.environ.get('KGOSI_COORDINATOR', '127.0.0.1:7077'),
+                    default=None, metavar='HOST:PORT', help="Run the chunks on the cluster's workers (see cluster.py)")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        space = {}
+        for item in args.grid:
+            name, spec = item.split('=', 1)
+            space[name] = parse_values(spec)
+        combos = grid(space)
+        if args.random:
+            combos = sample(combos, args.random, args.seed)
+
+        table = run_sweep(
+            args.symbol, args.timeframe, args.strategy, combos,
+            sl=args.sl, tp=args.tp, cost=args.cost, intrabar=args.intrabar,
+            checkpoint=args.checkpoint, workers=max(1, args.workers), root=args.data_path, rank=args.rank,
+            coordinator=args.cluster,
+        )
+        if args.out:
+            table.to_csv(args.out, index=False)
+        print(table.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# telemetry.py — Kgosi_View Phase Timing & Profiling
+# ==============================================================================
+"""
+Where the time goes, per app rerun and per refinery/harvester run.
+
+A Trace collects the durations of named phases, cache hits/misses and
+payload sizes of one unit of work. Phases are either sequential marks (each
+phase() ends the previous one, for top-to-bottom scripts like app.py) or
+spans around a block; spans may nest inside a phase. finish() writes it as one line of a
+size-rotated JSONL log and folds it into the process-wide METRICS registry,
+which serve_metrics() exposes as Prometheus text on a local port.
+
+    trace = telemetry.start('rerun', symbol='EURUSD')
+    telemetry.phase('load')
+    ...
+    telemetry.phase('chart')
+    with telemetry.span('figure'):
+        ...
+    telemetry.size('frame', len(text))
+    trace.finish()
+
+The current trace lives in a context variable, so code below the caller uses
+the module-level phase() / span() / size() / lookup() / miss() and does
+nothing when no trace is running. Streamlit runs every session's script in its own thread, which
+keeps sessions apart.
+
+Profiler captures one unit of work with pyinstrument when it is installed,
+else with cProfile.
+
+Environment:
+    KGOSI_TELEMETRY_LOG    JSONL log path (default logs/telemetry.jsonl; empty = off)
+    KGOSI_PROFILE_DIR      where profiles captured from the app are saved (default logs/profiles)
+    KGOSI_METRICS_PORT     serve /metrics on 127.0.0.1:<port> from the app
+
+Run:
+    python telemetry.py summary [--log PATH] [--trace rerun] [--last 500]
+"""
+
+import io
+import os
+import json
+import time
+import pstats
+import logging
+import argparse
+import cProfile
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+LOG_PATH = os.environ.get('KGOSI_TELEMETRY_LOG', 'logs/telemetry.jsonl')
+LOG_BYTES = 10 * 1024 * 1024     # rotate at 10 MB ...
+LOG_BACKUPS = 5                  # ... keeping 5 old files
+PROFILE_DIR = os.environ.get('KGOSI_PROFILE_DIR', 'logs/profiles')
+METRICS_PORT = os.environ.get('KGOSI_METRICS_PORT')
+
+# Histogram buckets (seconds) for phase durations
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current = contextvars.ContextVar('kgosi_trace', default=None)
+_lookup = contextvars.ContextVar('kgosi_lookup', default=None)
+
+
+# ========== METRICS ==========
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class Metrics:
+    """Process-wide counters fed by finished traces"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}      # (trace, phase) -> [bucket counts..., sum, count]
+        self.caches = {}      # (cache, 'hit' | 'miss') -> count
+        self.payloads = {}    # payload -> [bytes, count]
+
+    def observe(self, trace, phase, seconds):
+        with self.lock:
+            entry = self.phases.setdefault((trace, phase), [0] * len(BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry[i] += 1
+            entry[-2] += seconds
+            entry[-1] += 1
+
+    def cache(self, name, hit, count=1):
+        key = (name, 'hit' if hit else 'miss')
+        with self.lock:
+            self.caches[key] = self.caches.get(key, 0) + count
+
+    def payload(self, name, nbytes):
+        with self.lock:
+            entry = self.payloads.setdefault(name, [0, 0])
+            entry[0] += nbytes
+            entry[1] += 1
+
+    def render(self):
+        """Prometheus text exposition format"""
+        out = [
+            "# HELP kgosi_phase_seconds Duration of a traced phase",
+            "# TYPE kgosi_phase_seconds histogram",
+        ]
+        with self.lock:
+            for (trace, phase), entry in sorted(self.phases.items()):
+                for bound, count in zip(BUCKETS, entry):
+                    out.append(f"kgosi_phase_seconds_bucket{_labels(trace=trace, phase=phase, le=bound)} {count}")
+                out.append(f"kgosi_phase_seconds_bucket{_labels(trace=trace, phase=phase, le='+Inf')} {entry[-1]}")
+                out.append(f"kgosi_phase_seconds_sum{_labels(trace=trace, phase=phase)} {entry[-2]:.6f}")
+                out.append(f"kgosi_phase_seconds_count{_labels(trace=trace, phase=phase)} {entry[-1]}")
+
+            out += ["# HELP kgosi_cache_requests_total Cache lookups by result",
+                    "# TYPE kgosi_cache_requests_total counter"]
+            for (name, result), count in sorted(self.caches.items()):
+                out.append(f"kgosi_cache_requests_total{_labels(cache=name, result=result)} {count}")
+
+            out += ["# HELP kgosi_payload_bytes_total Bytes produced per payload kind",
+                    "# TYPE kgosi_payload_bytes_total counter"]
+            for name, (nbytes, _) in sorted(self.payloads.items()):
+                out.append(f"kgosi_payload_bytes_total{_labels(payload=name)} {nbytes}")
+            out += ["# HELP kgosi_payloads_total Payloads produced per kind",
+                    "# TYPE kgosi_payloads_total counter"]
+            for name, (_, count) in sorted(self.payloads.items()):
+                out.append(f"kgosi_payloads_total{_labels(payload=name)} {count}")
+        return "\n".join(out) + "\n"
+
+
+METRICS = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = METRICS.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host='127.0.0.1'):
+    """Serve METRICS on http://host:port/metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='kgosi-metrics', daemon=True).start()
+    return server
+
+
+# ========== LOG ==========
+
+_log_lock = threading.Lock()
+_loggers = {}
+
+
+def _logger(path):
+    """JSONL writer for path, or None when logging is off or the file cannot be opened"""
+    if not path:
+        return None
+    with _log_lock:
+        if path not in _loggers:
+            logger = logging.getLogger(f"kgosi_view.telemetry.{path}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS)
+            except OSError as e:
+                # Telemetry must never take the app down
+                logging.getLogger(__name__).warning(f"Telemetry log disabled: {e}")
+                logger = None
+            else:
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+            _loggers[path] = logger
+        return _loggers[path]
+
+
+# ========== TRACES ==========
+
+class Trace:
+    """Phase durations, cache results and payload sizes of one unit of work"""
+
+    def __init__(self, name, log_path=LOG_PATH, **fields):
+        self.name = name
+        self.log_path = log_path
+        self.fields = fields
+        self.phases = {}     # phase -> ms (a repeated phase adds up)
+        self.caches = {}     # cache -> {'hit': n, 'miss': n}
+        self.sizes = {}      # payload -> bytes
+        self.started = time.perf_counter()
+        self.open = None     # (phase, started) of the running phase() mark
+        self.record = None
+
+    def _add(self, phase, started):
+        self.phases[phase] = self.phases.get(phase, 0.0) + (time.perf_counter() - started) * 1e3
+
+    def phase(self, name=None):
+        """End the running phase mark and start `name` (None: just end it)"""
+        if self.open is not None:
+            self._add(*self.open)
+        self.open = (name, time.perf_counter()) if name else None
+
+    @contextmanager
+    def span(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(phase, started)
+
+    def cache(self, name, hit):
+        counts = self.caches.setdefault(name, {'hit': 0, 'miss': 0})
+        counts['hit' if hit else 'miss'] += 1
+
+    def size(self, name, nbytes):
+        self.sizes[name] = self.sizes.get(name, 0) + int(nbytes)
+
+    def finish(self, **fields):
+        """Log and count this trace once; returns its record"""
+        if self.record is not None:
+            return self.record
+        self.phase(None)
+        total = (time.perf_counter() - self.started) * 1e3
+        self.record = {
+            'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'trace': self.name,
+            'pid': os.getpid(),
+            **self.fields, **fields,
+            'total_ms': round(total, 3),
+            'phases': {k: round(v, 3) for k, v in self.phases.items()},
+            'cache': self.caches,
+            'bytes': self.sizes,
+        }
+
+        METRICS.observe(self.name, 'total', total / 1e3)
+        for phase, ms in self.phases.items():
+            METRICS.observe(self.name, phase, ms / 1e3)
+        for name, counts in self.caches.items():
+            for result, count in counts.items():
+                METRICS.cache(name, result == 'hit', count)
+        for name, nbytes in self.sizes.items():
+            METRICS.payload(name, nbytes)
+
+        logger = _logger(self.log_path)
+        if logger is not None:
+            logger.info(json.dumps(self.record, default=str))
+        if _current.get() is self:
+            _current.set(None)
+        return self.record
+
+
+def start(name, **fields):
+    """New trace, current for this thread/context until finished"""
+    trace = Trace(name, **fields)
+    _current.set(trace)
+    return trace
+
+
+def current():
+    return _current.get()
+
+
+def phase(name):
+    """Start a sequential phase of the current trace (no-op without one)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.phase(name)
+
+
+def span(phase):
+    """Time a block of the current trace (no-op without one)"""
+    trace = _current.get()
+    return trace.span(phase) if trace is not None else nullcontext()
+
+
+def size(name, nbytes):
+    """Add a payload size to the current trace (no-op without one)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.size(name, nbytes)
+
+
+@contextmanager
+def lookup(cache):
+    """
+    A cached call: counts a hit for `cache` on the current trace unless the
+    loader calls miss() inside. Lets st.cache_resource bodies report misses.
+    """
+    token = _lookup.set([False])
+    try:
+        yield
+    finally:
+        missed = _lookup.get()[0]
+        _lookup.reset(token)
+        trace = _current.get()
+        if trace is not None:
+            trace.cache(cache, not missed)
+
+
+def miss():
+    state = _lookup.get()
+    if state is not None:
+        state[0] = True
+
+
+# ========== PROFILING ==========
+
+class Profiler:
+    """One capture with pyinstrument (HTML) if installed, else cProfile (text + .prof)"""
+
+    def __init__(self):
+        try:
+            import pyinstrument
+        except ImportError:
+            self.kind, self.profiler = 'cprofile', cProfile.Profile()
+        else:
+            self.kind, self.profiler = 'pyinstrument', pyinstrument.Profiler()
+
+    def start(self):
+        if self.kind == 'pyinstrument':
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self, folder=None, name='profile'):
+        """Returns (report text, saved file or None); the report is HTML for pyinstrument"""
+        if self.kind == 'pyinstrument':
+            self.profiler.stop()
+            report = self.profiler.output_html()
+            return report, self._save(folder, name, 'html', lambda path: path.write_text(report))
+
+        self.profiler.disable()
+        text = io.StringIO()
+        pstats.Stats(self.profiler, stream=text).sort_stats('cumulative').print_stats(40)
+        # .prof files open in snakeviz / pstats
+        return text.getvalue(), self._save(folder, name, 'prof', self.profiler.dump_stats)
+
+    @staticmethod
+    def _save(folder, name, suffix, write):
+        if not folder:
+            return None
+        path = Path(folder) / f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{suffix}"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write(path)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Profile not saved: {e}")
+            return None
+        return path
+
+
+# ========== CLI ==========
+
+def read_log(path, trace=None, last=None):
+    """Records of a telemetry log and its rotated backups, oldest first"""
+    files = [Path(f"{path}.{i}") for i in range(LOG_BACKUPS, 0, -1)] + [Path(path)]
+    records = []
+    for file in files:
+        if not file.exists():
+            continue
+        for line in file.read_text().splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if trace is None or record.get('trace') == trace:
+                records.append(record)
+    return records[-last:] if last else records
+
+
+def summarize(records):
+    """Per-phase count / p50 / p95 / max (ms), cache hit rates and mean payload sizes"""
+    phases, caches, sizes = {}, {}, {}
+    for record in records:
+        phases.setdefault('total', []).append(record['total_ms'])
+        for phase, ms in record.get('phases', {}).items():
+            phases.setdefault(phase, []).append(ms)
+        for name, counts in record.get('cache', {}).items():
+            totals = caches.setdefault(name, {'hit': 0, 'miss': 0})
+            for result in totals:
+                totals[result] += counts.get(result, 0)
+        for name, nbytes in record.get('bytes', {}).items():
+            sizes.setdefault(name, []).append(nbytes)
+
+    return {
+        'phases': {
+            phase: {'n': len(ms), 'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)),
+                    'max_ms': float(max(ms))}
+            for phase, ms in phases.items()
+        },
+        'cache': {
+            name: {**counts, 'hit_rate': counts['hit'] / max(1, counts['hit'] + counts['miss'])}
+            for name, counts in caches.items()
+        },
+        'bytes': {name: {'n': len(v), 'mean': float(np.mean(v)), 'max': int(max(v))} for name, v in sizes.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View telemetry")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sm = sub.add_parser('summary', help="Phase latency percentiles, cache hit rates and payload sizes from the log")
+    sm.add_argument('--log', default=LOG_PATH or 'logs/telemetry.jsonl')
+    sm.add_argument('--trace', default=None, help="Only this trace name (rerun, refine, harvest, ...)")
+    sm.add_argument('--last', type=int, default=None, help="Only the last N records")
+
+    args = parser.parse_args()
+    if args.command == 'summary':
+        records = read_log(args.log, args.trace, args.last)
+        if not records:
+            print(f"No records in {args.log}")
+            return
+        report = summarize(records)
+        print(f"--- {len(records)} records from {args.log} ---")
+        print(f"   {'phase':<16} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+        for phase, row in sorted(report['phases'].items(), key=lambda item: -item[1]['p50_ms']):
+            print(f"   {phase:<16} {row['n']:>6} {row['p50_ms']:>10.2f} {row['p95_ms']:>10.2f} {row['max_ms']:>10.2f}")
+        for name, row in sorted(report['cache'].items()):
+            print(f"   cache {name:<10} {row['hit']} hits / {row['miss']} misses ({row['hit_rate']:.0%})")
+        for name, row in sorted(report['bytes'].items()):
+            print(f"   bytes {name:<10} mean {row['mean'] / 1024:.1f} KB, max {row['max'] / 1024:.1f} KB over {row['n']}")
+
+
+if __name__ == "__main__":
+    main()
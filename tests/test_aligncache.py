@@ -0,0 +1,33 @@
+import time
+
+import numpy as np
+
+import aligncache
+import barstore
+
+
+def store(rows, step):
+    bars = np.zeros(rows, dtype=barstore.BAR_DTYPE)
+    bars['Date'] = np.datetime64('2020-01-01', 'ns') + np.arange(rows) * np.timedelta64(step, 'h')
+    return barstore.BarStore(bars)
+
+
+def built(alignment):
+    deadline = time.monotonic() + 5
+    while not isinstance(alignment.rows, np.memmap):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_new_version_keeps_shifted_timeframe_files(tmp_path):
+    cache = aligncache.AlignCache(tmp_path)
+    main, overlay = store(100, 24), store(300, 8)
+    built(cache.get('EURUSD', 'GBPUSD', '1D-2H', main, overlay, 'a', 'b'))
+    built(cache.get('EURUSD', 'GBPUSD', '1D', main, overlay, 'a', 'b'))
+    shifted = sorted(p.name for p in tmp_path.glob('EURUSD-GBPUSD-1D-2H-*.npy'))
+    assert len(shifted) == 1
+
+    # A re-export replaces the 1D file and leaves the shifted timeframe's alone
+    built(cache.get('EURUSD', 'GBPUSD', '1D', main, overlay, 'a', 'c'))
+    assert sorted(p.name for p in tmp_path.glob('EURUSD-GBPUSD-1D-2H-*.npy')) == shifted
+    assert len(list(tmp_path.glob('*.npy'))) == 2
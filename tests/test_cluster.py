@@ -0,0 +1,93 @@
+import time
+import threading
+
+import pytest
+
+import cluster
+
+
+def test_expired_attempt_is_fenced():
+    queue = cluster.TaskQueue(max_attempts=3, lease=0.05)
+    job, (task_id,) = queue.submit([{'kind': 'ingest', 'args': {}}])
+    first = queue.take('a')
+    assert first['attempt'] == 1
+    assert queue.heartbeat('a', task_id, 1)
+
+    # The lease runs out: the late worker can neither renew nor report it
+    time.sleep(0.1)
+    assert not queue.heartbeat('a', task_id, 1)
+    assert not queue.done('a', task_id, 1, {'rows': 1})
+    assert not queue.fail('a', task_id, 1, "late")
+
+    queue.tasks[task_id]['not_before'] = 0.0
+    second = queue.take('b')
+    assert second['id'] == task_id and second['attempt'] == 2
+    # The first attempt's worker cannot report over the retry, even under the new name
+    assert not queue.done('a', task_id, 1, {'rows': 1})
+    assert not queue.done('b', task_id, 1, {'rows': 1})
+    assert queue.done('b', task_id, 2, {'rows': 2})
+
+    (result,) = queue.results(job)['results']
+    assert result['status'] == 'done' and result['result'] == {'rows': 2} and result['worker'] == 'b'
+
+
+def test_fail_rejects_other_attempts():
+    queue = cluster.TaskQueue(max_attempts=2, lease=60)
+    job, (task_id,) = queue.submit([{'kind': 'ingest', 'args': {}}])
+    queue.take('a')
+    assert not queue.fail('a', task_id, 2, "wrong attempt")
+    assert queue.fail('a', task_id, 1, "boom")
+    assert queue.tasks[task_id]['status'] == 'queued'
+    assert not queue.done('a', task_id, 1, None)
+
+
+def test_worker_stops_when_heartbeat_is_refused(monkeypatch):
+    monkeypatch.setattr(cluster, 'TOKEN', 'test-token')
+    server = cluster.Coordinator('127.0.0.1:0', lease=0.3)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    address = f"127.0.0.1:{server.server_address[1]}"
+    try:
+        server.queue.submit([{'kind': 'ingest', 'args': {}}])
+        taken = time.monotonic()
+        task = server.queue.take('a')
+
+        exited = threading.Event()
+        monkeypatch.setattr(cluster.os, '_exit', lambda status: exited.set())
+        stop = threading.Event()
+        beat = threading.Thread(target=cluster._heartbeat, args=(address, 'a', task, 0.3, taken, stop), daemon=True)
+        beat.start()
+        # Renewed while the coordinator still holds the lease for this attempt
+        assert not exited.wait(0.5)
+        # The task went to another attempt: the next heartbeat is refused and the worker stops
+        server.queue.tasks[task['id']]['attempts'] += 1
+        assert exited.wait(1.0)
+        stop.set()
+        beat.join(1.0)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_requests_need_the_token(monkeypatch):
+    monkeypatch.setattr(cluster, 'TOKEN', '')
+    with pytest.raises(ValueError):
+        cluster.Coordinator('127.0.0.1:0')
+
+    server = cluster.Coordinator('127.0.0.1:0', token='test-token')
+    assert server.server_address[0] == '127.0.0.1'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    address = f"127.0.0.1:{server.server_address[1]}"
+    try:
+        for token in ('', 'wrong-token'):
+            with pytest.raises(RuntimeError, match="token"):
+                cluster.Client(address, token=token).submit([{'kind': 'ingest', 'args': {}}])
+        assert not server.queue.tasks
+        job, ids = cluster.Client(address, token='test-token').submit([{'kind': 'ingest', 'args': {}}])
+        assert ids == [1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_default_bind_is_local():
+    assert cluster.parse_address(':7077') == ('127.0.0.1', 7077)
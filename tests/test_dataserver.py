@@ -0,0 +1,84 @@
+import time
+import threading
+
+import numpy as np
+import pytest
+
+import barstore
+import dataserver
+
+
+def export(root, symbol, timeframe, rows):
+    path = barstore.store_path(symbol, timeframe, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bars = np.zeros(rows, dtype=barstore.BAR_DTYPE)
+    bars['Date'] = np.datetime64('2020-01-01', 'ns') + np.arange(rows) * np.timedelta64(1, 'h')
+    bars['Close'] = np.arange(rows)
+    np.save(path, bars)
+    return bars
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = dataserver.DataServer(str(tmp_path / "data.sock"), root=tmp_path / "data")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_cold_load_does_not_block_other_series(tmp_path):
+    export(tmp_path, 'EURUSD', '1H', 1000)
+    export(tmp_path, 'EURUSD', '4H', 250)
+    cache = dataserver.SeriesCache(64 * 1024 * 1024, root=tmp_path)
+    cache.get('EURUSD', '4H')
+
+    # Hold the 1H load until released
+    started, release = threading.Event(), threading.Event()
+    load = cache._load
+
+    def slow_load(key, version):
+        if key[1] == '1H':
+            started.set()
+            assert release.wait(10)
+        return load(key, version)
+
+    cache._load = slow_load
+    loads = []
+    first = threading.Thread(target=lambda: loads.append(cache.get('EURUSD', '1H')))
+    first.start()
+    assert started.wait(5)
+    try:
+        began = time.perf_counter()
+        assert cache.get('EURUSD', '4H')['rows'] == 250
+        assert cache.stats()['hits'] == 1
+        assert time.perf_counter() - began < 1.0
+
+        # A second request for the series being loaded waits for that load
+        second = threading.Thread(target=lambda: loads.append(cache.get('EURUSD', '1H')))
+        second.start()
+        time.sleep(0.2)
+        assert second.is_alive()
+    finally:
+        release.set()
+    first.join(5)
+    second.join(5)
+    assert loads[0] is loads[1]
+    assert cache.stats()['misses'] == 2
+    cache.close()
+
+
+def test_client_forgets_evicted_blocks(tmp_path, server):
+    bars = export(tmp_path / "data", 'EURUSD', '1H', 1000)
+    export(tmp_path / "data", 'GBPUSD', '1H', 1000)
+    # Room for one series at a time
+    server.cache.max_bytes = bars.nbytes
+    client = dataserver.DataClient(server.server_address)
+
+    eurusd = client.get('EURUSD', '1H')
+    assert np.array_equal(eurusd['Close'], bars['Close'])
+    client.get('GBPUSD', '1H')
+    assert server.cache.evictions == 1
+    # The evicted EURUSD block is no longer held by the client; the session's own reference still reads
+    assert list(client.stores) == [('GBPUSD', '1H')]
+    assert np.array_equal(eurusd['Close'], bars['Close'])
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+import histdata
+import warehouse
+from benchmarks.bench_suite import synthetic_csv
+
+
+def test_have_year_needs_the_last_trading_minute():
+    pytest.importorskip('cloudscraper')
+    pytest.importorskip('bs4')
+    import harvester_pipeline
+
+    def manifest(last, **extra):
+        return {'1M': {'2019': {'first': '2019-01-01T17:00:00', 'last': last, **extra}}}
+
+    # 2019-12-31 was a Tuesday; data stopping on Dec 27 is not the whole year
+    assert harvester_pipeline.last_trading_minute(2019) == pd.Timestamp('2019-12-31 16:59')
+    assert not harvester_pipeline.have_year(manifest('2019-12-27T16:59:00'), 2019)
+    assert harvester_pipeline.have_year(manifest('2019-12-31T16:59:00'), 2019)
+    assert harvester_pipeline.have_year(manifest('2019-12-31T13:00:00', complete=True), 2019)
+    # 2022-12-31 was a Saturday: the year ends on Friday the 30th
+    assert harvester_pipeline.last_trading_minute(2022) == pd.Timestamp('2022-12-30 16:59')
+
+
+def test_complete_flag_survives_rewrites(tmp_path):
+    raw = synthetic_csv(2019, 5_000, 1.1, seed=4)
+    df = histdata.read_histdata_csv(raw)
+    root = tmp_path / "data"
+    warehouse.write_bars('EURUSD', df.iloc[:3000], root=root)
+    assert warehouse.mark_complete('EURUSD', [2019, 2020], root=root) == [2019]
+    warehouse.write_bars('EURUSD', df.iloc[3000:], root=root)
+    entry = warehouse.load_manifest('EURUSD', root)['1M']['2019']
+    assert entry['complete'] and entry['rows'] == len(df)
@@ -0,0 +1,60 @@
+import urllib.request
+
+import numpy as np
+import pytest
+
+import histdata
+import warehouse
+from benchmarks import histdata_standin
+from benchmarks.bench_suite import synthetic_csv
+
+PAGE = "/download-free-forex-historical-data/?/ascii/1-minute-bar-quotes"
+
+
+@pytest.fixture(params=[False, True], ids=['sizes-in-header', 'data-descriptors'])
+def standin(request, tmp_path):
+    raw = synthetic_csv(2019, 20_000, 1.1, seed=3)
+    histdata_standin.write_archive(tmp_path / "zips", 'EURUSD', 2019, raw, descriptors=request.param)
+    server = histdata_standin.serve(tmp_path / "zips")
+    yield server, raw
+    server.shutdown()
+
+
+def assert_same_bars(symbol, raw, root):
+    expected = histdata.read_histdata_csv(raw)
+    stored = warehouse.read_bars(symbol, root=root, exact=True)
+    assert np.array_equal(stored['Date'].to_numpy(), expected['Date'].to_numpy())
+    for column in ('Open', 'High', 'Low', 'Close', 'Volume'):
+        np.testing.assert_array_equal(stored[column].to_numpy(), expected[column].to_numpy())
+
+
+def test_standin_stream_into_warehouse(standin, tmp_path):
+    server, raw = standin
+    form = f"tk={histdata_standin.TOKEN}&fxpair=EURUSD&date=2019".encode()
+    with urllib.request.urlopen(server.url + PAGE, data=form) as response:
+        assert response.headers['Content-Type'] == 'application/zip'
+        chunks = iter(lambda: response.read(4096), b'')
+        years = warehouse.write_bar_stream('EURUSD', histdata.iter_histdata_frames(chunks), root=tmp_path / "data")
+    assert years == [2019]
+    assert_same_bars('EURUSD', raw, tmp_path / "data")
+
+
+def test_harvester_download_against_standin(standin, tmp_path, monkeypatch):
+    pytest.importorskip('cloudscraper')
+    pytest.importorskip('bs4')
+    import harvester_pipeline
+
+    server, raw = standin
+    monkeypatch.setattr(harvester_pipeline, 'HISTDATA_URL', server.url)
+    monkeypatch.setattr(harvester_pipeline, 'FINAL_DIR', tmp_path / "data")
+    monkeypatch.setattr(harvester_pipeline.BrowserSession, 'human_delay', lambda self, *args: None)
+    monkeypatch.setattr(harvester_pipeline.BrowserSession, '_warm_up', lambda self: None)
+
+    browser = harvester_pipeline.BrowserSession()
+    response = harvester_pipeline.download_histdata_year(browser, 'eurusd', 2019)
+    assert response is not None
+    assert harvester_pipeline.ingest_download(response, 'eurusd', 2019)
+    assert_same_bars('EURUSD', raw, tmp_path / "data")
+
+    # No archive for that year on the stand-in: a clean failure, nothing written
+    assert harvester_pipeline.download_histdata_year(browser, 'eurusd', 2018) is None
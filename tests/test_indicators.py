@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+import barstore
+import indicators
+
+
+def make_bars(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, rows))
+    bars = np.zeros(rows, dtype=barstore.BAR_DTYPE)
+    bars['Date'] = np.datetime64('2020-01-01', 'ns') + np.arange(rows) * np.timedelta64(1, 'm')
+    bars['Open'] = close
+    bars['High'] = close + np.abs(rng.normal(0, 5e-5, rows))
+    bars['Low'] = close - np.abs(rng.normal(0, 5e-5, rows))
+    bars['Close'] = close
+    return bars
+
+
+@pytest.mark.parametrize('spec', indicators.PRESETS)
+def test_stream_matches_batch(spec):
+    bars = make_bars(600)
+    cache = indicators.IndicatorCache()
+    cache.get('EURUSD', '1M', spec, bars[:400])
+    # Grown series: the cache advances the updaters over the 200 new bars
+    streamed = cache.get('EURUSD', '1M', spec, bars)
+    batch = indicators.compute(bars, spec)
+    for name, line in batch.items():
+        np.testing.assert_allclose(streamed[name], line, rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+def test_cache_evicts_least_recently_used():
+    bars = make_bars(1000)
+    one_line = 1000 * 8
+    cache = indicators.IndicatorCache(max_bytes=2 * one_line)
+    cache.get('EURUSD', '1M', 'EMA 20', bars)
+    cache.get('EURUSD', '1M', 'SMA 50', bars)
+    cache.get('EURUSD', '1M', 'EMA 20', bars)       # now most recent
+    cache.get('EURUSD', '1M', 'RSI 14', bars)
+
+    assert list(cache.entries) == [('EURUSD', '1M', 'EMA 20'), ('EURUSD', '1M', 'RSI 14')]
+    assert cache.bytes == 2 * one_line
+    assert cache.evictions == 1
+
+    # An entry bigger than the budget is still served, alone
+    cache.get('EURUSD', '1M', 'BB 20 2', bars)
+    assert list(cache.entries) == [('EURUSD', '1M', 'BB 20 2')]
+    assert cache.bytes == 3 * one_line
+
+
+@pytest.mark.parametrize('spec', indicators.PRESETS)
+def test_cursor_stream_uses_the_bar_as_it_stands(spec):
+    bars = make_bars(600)
+    lines = indicators.compute(bars, spec)
+    cursor_stream = indicators.CursorStream(spec)
+    # Steps forward, a jump back and a jump ahead: complete bars read as the batch does
+    for cursor in [0, 1, 30, 31, 32, 250, 40, 599]:
+        at = cursor_stream.at(bars, lines, cursor)
+        for name, line in lines.items():
+            np.testing.assert_allclose(at[name], line[cursor], rtol=1e-9, atol=1e-12, equal_nan=True)
+
+    # The cursor bar halfway formed: the value of its partial OHLC, not of the completed bar
+    cursor = 300
+    partial = bars[cursor:cursor + 1].copy()
+    partial['Close'] = bars['Close'][cursor] + 5e-4
+    partial['High'] = partial['Close'] + 1e-5
+    at = cursor_stream.at(bars, lines, cursor, partial)
+    expected = indicators.compute(np.concatenate([bars[:cursor], partial]), spec)
+    for name, line in expected.items():
+        np.testing.assert_allclose(at[name], line[-1], rtol=1e-9, atol=1e-12)
+        assert at[name] != lines[name][cursor]
+    # Peeking at the forming bar leaves the updater before it
+    assert cursor_stream.stop == cursor
+    np.testing.assert_allclose(cursor_stream.at(bars, lines, cursor + 1)[name], lines[name][cursor + 1], rtol=1e-9)
+
+
+def test_cache_recomputes_corrected_export():
+    bars = make_bars(500)
+    cache = indicators.IndicatorCache()
+    cache.get('EURUSD', '1M', 'EMA 20', bars, 'v1')
+
+    # Same dates, corrected prices, new catalog version
+    corrected = bars.copy()
+    corrected['Close'][100:] += 1e-3
+    lines = cache.get('EURUSD', '1M', 'EMA 20', corrected, 'v2')
+    np.testing.assert_allclose(lines['EMA 20'], indicators.compute(corrected, 'EMA 20')['EMA 20'], equal_nan=True)
+
+    # A new version that only appended bars is still advanced, not recomputed
+    grown = np.concatenate([corrected, make_bars(600)[500:]])
+    grown['Date'][500:] = corrected['Date'][-1] + np.arange(1, 101) * np.timedelta64(1, 'm')
+    entry = cache.entries[('EURUSD', '1M', 'EMA 20')]
+    lines = cache.get('EURUSD', '1M', 'EMA 20', grown, 'v3')
+    assert cache.entries[('EURUSD', '1M', 'EMA 20')] is entry and entry.updater is not None
+    np.testing.assert_allclose(lines['EMA 20'], indicators.compute(grown, 'EMA 20')['EMA 20'], rtol=1e-9, equal_nan=True)
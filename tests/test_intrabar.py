@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import barstore
+import intrabar
+
+
+def store(dates, high, low, open_=None):
+    bars = np.zeros(len(dates), dtype=barstore.BAR_DTYPE)
+    bars['Date'] = dates
+    bars['High'], bars['Low'] = high, low
+    bars['Open'] = bars['Close'] = (bars['High'] + bars['Low']) / 2 if open_ is None else open_
+    return barstore.BarStore(bars)
+
+
+def test_exit_in_minutes_only_counts_minutes_after_the_entry():
+    start = np.datetime64('2020-01-01T00:00', 'ns')
+    minutes = store(
+        start + np.arange(6) * np.timedelta64(1, 'm'),
+        high=[1.10, 1.20, 1.01, 1.02, 1.06, 0.94],
+        low=[0.99, 0.99, 0.99, 0.98, 0.99, 0.90],
+    )
+    bars = store(start + np.arange(2) * np.timedelta64(3, 'm'), high=[1.2, 1.06], low=[0.98, 0.90])
+    resolver = intrabar.IntrabarResolver(bars, minutes)
+
+    # Entered at minute 1's close: minute 1's own high came before the entry
+    assert resolver.exit_in_minutes(2, 6, 1, sl=0.95, tp=1.05) == (4, 'TP', pytest.approx(1.05))
+    # Up to the replay minute only
+    assert resolver.exit_in_minutes(2, 4, 1, sl=0.95, tp=1.05) is None
+    # A minute that gapped through the stop fills at its open
+    assert resolver.exit_in_minutes(5, 6, 1, sl=0.95, tp=1.5) == (5, 'SL', pytest.approx(0.92))
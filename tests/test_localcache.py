@@ -0,0 +1,101 @@
+import json
+import time
+import threading
+
+import numpy as np
+
+import barstore
+import localcache
+
+
+def export(root, symbol, timeframe, rows):
+    path = barstore.store_path(symbol, timeframe, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bars = np.zeros(rows, dtype=barstore.BAR_DTYPE)
+    bars['Date'] = np.datetime64('2020-01-01', 'ns') + np.arange(rows) * np.timedelta64(1, 'h')
+    np.save(path, bars)
+    return path
+
+
+def test_copy_does_not_block_other_calls(tmp_path):
+    source = tmp_path / "share"
+    export(source, 'EURUSD', '1H', 1000)
+    export(source, 'EURUSD', '4H', 250)
+    cache = localcache.LocalCache(tmp_path / "local", source_root=source)
+
+    # Hold every copy of the 1H series until released
+    started, release = threading.Event(), threading.Event()
+    copy = cache._copy
+
+    def slow_copy(src, target):
+        if src.name == '1H.npy':
+            started.set()
+            assert release.wait(10)
+        return copy(src, target)
+
+    cache._copy = slow_copy
+    cache.prefetch('EURUSD', ['1H'])
+    assert started.wait(5)
+
+    try:
+        began = time.perf_counter()
+        stats = cache.stats()
+        cache.prefetch('EURUSD', ['1H', '4H'])
+        # Another series copies and is served while the 1H copy is stuck
+        path = cache.series('EURUSD', '4H')
+        assert time.perf_counter() - began < 1.0
+        assert path == tmp_path / "local" / barstore.STORE_DIR / "EURUSD" / "4H.npy"
+        assert stats['series'] == 0
+
+        # A request for the series being copied waits for that copy, then hits it
+        waiter = {}
+        thread = threading.Thread(target=lambda: waiter.update(path=cache.series('EURUSD', '1H')))
+        thread.start()
+        time.sleep(0.2)
+        assert thread.is_alive()
+    finally:
+        release.set()
+    thread.join(5)
+    assert waiter['path'] == tmp_path / "local" / barstore.STORE_DIR / "EURUSD" / "1H.npy"
+    assert np.array_equal(np.load(waiter['path']), np.load(barstore.store_path('EURUSD', '1H', source)))
+    assert cache.stats()['series'] == 2
+    assert cache.stats()['misses'] == 2
+
+
+def test_processes_share_the_index(tmp_path):
+    source = tmp_path / "share"
+    export(source, 'EURUSD', '1H', 1000)
+    export(source, 'EURUSD', '4H', 250)
+    # Two app processes on one node, each with its own LocalCache over the same directory
+    first = localcache.LocalCache(tmp_path / "local", source_root=source)
+    second = localcache.LocalCache(tmp_path / "local", source_root=source)
+
+    first.series('EURUSD', '1H')
+    second.series('EURUSD', '4H')
+    index = json.loads((tmp_path / "local" / localcache.INDEX_NAME).read_text())
+    assert sorted(index) == ['EURUSD/1H', 'EURUSD/4H']
+
+    # The series the other process copied is a hit, not a second copy
+    second.series('EURUSD', '1H')
+    assert second.stats()['hits'] == 1 and second.stats()['misses'] == 1
+    assert not list((tmp_path / "local").rglob('*.part')) and not list((tmp_path / "local").glob('*.tmp'))
+
+
+def test_hits_save_the_index_at_most_every_interval(tmp_path):
+    source = tmp_path / "share"
+    export(source, 'EURUSD', '1H', 100)
+    cache = localcache.LocalCache(tmp_path / "local", source_root=source)
+    cache.series('EURUSD', '1H')
+
+    saves = []
+    save = cache._save_index
+    cache._save_index = lambda: saves.append(save())
+    for _ in range(5):
+        cache.series('EURUSD', '1H')
+    assert saves == []
+
+    cache.saved -= localcache.USED_SAVE_SECONDS + 1
+    cache.series('EURUSD', '1H')
+    assert len(saves) == 1
+    index = json.loads((tmp_path / "local" / localcache.INDEX_NAME).read_text())
+    assert index['EURUSD/1H']['used'] == cache.index['EURUSD/1H']['used'] and not cache.used
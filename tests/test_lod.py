@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import barstore
+import lod
+import replay
+
+
+def store(rows, start='2020-01-01'):
+    bars = np.zeros(rows, dtype=barstore.BAR_DTYPE)
+    bars['Date'] = np.datetime64(start, 'ns') + np.arange(rows) * np.timedelta64(1, 'h')
+    bars['Close'] = 1.0 + np.arange(rows) * 1e-4
+    return barstore.BarStore(bars)
+
+
+@pytest.mark.parametrize('count', [500, 50])
+def test_overlay_is_drawn_at_the_main_dates(count):
+    main = store(300)
+    # The overlay ends 100 bars before the main series: its last row repeats from there on
+    overlay = store(200)
+    rows = overlay.index.align(main.index)
+
+    points = lod.line(main, overlay, rows, 0, 300, count)
+    assert np.all(np.diff(points['Date'].view('i8')) > 0)
+    assert np.isin(points['Date'], main['Date']).all()
+
+    payload = replay.overlay_line(main, overlay, rows)(np.arange(150, 300))
+    assert payload['x'] == replay.value_line(main, np.zeros(300))(np.arange(150, 300))['x']
+    assert payload['y'][-1] == round(float(overlay['Close'][-1]), replay.PRICE_DECIMALS)
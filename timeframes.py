@@ -0,0 +1,93 @@
+# ==============================================================================
+# timeframes.py — Kgosi_View Timeframe Engine
+# ==============================================================================
+"""
+OHLCV bars of any interval, aggregated from 1M bars with NumPy.
+
+A timeframe is written <count><unit>, optionally shifted by <+|-><count><unit>:
+
+    7M  2H  8H  1D  1W          minutes, hours, days, weeks (weeks open on Monday)
+    1D+22H                      days opening 22:00 UTC (the FX session day)
+    1W-2H                       weeks opening Sunday 22:00 UTC
+
+Buckets are [origin + k * step, origin + (k + 1) * step) with the origin at
+the Unix epoch (plus the shift), so the same bar always lands in the same
+bucket whatever window is aggregated. The boundaries inside a window are
+located with one searchsorted over the sorted 1M dates, and the buckets are
+reduced with lod.aggregate (np.maximum/minimum/add.reduceat), so only the
+requested rows are touched. Empty buckets (weekends, gaps) are dropped, and
+each bucket is labeled with its opening time, as pandas resample does.
+"""
+
+import re
+
+import numpy as np
+
+import lod
+
+UNITS = {
+    'M': np.timedelta64(1, 'm'),
+    'H': np.timedelta64(1, 'h'),
+    'D': np.timedelta64(1, 'D'),
+    'W': np.timedelta64(7, 'D'),
+}
+# 1970-01-01 was a Thursday; weekly buckets count from the following Monday
+WEEK_ORIGIN = np.timedelta64(4, 'D')
+
+# Offered next to the stored timeframes in the chart's TF menu (any other spec can be typed)
+PRESETS = ['2H', '8H', '1D+22H', '1W']
+
+_SPEC = re.compile(r'^(\d+)([MHDW])(?:([+-])(\d+)([MHD]))?$')
+
+
+def parse(timeframe):
+    """'8H' -> (step, origin) as int64 nanoseconds; ValueError for anything else"""
+    match = _SPEC.match(str(timeframe).strip().upper())
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(f"Unknown timeframe {timeframe!r} (expected e.g. 7M, 2H, 1D, 1W or 1D+22H)")
+    count, unit, sign, shift, shift_unit = match.groups()
+    step = int(count) * UNITS[unit]
+    origin = WEEK_ORIGIN if unit == 'W' else np.timedelta64(0, 'ns')
+    if sign:
+        origin = origin + (1 if sign == '+' else -1) * int(shift) * UNITS[shift_unit]
+    return int(step / np.timedelta64(1, 'ns')), int(origin / np.timedelta64(1, 'ns'))
+
+
+def is_valid(timeframe):
+    try:
+        parse(timeframe)
+    except ValueError:
+        return False
+    return True
+
+
+def bucket_starts(dates, timeframe, lo=0, hi=None):
+    """
+    Buckets of the sorted datetime64[ns] dates[lo:hi]:
+    (row of each non-empty bucket's first bar, the bucket's opening time as int64 ns)
+    """
+    hi = len(dates) if hi is None else hi
+    if hi <= lo:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    step, origin = parse(timeframe)
+    stamps = np.asarray(dates[lo:hi]).view(np.int64)
+    first, last = (int(stamps[0]) - origin) // step, (int(stamps[-1]) - origin) // step
+    edges = origin + np.arange(first, last + 1, dtype=np.int64) * step
+    starts = np.searchsorted(stamps, edges, side='left')
+    filled = starts < np.append(starts[1:], len(stamps))
+    return starts[filled] + lo, edges[filled]
+
+
+def resample(bars, timeframe, start=None, end=None):
+    """
+    BAR_DTYPE 1M bars -> bars of `timeframe`, for the 1M bars with
+    start <= Date <= end only (either may be None). A bucket cut by the
+    window's edges holds just the bars inside the window.
+    """
+    dates = bars['Date']
+    lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, 'ns'), side='left'))
+    hi = len(bars) if end is None else int(np.searchsorted(dates, np.datetime64(end, 'ns'), side='right'))
+    starts, opens = bucket_starts(dates, timeframe, lo, hi)
+    out = lod.aggregate(bars[lo:hi], starts - lo)
+    out['Date'] = opens.view('datetime64[ns]')
+    return out
@@ -0,0 +1,67 @@
+# ==============================================================================
+# timeindex.py — Kgosi_View Timestamp Index
+# ==============================================================================
+"""
+O(log n) timestamp lookups over a sorted series.
+
+Bars are stored in time order, so date jumps, overlay alignment and range
+queries are binary searches on the int64 epoch-ns view of the Date column
+(np.searchsorted) instead of full-column subtractions or sort + merge_asof.
+Over a memory-mapped store a lookup only touches ~log2(n) pages.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def to_ns(ts):
+    """Timestamp-like (str, date, datetime64, Timestamp) -> int64 epoch ns"""
+    return pd.Timestamp(ts).as_unit('ns').value
+
+
+class TimeIndex:
+    """Sorted int64 epoch-ns timestamps of one loaded series"""
+
+    def __init__(self, dates):
+        dates = np.asarray(dates)
+        if dates.dtype.kind == 'M':
+            dates = dates.astype('datetime64[ns]', copy=False).view('i8')
+        self.ns = dates
+
+    def __len__(self):
+        return len(self.ns)
+
+    def locate(self, ts, side='left'):
+        """Insertion position of ts ('left': first bar >= ts, 'right': first bar > ts)"""
+        return int(np.searchsorted(self.ns, to_ns(ts), side=side))
+
+    def at_or_before(self, ts):
+        """Last bar at or before ts (0 if ts precedes the series)"""
+        return max(0, self.locate(ts, side='right') - 1)
+
+    def nearest(self, ts):
+        """Bar closest in time to ts"""
+        if len(self.ns) == 0:
+            return 0
+        target = to_ns(ts)
+        i = int(np.searchsorted(self.ns, target))
+        if i == 0:
+            return 0
+        if i >= len(self.ns):
+            return len(self.ns) - 1
+        return i if self.ns[i] - target < target - self.ns[i - 1] else i - 1
+
+    def between(self, start=None, end=None):
+        """Positions [lo, hi) of bars with start <= Date <= end"""
+        lo = 0 if start is None else self.locate(start, side='left')
+        hi = len(self.ns) if end is None else self.locate(end, side='right')
+        return lo, max(lo, hi)
+
+    def align(self, other):
+        """
+        Row of this series for every timestamp in `other` (a TimeIndex):
+        the first bar at or after it, or the last bar once other runs past
+        our end. Same result as merge_asof(direction='forward') + ffill.
+        """
+        rows = np.searchsorted(self.ns, other.ns, side='left')
+        return np.minimum(rows, len(self.ns) - 1)
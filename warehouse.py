@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# warehouse.py — Kgosi_View Columnar Bar Warehouse
+# ==============================================================================
+"""
+Per-symbol, per-year Parquet partitions replacing SYMBOL_1M.csv.
+
+Layout on the NFS share:
+    <DATA_PATH>/warehouse/EURUSD/1M/2015.parquet
+    <DATA_PATH>/warehouse/EURUSD/1M/2016.parquet
+    ...
+
+Every reader (app.get_data, the refinery, the harvester) goes through
+read_bars() / write_bars(), so a chart request only opens the years it needs
+and only decodes the columns it asks for.
+
+Each symbol keeps a manifest.json of the date range covered by every
+partition; ingest is append-only against it.
+
+Prices are stored as integer points (see ENCODING), so a partition holds the
+quoted decimals exactly in a fraction of the space of float columns.
+
+Migrate existing CSVs once with:
+    python warehouse.py migrate [--data-path PATH] [--symbols EURUSD GBPUSD]
+Rewrite partitions from before the integer encoding with:
+    python warehouse.py repack [--data-path PATH] [--symbols EURUSD GBPUSD]
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa  # pip install pyarrow
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# ========== CONFIG ==========
+DATA_PATH = os.environ.get('KGOSI_DATA_PATH', '/mnt/kgosi_view_data/projects/finance/data')
+WAREHOUSE_DIR = "warehouse"
+BASE_TIMEFRAME = "1M"
+MANIFEST_NAME = "manifest.json"
+
+COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+# Column types read_bars() returns (prices as float64 with exact=True)
+SCHEMA = pa.schema([
+    ('Date', pa.timestamp('ns')),
+    ('Open', pa.float32()),
+    ('High', pa.float32()),
+    ('Low', pa.float32()),
+    ('Close', pa.float32()),
+    ('Volume', pa.int64()),
+])
+
+# ~1 month of 1M bars per row group, so date filters can skip most of a year
+ROW_GROUP_SIZE = 32_768
+
+# Column spellings used by the older writers (refinery: Vol, harvester: datetime)
+_RENAMES = {'datetime': 'Date', 'Vol': 'Volume'}
+
+
+# ========== PATHS ==========
+
+def warehouse_root(root=None):
+    return Path(root or DATA_PATH) / WAREHOUSE_DIR
+
+
+def series_dir(symbol, timeframe=BASE_TIMEFRAME, root=None):
+    return warehouse_root(root) / symbol.upper() / timeframe
+
+
+def partition_path(symbol, year, timeframe=BASE_TIMEFRAME, root=None):
+    return series_dir(symbol, timeframe, root) / f"{int(year)}.parquet"
+
+
+def legacy_csv_path(symbol, root=None):
+    """The pre-warehouse SYMBOL_1M.csv (or SYMBOL.csv), if one exists"""
+    base = Path(root or DATA_PATH)
+    for name in (f"{symbol}_1M.csv", f"{symbol}.csv"):
+        if (base / name).exists():
+            return base / name
+    return None
+
+
+def list_years(symbol, timeframe=BASE_TIMEFRAME, root=None):
+    return sorted(int(y) for y in load_manifest(symbol, root).get(timeframe, {}))
+
+
+def list_symbols(root=None, include_legacy=True):
+    """Symbols in the warehouse, plus any not-yet-migrated CSVs"""
+    symbols = set()
+    wh = warehouse_root(root)
+    if wh.is_dir():
+        symbols.update(p.name for p in wh.iterdir() if (p / BASE_TIMEFRAME).is_dir())
+    if include_legacy:
+        base = Path(root or DATA_PATH)
+        if base.is_dir():
+            symbols.update(
+                f.replace('_1M.csv', '').replace('.csv', '')
+                for f in os.listdir(base) if f.endswith('.csv')
+            )
+    return sorted(symbols)
+
+
+# ========== NORMALIZATION ==========
+
+def normalize(df):
+    """Coerce any of our historic bar layouts to the warehouse schema"""
+    df = df.rename(columns=_RENAMES)
+    if 'Volume' not in df.columns:
+        df['Volume'] = 0
+    df = df[COLUMNS].copy()
+
+    df['Date'] = pd.to_datetime(df['Date'])
+    if df['Date'].dt.tz is not None:
+        df['Date'] = df['Date'].dt.tz_localize(None)
+    df['Date'] = df['Date'].astype('datetime64[ns]')
+
+    for col in PRICE_COLUMNS:
+        # float32 (the bar store's precision) stays as is; anything else is kept exact as float64
+        if df[col].dtype != np.float32:
+            df[col] = df[col].astype('float64')
+    df['Volume'] = df['Volume'].fillna(0).astype('int64')
+
+    df = df.drop_duplicates(subset=['Date'], keep='last').sort_values('Date')
+    return df.reset_index(drop=True)
+
+
+# ========== MANIFEST ==========
+# warehouse/EURUSD/manifest.json records the covered range of every partition:
+#   {"1M": {"2015": {"first": "...", "last": "...", "rows": 372001, "bytes": 5123456}}, "1H": {...}}
+# Writers consult it to skip already-ingested ranges without opening any Parquet.
+# "complete": true marks a finished year whose whole archive was ingested (mark_complete).
+
+def manifest_path(symbol, root=None):
+    return warehouse_root(root) / symbol.upper() / MANIFEST_NAME
+
+
+def _partition_entry(table, path, previous=None):
+    dates = table.column('Date')
+    entry = {
+        'first': pd.Timestamp(dates[0].as_py()).isoformat(),
+        'last': pd.Timestamp(dates[-1].as_py()).isoformat(),
+        'rows': table.num_rows,
+        'bytes': path.stat().st_size,
+    }
+    if previous and previous.get('complete'):
+        # A finished year stays finished when the partition is rewritten
+        entry['complete'] = True
+    return entry
+
+
+def rebuild_manifest(symbol, root=None):
+    """Regenerate the manifest from the partitions on disk"""
+    manifest = {}
+    symbol_root = warehouse_root(root) / symbol.upper()
+    for folder in sorted(p for p in symbol_root.iterdir() if p.is_dir()):
+        for path in sorted(folder.glob("*.parquet")):
+            if path.stem.isdigit():
+                table = pq.read_table(path, columns=['Date'])
+                if table.num_rows:
+                    manifest.setdefault(folder.name, {})[path.stem] = _partition_entry(table, path)
+    save_manifest(symbol, manifest, root)
+    return manifest
+
+
+def load_manifest(symbol, root=None):
+    path = manifest_path(symbol, root)
+    if path.exists():
+        return json.loads(path.read_text())
+    if path.parent.is_dir():
+        return rebuild_manifest(symbol, root)
+    return {}
+
+
+def save_manifest(symbol, manifest, root=None):
+    path = manifest_path(symbol, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def mark_complete(symbol, years, timeframe=BASE_TIMEFRAME, root=None):
+    """Record that these years hold their full archive, so harvesters stop fetching them"""
+    manifest = load_manifest(symbol, root)
+    parts = manifest.get(timeframe, {})
+    marked = [y for y in years if str(y) in parts]
+    for year in marked:
+        parts[str(year)]['complete'] = True
+    if marked:
+        save_manifest(symbol, manifest, root)
+    return marked
+
+
+def coverage(symbol, timeframe=BASE_TIMEFRAME, root=None):
+    """Sorted [(first, last), ...] per partition, from the manifest only"""
+    parts = load_manifest(symbol, root).get(timeframe, {})
+    return [
+        (pd.Timestamp(parts[y]['first']), pd.Timestamp(parts[y]['last']))
+        for y in sorted(parts, key=int)
+    ]
+
+
+# ========== ENCODING ==========
+# A partition stores prices as integer points at the fewest decimals (<= MAX_DECIMALS)
+# that reproduce every quote: Open as is, High and Low as distances above and below
+# Open, Close as the move from Open. Every column is DELTA_BINARY_PACKED (deltas,
+# bit-packed per block), so a run of consecutive minutes costs zero bits per timestamp
+# and a small move a few bits per price; zstd runs on top. The decimals live in the
+# file's schema metadata. Partitions with float prices (written before this encoding,
+# or whose prices need more than MAX_DECIMALS) are read as well.
+
+MAX_DECIMALS = 6
+DECIMALS_KEY = b'kgosi.decimals'
+PACKED_SCHEMA = pa.schema([
+    ('Date', pa.timestamp('ns')),
+    ('Open', pa.int64()),
+    ('High', pa.int64()),
+    ('Low', pa.int64()),
+    ('Close', pa.int64()),
+    ('Volume', pa.int64()),
+])
+_PACKED_ENCODING = {name: 'DELTA_BINARY_PACKED' for name in COLUMNS}
+
+
+def price_decimals(values):
+    """Fewest decimals at which every price survives the round trip at its own dtype, else None"""
+    values = np.asarray(values)
+    wide = values.astype(np.float64)
+    for decimals in range(MAX_DECIMALS + 1):
+        scale = 10.0 ** decimals
+        if ((np.rint(wide * scale) / scale).astype(values.dtype) == values).all():
+            return decimals
+    return None
+
+
+def decimals_of(table):
+    """Decimals of a packed partition table, None for float prices"""
+    meta = table.schema.metadata or {}
+    return int(meta[DECIMALS_KEY]) if DECIMALS_KEY in meta else None
+
+
+def _points(values, decimals):
+    return np.rint(np.asarray(values, dtype=np.float64) * 10.0 ** decimals).astype(np.int64)
+
+
+def encode(df):
+    """normalize()d bars -> partition table (float prices if no decimals reproduce them)"""
+    decimals = price_decimals(df[PRICE_COLUMNS].to_numpy())
+    if decimals is None:
+        return pa.table({name: df[name].to_numpy() for name in COLUMNS})
+    open_ = _points(df['Open'], decimals)
+    return pa.table({
+        'Date': df['Date'].to_numpy(),
+        'Open': open_,
+        'High': _points(df['High'], decimals) - open_,
+        'Low': open_ - _points(df['Low'], decimals),
+        'Close': _points(df['Close'], decimals) - open_,
+        'Volume': df['Volume'].to_numpy(),
+    }, schema=PACKED_SCHEMA.with_metadata({DECIMALS_KEY: str(decimals).encode()}))
+
+
+def decode(table, dtype=np.float32):
+    """
+    Partition table -> bars DataFrame with prices as dtype (None: float64 for
+    packed, the stored type for float partitions). A packed table needs its
+    Open column to decode any price.
+    """
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    decimals = decimals_of(table)
+    prices = [name for name in PRICE_COLUMNS if name in columns]
+    if decimals is not None and prices:
+        scale = 10.0 ** decimals
+        open_ = columns['Open']
+        points = {
+            'Open': open_,
+            'High': open_ + columns.get('High', 0),
+            'Low': open_ - columns.get('Low', 0),
+            'Close': open_ + columns.get('Close', 0),
+        }
+        for name in prices:
+            # int64 / 10**d is the nearest double to the quoted decimal
+            columns[name] = (points[name] / scale).astype(dtype or np.float64)
+    elif dtype is not None:
+        for name in prices:
+            columns[name] = columns[name].astype(dtype)
+    return pd.DataFrame(columns)
+
+
+def _rescale(table, decimals):
+    """Packed table re-expressed at more decimals (exact: points times a power of ten)"""
+    factor = 10 ** (decimals - decimals_of(table))
+    for name in PRICE_COLUMNS:
+        i = table.schema.get_field_index(name)
+        table = table.set_column(i, name, pc.multiply(table.column(name), factor))
+    return table.replace_schema_metadata({DECIMALS_KEY: str(decimals).encode()})
+
+
+def _concat(tables):
+    """One partition table from pieces that may be packed at different decimals or hold floats"""
+    tables = [t for t in tables if t.num_rows] or tables[:1]
+    tables = [t if decimals_of(t) is not None else encode(decode(t, dtype=None)) for t in tables]
+    decimals = [decimals_of(t) for t in tables]
+    if None in decimals:
+        # Some prices need more than MAX_DECIMALS: keep the whole partition as float64
+        return encode(pd.concat([decode(t, np.float64) for t in tables], ignore_index=True))
+    return pa.concat_tables([_rescale(t, max(decimals)) for t in tables])
+
+
+def _write_options(table):
+    if decimals_of(table) is None:
+        return {'compression': 'zstd'}
+    return {'compression': 'zstd', 'use_dictionary': False, 'column_encoding': _PACKED_ENCODING}
+
+
+# ========== WRITE ==========
+
+
+def _slice_dates(table, lo=None, hi=None):
+    """Rows strictly before lo or strictly after hi (whichever is given)"""
+    dates = table.column('Date')
+    if lo is not None:
+        return table.filter(pc.less(dates, pa.scalar(lo, type=SCHEMA.field('Date').type)))
+    return table.filter(pc.greater(dates, pa.scalar(hi, type=SCHEMA.field('Date').type)))
+
+
+def _write_partition(table, path):
+    """Atomic replace so a reader never sees a half-written year"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE, **_write_options(table))
+    os.replace(tmp, path)
+
+
+def write_bars(symbol, df, timeframe=BASE_TIMEFRAME, root=None, replace=False):
+    """
+    Add bars to the symbol's yearly partitions.
+
+    Default (append-only ingest): rows inside a partition's covered
+    [first, last] range are history we already hold and are dropped. What is
+    left lies strictly before or after the stored rows, so the partition is
+    rebuilt by concatenation only; a fully covered year costs no I/O at all.
+
+    replace=True: rows of the partition between df's first and last
+    timestamp are swapped for df (used when re-aggregating a tail whose last
+    bar was still in progress).
+
+    Returns: list of years written
+    """
+    if df.empty:
+        return []
+    df = normalize(df)
+
+    manifest = load_manifest(symbol, root)
+    parts = manifest.setdefault(timeframe, {})
+
+    years = []
+    for year, part in df.groupby(df['Date'].dt.year, sort=True):
+        path = partition_path(symbol, year, timeframe, root)
+        entry = parts.get(str(year))
+
+        if entry is None or not path.exists():
+            table = encode(part)
+        elif replace:
+            existing = pq.read_table(path)
+            table = _concat([
+                _slice_dates(existing, lo=part['Date'].iloc[0]),
+                encode(part),
+                _slice_dates(existing, hi=part['Date'].iloc[-1]),
+            ])
+        else:
+            first, last = pd.Timestamp(entry['first']), pd.Timestamp(entry['last'])
+            head = part[part['Date'] < first]
+            tail = part[part['Date'] > last]
+            if head.empty and tail.empty:
+                continue
+            existing = pq.read_table(path)
+            table = _concat([encode(head), existing, encode(tail)])
+
+        _write_partition(table, path)
+        parts[str(year)] = _partition_entry(table, path, entry)
+        years.append(int(year))
+
+    if years:
+        save_manifest(symbol, manifest, root)
+    return years
+
+
+
+class _PartitionStream:
+    """
+    A new year partition written row group by row group, swapped in on close().
+    The file is packed at the decimals of the first frame written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path.with_suffix('.parquet.tmp')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.writer = None
+        self.decimals = None
+        self.first = self.last = None
+        self.rows = 0
+
+    def write(self, part):
+        """Append a frame; False (nothing written) if its prices need more decimals than the file"""
+        table = encode(part)
+        decimals = decimals_of(table)
+        if decimals is None or (self.writer is not None and decimals > self.decimals):
+            return False
+        if self.writer is None:
+            self.decimals = decimals
+            self.writer = pq.ParquetWriter(self.tmp, table.schema, **_write_options(table))
+        self.writer.write_table(_rescale(table, self.decimals), row_group_size=ROW_GROUP_SIZE)
+        if self.first is None:
+            self.first = part['Date'].iloc[0]
+        self.last = part['Date'].iloc[-1]
+        self.rows += len(part)
+        return True
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.tmp, self.path)
+        return {
+            'first': pd.Timestamp(self.first).isoformat(),
+            'last': pd.Timestamp(self.last).isoformat(),
+            'rows': self.rows,
+            'bytes': self.path.stat().st_size,
+        }
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def write_bar_stream(symbol, frames, timeframe=BASE_TIMEFRAME, root=None):
+    """
+    write_bars() for an ordered stream of frames (oldest first), such as an
+    archive being parsed while it downloads.
+
+    A year without a partition is streamed into a temp file one row group at
+    a time and swapped in when the stream moves past it, so only the current
+    frame is held. Years already in the warehouse go through write_bars()
+    frame by frame (covered rows cost nothing). If the stream fails, the year
+    in progress is discarded and earlier years stay written.
+
+    Returns: list of years written
+    """
+    years = []
+    stream = None         # (year, _PartitionStream) being written
+    merged = set()        # years that existed before the stream reached them
+    newest = None
+
+    def finish():
+        year, part_stream = stream
+        entry = part_stream.close()
+        manifest = load_manifest(symbol, root)
+        manifest.setdefault(timeframe, {})[str(year)] = entry
+        save_manifest(symbol, manifest, root)
+        years.append(year)
+
+    try:
+        for df in frames:
+            if df.empty:
+                continue
+            df = normalize(df)
+            if newest is not None:
+                # Frames are ordered; a repeated boundary bar is dropped
+                df = df[df['Date'] > newest]
+                if df.empty:
+                    continue
+            newest = df['Date'].iloc[-1]
+
+            for year, part in df.groupby(df['Date'].dt.year, sort=True):
+                year = int(year)
+                if stream is not None and stream[0] != year:
+                    finish()
+                    stream = None
+                if stream is None and year not in merged:
+                    path = partition_path(symbol, year, timeframe, root)
+                    if str(year) in load_manifest(symbol, root).get(timeframe, {}) and path.exists():
+                        merged.add(year)
+                    else:
+                        stream = (year, _PartitionStream(path))
+                if year not in merged and not stream[1].write(part):
+                    # Finer prices than the file was opened with: close it and merge from here on
+                    if stream[1].rows:
+                        finish()
+                    else:
+                        stream[1].abort()
+                    stream = None
+                    merged.add(year)
+                if year in merged:
+                    years.extend(y for y in write_bars(symbol, part, timeframe, root) if y not in years)
+        if stream is not None:
+            finish()
+            stream = None
+    finally:
+        if stream is not None:
+            stream[1].abort()
+    return years
+
+
+# ========== READ ==========
+
+def read_bars(symbol, timeframe=BASE_TIMEFRAME, columns=None, start=None, end=None, root=None, exact=False):
+    """
+    Load bars for [start, end] (inclusive, either may be None).
+
+    Only partitions whose year overlaps the range are opened, and the date
+    filter is pushed down to Parquet row-group statistics. Falls back to the
+    legacy CSV for symbols that have not been migrated yet.
+
+    Prices come back as float32, like the bar store; exact=True decodes them
+    to float64, the nearest double to each quote.
+    """
+    cols = COLUMNS if columns is None else ['Date'] + [c for c in columns if c != 'Date']
+    dtype = np.float64 if exact else np.float32
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    years = list_years(symbol, timeframe, root)
+    if not years:
+        if timeframe != BASE_TIMEFRAME:
+            return pd.DataFrame(columns=cols)
+        return _read_legacy(symbol, cols, start, end, root, dtype)
+
+    if start is not None:
+        years = [y for y in years if y >= start.year]
+    if end is not None:
+        years = [y for y in years if y <= end.year]
+
+    filters = []
+    if start is not None:
+        filters.append(('Date', '>=', start))
+    if end is not None:
+        filters.append(('Date', '<=', end))
+
+    # Packed prices are stored relative to Open
+    read = cols + ['Open'] if set(cols) & set(PRICE_COLUMNS) and 'Open' not in cols else cols
+    frames = [
+        decode(pq.read_table(partition_path(symbol, y, timeframe, root), columns=read, filters=filters or None), dtype)[cols]
+        for y in years
+    ]
+    if not frames:
+        return pd.DataFrame(columns=cols)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _read_legacy(symbol, cols, start, end, root, dtype=np.float32):
+    path = legacy_csv_path(symbol, root)
+    if path is None:
+        return pd.DataFrame(columns=cols)
+    df = normalize(pd.read_csv(path))
+    df[PRICE_COLUMNS] = df[PRICE_COLUMNS].astype(dtype)
+    if start is not None:
+        df = df[df['Date'] >= start]
+    if end is not None:
+        df = df[df['Date'] <= end]
+    return df[cols].reset_index(drop=True)
+
+
+# ========== MIGRATION ==========
+
+def migrate_csv(symbol, csv_path, root=None, chunksize=2_000_000):
+    """Stream a legacy CSV into yearly partitions. Returns rows written."""
+    rows = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        write_bars(symbol, chunk, root=root)
+        rows += len(chunk)
+    return rows
+
+
+def repack(symbol, root=None):
+    """Rewrite the symbol's float-price partitions in the packed encoding. Returns (bytes before, after)."""
+    manifest = load_manifest(symbol, root)
+    before = after = 0
+    for timeframe, parts in manifest.items():
+        for year, entry in parts.items():
+            path = partition_path(symbol, year, timeframe, root)
+            table = pq.read_table(path)
+            before += entry['bytes']
+            if decimals_of(table) is None:
+                table = _concat([table])
+                _write_partition(table, path)
+                parts[year] = _partition_entry(table, path, entry)
+            after += parts[year]['bytes']
+    save_manifest(symbol, manifest, root)
+    return before, after
+
+
+def migrate(root=None, symbols=None):
+    base = Path(root or DATA_PATH)
+    print(f"--- WAREHOUSE MIGRATION ---")
+    print(f"Source: {base}")
+
+    targets = symbols or list_symbols(root, include_legacy=True)
+    for symbol in targets:
+        csv_path = legacy_csv_path(symbol, root)
+        if csv_path is None:
+            print(f"   {symbol}: no CSV, skipping")
+            continue
+        print(f"   Migrating {symbol} ({csv_path.name})...", end=" ")
+        rows = migrate_csv(symbol, csv_path, root=root)
+        print(f"{rows:,} rows -> {list_years(symbol, root=root)}")
+
+    print("\n--- MIGRATION FINISHED ---")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kgosi_View bar warehouse")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    mig = sub.add_parser('migrate', help="Convert SYMBOL_1M.csv files into Parquet partitions")
+    mig.add_argument('--data-path', default=DATA_PATH)
+    mig.add_argument('--symbols', nargs='*', default=None)
+
+    rp = sub.add_parser('repack', help="Rewrite float-price partitions as packed integer points")
+    rp.add_argument('--data-path', default=DATA_PATH)
+    rp.add_argument('--symbols', nargs='*', default=None)
+
+    man = sub.add_parser('manifest', help="Rebuild coverage manifests from the partitions on disk")
+    man.add_argument('--data-path', default=DATA_PATH)
+    man.add_argument('--symbols', nargs='*', default=None)
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        migrate(root=args.data_path, symbols=args.symbols)
+    elif args.command == 'repack':
+        for symbol in args.symbols or list_symbols(args.data_path, include_legacy=False):
+            before, after = repack(symbol, root=args.data_path)
+            print(f"   {symbol}: {before / 1e6:,.1f} MB -> {after / 1e6:,.1f} MB")
+    elif args.command == 'manifest':
+        for symbol in args.symbols or list_symbols(args.data_path, include_legacy=False):
+            manifest = rebuild_manifest(symbol, root=args.data_path)
+            print(f"   {symbol}: {sorted(manifest)}")
+
+
+if __name__ == "__main__":
+    main()